@@ -0,0 +1,132 @@
+"""Benchmark: CPU per read request, Pydantic response models vs FAST_JSON.
+
+Every example service can answer its list/read endpoints two ways:
+
+- models (default): a Pydantic model per item (`MessageOut`,
+  `AccountOut`, `PostOut`), validated and serialized again by FastAPI
+  through `response_model`;
+- fast (``FAST_JSON=1``): plain dicts encoded straight to JSON bytes
+  (orjson when installed) and returned as a ready `Response`.
+
+For each size in ``--items`` this seeds that many items with plain SQL,
+then sends the same GET in both modes and reports the process CPU time
+and wall time per request and the response size:
+
+- ``chat``: `GET /conversations/{id}?limit=N` of an N-message conversation
+- ``bank``: `GET /accounts?limit=N`
+- ``blog``: `GET /posts` over N posts
+
+The app is imported in-process (like `loadtest.py`) on a temporary
+SQLite file and driven with Starlette's TestClient; the request limits
+are raised so one page can hold every item.
+
+Run from `ai-architecture-lab/`:
+
+    python common/utils/bench_json.py chat --items 10 1000 100000
+"""
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+LAB_ROOT = Path(__file__).resolve().parents[2]
+
+SERVICES = {
+    "bank": ("services/bank-cqrs/simple_cqrs", "app.main"),
+    "chat": ("services/chat-eda/domain_model_example", "app.api"),
+    "blog": ("services/blog-cms/transaction_script_example", "app.main"),
+}
+START_MICROS = 1_704_067_200_000_000
+
+
+# -------------------------------------------------------------------
+# per service: seed n items, return the URL that reads all of them
+# -------------------------------------------------------------------
+def seed_chat(module, tmp: str, n: int) -> str:
+    from app.domain import Conversation
+
+    conv = module.repo.save(Conversation(title=f"bench {n}"))
+    with module.repo._conn() as conn:
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)",
+            ((conv.id, f"user{i % 7}", f"message number {i} in a long chat", START_MICROS + i) for i in range(n)),
+        )
+    return f"/conversations/{conv.id}?limit={n}"
+
+
+def seed_bank(module, tmp: str, n: int) -> str:
+    from app import repository
+
+    conn = repository.get_db_conn(write=True)
+    conn.execute("DELETE FROM accounts")
+    conn.executemany(
+        "INSERT INTO accounts (id, owner, balance) VALUES (?, ?, ?)",
+        ((i, f"owner-{i}", i * 37 % 100_000) for i in range(1, n + 1)),
+    )
+    conn.commit()
+    conn.close()
+    return f"/accounts?limit={n}"
+
+
+def seed_blog(module, tmp: str, n: int) -> str:
+    module.DB_PATH = os.path.join(tmp, f"posts-{n}.db")
+    module.init_db()
+    conn = module.get_db_conn()
+    conn.executemany("INSERT INTO posts (title, content) VALUES (?, ?)", ((f"post {i}", "lorem ipsum " * 20) for i in range(n)))
+    conn.commit()
+    conn.close()
+    return "/posts"
+
+
+SEED = {"chat": seed_chat, "bank": seed_bank, "blog": seed_blog}
+
+
+def measure(client, url: str, rounds: int):
+    client.get(url)   # warm-up
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(rounds):
+        r = client.get(url)
+        assert r.status_code == 200, r.text
+    return (time.process_time() - cpu) / rounds, (time.perf_counter() - wall) / rounds, len(r.content)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("service", choices=sorted(SERVICES))
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--budget", type=int, default=500_000, help="items serialized per size and mode (sets the rounds)")
+    args = parser.parse_args()
+    app_dir, module_name = SERVICES[args.service]
+    with tempfile.TemporaryDirectory() as tmp:
+        # before the import: the services read their settings then
+        biggest = str(max(args.items))
+        os.environ.update(
+            DB_PATH=os.path.join(tmp, "bench.db"),
+            MESSAGES_LIMIT_MAX=biggest,
+            ACCOUNTS_LIMIT_MAX=biggest,
+            READ_CACHE_ENABLED="0",
+        )
+        sys.path.insert(0, str(LAB_ROOT / app_dir))
+        module = importlib.import_module(module_name)
+        from fastapi.testclient import TestClient
+
+        encoder = "orjson" if getattr(module, "orjson", None) is not None else "json"
+        print(f"{args.service}: fast mode encodes with {encoder}")
+        print(f"{'items':>8} {'mode':<7} {'rounds':>6} {'CPU ms/req':>11} {'wall ms/req':>12} {'bytes':>11}")
+        with TestClient(module.app) as client:
+            for n in args.items:
+                url = SEED[args.service](module, tmp, n)
+                rounds = max(3, min(1_000, args.budget // n))
+                results = {}
+                for mode, fast in (("models", False), ("fast", True)):
+                    module.FAST_JSON = fast
+                    results[mode] = cpu, wall, size = measure(client, url, rounds)
+                    print(f"{n:>8} {mode:<7} {rounds:>6} {cpu * 1e3:>11.3f} {wall * 1e3:>12.3f} {size:>11,}")
+                print(f"{'':>8} {'speedup':<7} {'':>6} {results['models'][0] / results['fast'][0]:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
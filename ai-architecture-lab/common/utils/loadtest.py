@@ -0,0 +1,243 @@
+"""Load-test harness for the FastAPI example services.
+
+Drives one of the example apps with N concurrent clients (httpx
+AsyncClient, one coroutine per client) for a fixed duration and reports
+throughput plus p50/p99 latency for every concurrency level:
+
+    mode   clients  requests    req/s   p50 ms   p99 ms  errors
+    sync         1      2412    803.8     1.20     2.51       0
+    ...
+
+Targets (``scenario``): ``bank`` (bank-cqrs), ``chat`` (chat-eda) and
+``blog`` (blog-cms). Each scenario seeds a little data and then runs a
+read-heavy mix of that service's endpoints.
+
+By default the app is imported and driven in-process through
+`httpx.ASGITransport` (no server needed, fresh temporary SQLite file per
+run). ``--compare`` runs the scenario twice in separate processes, once
+with the default sync handlers and once with ``ASYNC_DB=1``. Pass
+``--url`` to load a server you started yourself (e.g. under uvicorn)
+instead.
+
+Run from `ai-architecture-lab/`:
+
+    python common/utils/loadtest.py bank --compare
+    python common/utils/loadtest.py chat --clients 1 50 500 --duration 10
+    python common/utils/loadtest.py blog --url http://127.0.0.1:8000
+
+Learner notes:
+- The client runs in the same process (and, in-process, on the same
+  event loop) as the app, so absolute numbers are pessimistic; compare
+  modes with each other, not with production.
+- "errors" counts transport failures and 5xx responses. Business errors
+  such as 400 insufficient funds or 404 are normal answers.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+LAB_ROOT = Path(__file__).resolve().parents[2]
+
+# (method, url, json body)
+Request = Tuple[str, str, Optional[dict]]
+
+
+@dataclass
+class Scenario:
+    app_dir: str
+    app: str  # "module:attribute"
+    setup: Callable[[httpx.AsyncClient], Awaitable[list]]
+    pick: Callable[[random.Random, list], Request]
+
+
+# -------------------------------------------------------------------
+# scenarios: seed data, then a request mix per service
+# -------------------------------------------------------------------
+async def _bank_setup(client: httpx.AsyncClient) -> list:
+    ids = []
+    for i in range(100):
+        aid = (await client.post("/accounts", json={"owner": f"load-{i}"})).json()["id"]
+        await client.post(f"/accounts/{aid}/deposit", json={"amount": 1000})
+        ids.append(aid)
+    return ids
+
+
+def _bank_pick(rng: random.Random, ids: list) -> Request:
+    r = rng.random()
+    if r < 0.6:
+        return "GET", f"/accounts/{rng.choice(ids)}", None
+    if r < 0.8:
+        return "GET", f"/balances/{rng.choice(ids)}", None
+    if r < 0.95:
+        return "POST", f"/accounts/{rng.choice(ids)}/deposit", {"amount": 1}
+    a, b = rng.sample(ids, 2)
+    return "POST", "/transfer", {"from_id": a, "to_id": b, "amount": 0.01}
+
+
+async def _chat_setup(client: httpx.AsyncClient) -> list:
+    ids = []
+    for i in range(50):
+        cid = (await client.post("/conversations", json={"title": f"load-{i}"})).json()["id"]
+        await client.post(f"/conversations/{cid}/messages", json={"sender": "seed", "text": "hello"})
+        ids.append(cid)
+    return ids
+
+
+def _chat_pick(rng: random.Random, ids: list) -> Request:
+    cid = rng.choice(ids)
+    if rng.random() < 0.7:
+        return "GET", f"/conversations/{cid}", None
+    return "POST", f"/conversations/{cid}/messages", {"sender": "load", "text": "ping"}
+
+
+async def _blog_setup(client: httpx.AsyncClient) -> list:
+    ids = []
+    for i in range(100):
+        post = {"title": f"post {i}", "content": "lorem ipsum " * 20}
+        ids.append((await client.post("/posts", json=post)).json()["id"])
+    return ids
+
+
+def _blog_pick(rng: random.Random, ids: list) -> Request:
+    pid = rng.choice(ids)
+    if rng.random() < 0.8:
+        return "GET", f"/posts/{pid}", None
+    return "PUT", f"/posts/{pid}", {"title": f"post {pid}", "content": "edited " * 20}
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "bank": Scenario("services/bank-cqrs/simple_cqrs", "app.main:app", _bank_setup, _bank_pick),
+    "chat": Scenario("services/chat-eda/domain_model_example", "app.api:app", _chat_setup, _chat_pick),
+    "blog": Scenario("services/blog-cms/transaction_script_example", "app.main:app", _blog_setup, _blog_pick),
+}
+
+
+# -------------------------------------------------------------------
+# load generation
+# -------------------------------------------------------------------
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_level(client: httpx.AsyncClient, scenario: Scenario, state: list, clients: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(n: int) -> None:
+        nonlocal errors
+        rng = random.Random(n)
+        while time.perf_counter() < deadline:
+            method, url, body = scenario.pick(rng, state)
+            start = time.perf_counter()
+            try:
+                r = await client.request(method, url, json=body)
+                if r.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "errors": errors,
+    }
+
+
+def load_app(scenario: Scenario):
+    # Import the service's app the way uvicorn would, from its own folder.
+    app_dir = str(LAB_ROOT / scenario.app_dir)
+    sys.path.insert(0, app_dir)
+    module, attr = scenario.app.split(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+async def run(args) -> None:
+    scenario = SCENARIOS[args.scenario]
+    limits = httpx.Limits(max_connections=max(args.clients), max_keepalive_connections=max(args.clients))
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+        lifespan = None
+    else:
+        app = load_app(scenario)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", limits=limits, timeout=args.timeout)
+        # run the app's startup/shutdown handlers, as a server would
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+    mode = args.mode or ("async" if os.getenv("ASYNC_DB") == "1" else "sync")
+    try:
+        state = await scenario.setup(client)
+        for clients in args.clients:
+            res = await run_level(client, scenario, state, clients, args.duration)
+            print(
+                f"{mode:<6} {res['clients']:>7} {res['requests']:>9} {res['rps']:>8.1f} "
+                f"{res['p50_ms']:>8.2f} {res['p99_ms']:>8.2f} {res['errors']:>7}",
+                flush=True,
+            )
+    finally:
+        await client.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+
+def compare(args, argv: List[str]) -> None:
+    # One process per mode: ASYNC_DB is read when the app is imported.
+    child_args = [a for a in argv if a != "--compare"]
+    for mode, flag in (("sync", "0"), ("async", "1")):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, ASYNC_DB=flag, DB_PATH=os.path.join(tmp, "loadtest.db"))
+            subprocess.run([sys.executable, __file__, *child_args, "--mode", mode, "--no-header"], env=env, check=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--url", help="load a running server instead of importing the app")
+    parser.add_argument("--compare", action="store_true", help="run sync and ASYNC_DB=1 modes back to back")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--no-header", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare and args.url:
+        parser.error("--compare starts the app itself; it cannot be combined with --url")
+    if not args.no_header:
+        print(f"{'mode':<6} {'clients':>7} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    if args.compare:
+        compare(args, argv)
+        return
+    if not args.url and "DB_PATH" not in os.environ:
+        # never load-test the example's real database file
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["DB_PATH"] = os.path.join(tmp, "loadtest.db")
+            asyncio.run(run(args))
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
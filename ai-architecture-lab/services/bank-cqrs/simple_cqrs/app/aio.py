@@ -0,0 +1,97 @@
+"""Async mode: `async def` endpoints backed by dedicated DB threads.
+
+By default every endpoint is a plain `def`. FastAPI runs those on
+Starlette's shared threadpool (40 threads): under load, reads and writes
+queue for the same threads, and writers that do get a thread then queue
+again on the pool's writer lock.
+
+With ``ASYNC_DB=1`` the handlers decorated with `endpoint()` become
+`async def` endpoints that hand the blocking SQLite work to a
+`DBExecutor`:
+
+- a pool of reader threads (``ASYNC_DB_READERS``, defaults to the
+  connection pool size, so a reader never waits for a connection);
+- a writer lane (``ASYNC_DB_WRITERS``, default 1): SQLite has one writer
+  anyway, so commands queue on the event loop instead of parking threads
+  on the writer lock.
+
+The event loop itself never blocks. Compare the two modes with the
+shared load-test harness (`common/utils/loadtest.py`).
+
+Learner notes:
+- The handler code is unchanged; `endpoint()` only changes *where* it
+  runs. `functools.wraps` keeps the signature, so FastAPI still sees the
+  same parameters and models.
+- aiosqlite would give the same effect (one thread per connection); a
+  small executor avoids the extra dependency and keeps the pooled
+  connections from `db.py`.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from . import db
+
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+ASYNC_DB_READERS = int(os.getenv("ASYNC_DB_READERS", str(db.POOL_SIZE)))
+ASYNC_DB_WRITERS = int(os.getenv("ASYNC_DB_WRITERS", "1"))
+
+
+class DBExecutor:
+    """Reader threads + writer lane for blocking DB calls."""
+
+    def __init__(self, readers: int = ASYNC_DB_READERS, writers: int = ASYNC_DB_WRITERS):
+        self._readers = ThreadPoolExecutor(max(1, readers), thread_name_prefix="db-read")
+        self._writers = ThreadPoolExecutor(max(1, writers), thread_name_prefix="db-write")
+
+    async def run(self, fn, *args, write: bool = False, **kwargs):
+        """Run `fn` on the right pool and wait for it without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        pool = self._writers if write else self._readers
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._readers.shutdown(wait=True)
+        self._writers.shutdown(wait=True)
+
+
+_executor: Optional[DBExecutor] = None
+
+
+def get_executor() -> DBExecutor:
+    """Return the app's executor, creating it on first use (again after shutdown())."""
+    global _executor
+    if _executor is None:
+        _executor = DBExecutor()
+    return _executor
+
+
+def shutdown() -> None:
+    """Stop the threads (called when the server shuts down)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def endpoint(write: bool = False):
+    """
+    Decorator for API handlers (put it *below* the `@app.get/post` line).
+
+    - ASYNC_DB off → the handler is returned unchanged.
+    - ASYNC_DB on  → an `async def` wrapper runs it on the executor.
+    """
+    def decorate(fn):
+        if not ASYNC_DB:
+            return fn
+
+        @functools.wraps(fn)
+        async def run(*args, **kwargs):
+            return await get_executor().run(fn, *args, write=write, **kwargs)
+
+        return run
+
+    return decorate
@@ -0,0 +1,120 @@
+"""Bounded in-process cache for the query side.
+
+The read-model only changes when an `account_changed` event is
+published, so hot lookups (`GET /balances/{id}`, `GET /accounts/{id}`)
+can be answered from memory until the next event for that account. The
+API wires an event subscriber that refreshes or drops entries as events
+arrive (see `main.py`); the TTL is a safety net for anything that
+changes the database without an event (e.g. the replay command run from
+another process).
+
+Learner notes:
+- LRU: an `OrderedDict` keeps entries in access order; when the cache is
+  full the least recently used entry is evicted.
+- TTL: each entry remembers when it was stored and is treated as a miss
+  once it is older than `ttl` seconds.
+- `get_or_load()` guards against a classic race: a reader loads an old
+  value from the DB, an event refreshes the entry, then the reader stores
+  its old value on top. Loads that overlap with an invalidation are
+  returned but not cached.
+- `stats()` exposes hit/miss/eviction counters for monitoring.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+READ_CACHE_ENABLED = os.getenv("READ_CACHE_ENABLED", "1") == "1"
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "10000"))
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "30"))
+
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, maxsize: int = READ_CACHE_SIZE, ttl: float = READ_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by every invalidation/refresh; see get_or_load()
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value or `MISSING`."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return MISSING
+            value, stored_at = entry
+            if self._clock() - stored_at > self.ttl:
+                del self._data[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (value, self._clock())
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, or call `loader()` and cache its result.
+
+        `None` results (not found) are returned but never cached.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, value)
+        return value
+
+    def refresh(self, key: Hashable, update: Callable[[Any], Any]) -> None:
+        """Replace an entry with `update(old_value)` if it is cached."""
+        with self._lock:
+            self._generation += 1
+            entry = self._data.get(key)
+            if entry is not None:
+                self._store(key, update(entry[0]))
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            data = dict(self._stats)
+            data.update(size=len(self._data), maxsize=self.maxsize, ttl=self.ttl)
+        return data
+
+
+def make_read_cache() -> Optional[LRUCache]:
+    """Return the query-side cache, or None when disabled by config."""
+    return LRUCache() if READ_CACHE_ENABLED else None
@@ -0,0 +1,257 @@
+"""SQLite connection pool shared by the repository and the service layer.
+
+Opening a SQLite connection is cheap compared to a network database, but
+it is not free: the file is opened, the schema is parsed and every pragma
+has to be re-applied. When each request opens and closes its own
+connection that setup/teardown becomes a large share of the request.
+
+This module keeps connections open for the life of the process:
+
+- Readers: a bounded set of connections (``DB_POOL_SIZE``). A thread
+  checks one out for the duration of a query and gets its own connection
+  while it holds it. When a thread comes back it prefers the connection
+  it used last, which keeps SQLite's page cache warm for that thread.
+- Writer: exactly ONE connection, guarded by a lock. SQLite only allows
+  one writer at a time anyway, so serializing writers in-process avoids
+  `database is locked` retries and busy-waiting inside SQLite.
+
+Every connection is opened in WAL mode so readers never block the writer
+(and vice versa), with a few pragmas tuned for a small OLTP workload.
+
+Learner notes:
+- Callers get a `PooledConnection`. It behaves like a `sqlite3.Connection`
+  but `close()` hands it back to the pool instead of closing the file.
+- `ConnectionPool.health_check()` and `ConnectionPool.stats()` are the
+  health and metrics hooks; `add_metrics_hook()` lets you forward wait
+  timings to whatever metrics system you use.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Applied to every new connection. WAL lets readers and the single writer
+# work concurrently; synchronous=NORMAL is safe in WAL mode and avoids an
+# fsync per commit; busy_timeout covers other processes holding the lock.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the timeout."""
+
+
+class PooledConnection:
+    """A checked-out connection. `close()` returns it to its pool."""
+
+    def __init__(self, pool: "ConnectionPool", conn: sqlite3.Connection, writer: bool):
+        self._pool = pool
+        self._conn = conn
+        self.writer = writer
+        self._released = False
+
+    def __getattr__(self, name):
+        # Delegate execute/cursor/commit/rollback/... to the real connection.
+        return getattr(self._conn, name)
+
+    def close(self) -> None:
+        if not self._released:
+            self._released = True
+            self._pool._release(self)
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        finally:
+            self.close()
+
+
+class ConnectionPool:
+    """Per-thread reader connections plus one serialized writer connection."""
+
+    def __init__(self, path: str, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT):
+        self.path = path
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self._idle: List[sqlite3.Connection] = []
+        self._opened = 0
+        self._local = threading.local()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._hooks: List[Callable[[str, float], None]] = []
+        self._stats: Dict[str, float] = {
+            "connections_opened": 0,
+            "reader_checkouts": 0,
+            "reader_waits": 0,
+            "writer_checkouts": 0,
+            "writer_wait_seconds": 0.0,
+        }
+
+    # -- connection setup -------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    # -- checkout / release -----------------------------------------------
+    def reader(self) -> PooledConnection:
+        """Check out a reader connection (blocks while all are in use)."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self._cond:
+            self._stats["reader_checkouts"] += 1
+            waited = False
+            while True:
+                conn = self._take_idle()
+                if conn is not None:
+                    break
+                if self._opened < self.size:
+                    self._opened += 1
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._opened -= 1
+                        raise
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"no reader connection available after {self.timeout}s")
+                if not waited:
+                    waited = True
+                    self._stats["reader_waits"] += 1
+                self._cond.wait(remaining)
+        if waited:
+            self._emit("reader_wait", time.monotonic() - start)
+        self._local.last = conn
+        return PooledConnection(self, conn, writer=False)
+
+    def _take_idle(self) -> Optional[sqlite3.Connection]:
+        if not self._idle:
+            return None
+        last = getattr(self._local, "last", None)
+        if last is not None and last in self._idle:
+            self._idle.remove(last)
+            return last
+        return self._idle.pop()
+
+    def writer(self) -> PooledConnection:
+        """Check out the single writer connection (serialized by a lock)."""
+        start = time.monotonic()
+        if not self._writer_lock.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"writer connection busy for more than {self.timeout}s")
+        waited = time.monotonic() - start
+        try:
+            if self._writer is None:
+                self._writer = self._connect()
+        except Exception:
+            self._writer_lock.release()
+            raise
+        with self._cond:
+            self._stats["writer_checkouts"] += 1
+            self._stats["writer_wait_seconds"] += waited
+        self._emit("writer_wait", waited)
+        return PooledConnection(self, self._writer, writer=True)
+
+    def _release(self, pooled: PooledConnection) -> None:
+        conn = pooled._conn
+        # Never hand a connection with an open transaction to the next user.
+        if conn.in_transaction:
+            conn.rollback()
+        if pooled.writer:
+            self._writer_lock.release()
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    # -- health / metrics hooks -------------------------------------------
+    def add_metrics_hook(self, fn: Callable[[str, float], None]) -> None:
+        """Register `fn(event_name, value)`; called for timing events."""
+        self._hooks.append(fn)
+
+    def _emit(self, event: str, value: float) -> None:
+        for fn in list(self._hooks):
+            try:
+                fn(event, value)
+            except Exception:
+                # a broken metrics sink must not break a database call
+                pass
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            data = dict(self._stats)
+            data.update(
+                pool_size=self.size,
+                readers_open=self._opened,
+                readers_idle=len(self._idle),
+                readers_in_use=self._opened - len(self._idle),
+                writer_in_use=self._writer_lock.locked(),
+            )
+        return data
+
+    def health_check(self) -> Dict:
+        """Run a trivial query on a reader and report pool state."""
+        try:
+            conn = self.reader()
+            try:
+                conn.execute("SELECT 1").fetchone()
+                mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            finally:
+                conn.close()
+        except Exception as e:
+            return {"ok": False, "error": str(e), "stats": self.stats()}
+        return {"ok": True, "journal_mode": mode, "stats": self.stats()}
+
+    def close(self) -> None:
+        """Close idle readers and the writer (used on shutdown and in tests)."""
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._opened -= len(self._idle)
+            self._idle.clear()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+# One pool per database file, shared by every module in the process.
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str) -> ConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+
+def close_all() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
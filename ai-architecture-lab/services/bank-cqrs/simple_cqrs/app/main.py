@@ -8,27 +8,88 @@ command (write) handling, publishing events, and read-model projection.
 Learner notes
 ------------
 - Command handlers call `AccountService` methods (the write-side).
-- The example uses a synchronous in-process projection for simplicity so
-    the read-model is updated immediately (deterministic behavior for
-    demonstrations and tests).
+- Commands append events to a transactional outbox; projection workers
+    (`projections.py`) drain it into the read-model in the background.
+    Without the app lifespan (e.g. plain `TestClient(app)` in tests) the
+    outbox is drained inline, so reads stay deterministic.
 - `DB_PATH` can be overridden for tests to isolate SQLite files.
+- `GET /health` reports the connection pool state (see `db.py`).
+- `GET /accounts` is paginated with keyset cursors (`?after_id=&limit=`)
+    and can stream NDJSON, so listing never loads the whole table.
+- Query endpoints are fronted by an in-process LRU/TTL cache (`cache.py`)
+    that the `account_changed` events keep fresh; `READ_CACHE_ENABLED=0`
+    turns it off.
+- `ASYNC_DB=1` turns the handlers marked `@aio.endpoint` into `async def`
+    endpoints that run their SQLite work on dedicated reader/writer
+    threads instead of Starlette's shared threadpool (see `aio.py`).
+- `WRITE_MODEL=events` swaps the write-model for the append-only event
+    store with snapshots (`event_store.py`); the default is `table`.
+- `FAST_JSON=1` makes the account reads encode plain dicts straight to
+    JSON bytes (orjson when installed) instead of building an `AccountOut`
+    per row; the response schema is the same.
+- Money is an int of minor units everywhere behind this module; the
+    `Amount`/`Balance` field types and `money.to_major` convert at the
+    HTTP boundary (see `money.py`).
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
 
+import itertools
+import json
 import os
-
+import tempfile
+
+try:
+    import orjson
+except ImportError:  # optional: the json module encodes the same, only slower
+    orjson = None
+
+from . import aio
+from . import cache
+from . import db
+from . import event_store
+from . import money
+from . import projections
 from . import repository
-from .service import AccountService, InsufficientFunds
+from .service import AccountService, ConcurrentUpdate, EventSourcedAccountService, InsufficientFunds
 from . import events
 
 DB_PATH = os.getenv("DB_PATH", "./bank.db")
+# "table": balances updated in place; "events": append-only event store
+WRITE_MODEL = os.getenv("WRITE_MODEL", "table")
+# NDJSON batches are applied in chunks of this many transfers
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "1000"))
+# page size of GET /accounts (default and upper bound of ?limit=)
+ACCOUNTS_LIMIT_DEFAULT = int(os.getenv("ACCOUNTS_LIMIT_DEFAULT", "100"))
+ACCOUNTS_LIMIT_MAX = int(os.getenv("ACCOUNTS_LIMIT_MAX", "1000"))
+# account reads skip the AccountOut models and return pre-encoded JSON
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
 
 app = FastAPI(title="Bank CQRS - Minimal Example")
 
-svc = AccountService()
+svc = EventSourcedAccountService() if WRITE_MODEL == "events" else AccountService()
+
+# Query-side cache (None when disabled). Entries are keyed by
+# ("account", id) and ("balance", id).
+read_cache = cache.make_read_cache()
+
+
+def _refresh_cache(event):
+    # Projection path: every account_changed event carries the new balance,
+    # so cached entries are updated in place instead of being re-read.
+    if event.get("type") != "account_changed":
+        return
+    aid, balance = event["account_id"], event["balance"]
+    read_cache.refresh(("balance", aid), lambda _: balance)
+    read_cache.refresh(("account", aid), lambda acc: {**acc, "balance": balance})
+
+
+if read_cache is not None:
+    events.subscribe(_refresh_cache)
 
 
 class AccountIn(BaseModel):
@@ -37,35 +98,80 @@ class AccountIn(BaseModel):
 
 class AccountOut(AccountIn):
     id: int
-    balance: float
+    balance: money.Balance
 
 
 class TransferIn(BaseModel):
     from_id: int
     to_id: int
-    amount: float
+    amount: money.Amount
 
 
 class AmountIn(BaseModel):
-    amount: float
+    amount: money.Amount
+
+
+class TransferBatchIn(BaseModel):
+    transfers: List[TransferIn]
+
+
+class TransferResult(BaseModel):
+    index: int
+    ok: bool
+    error: Optional[str] = None
+
+
+class TransferBatchOut(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[TransferResult]
 
 
 @app.on_event("startup")
 def startup():
     # ensure DB and read-model exist
     repository.init_db()
-    # register a simple, in-process projection: when an account changes,
-    # update the denormalized read-model table. In production this would
-    # usually be performed by asynchronous projection workers that
-    # subscribe to events from a broker.
-    def projection(event):
-        if event.get("type") == "account_changed":
-            repository.upsert_account_balance(event["account_id"], event["balance"])
+    if WRITE_MODEL == "events":
+        event_store.init_db()
+    # start the projection worker pool: it drains the outbox into the
+    # denormalized read-model table. In production the workers would
+    # usually consume events from a broker instead.
+    if projections.PROJECTION_MODE == "async":
+        projections.runner.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    projections.runner.stop()
+    aio.shutdown()
+    # release the pooled connections (readers + writer)
+    db.close_all()
 
-    events.subscribe(projection)
+
+@app.get("/health")
+@aio.endpoint()
+def health():
+    status = repository.get_pool().health_check()
+    if not status["ok"]:
+        raise HTTPException(status_code=503, detail=status["error"])
+    return status
+
+
+@app.get("/projections")
+@aio.endpoint()
+def projection_status():
+    # worker stats plus per-partition lag (pending events, oldest age)
+    return {"stats": projections.runner.stats(), "lag": projections.runner.lag()}
+
+
+@app.get("/cache")
+def cache_stats():
+    # hit/miss/eviction counters of the query-side cache
+    return read_cache.stats() if read_cache is not None else {"enabled": False}
 
 
 @app.post("/accounts", response_model=AccountOut)
+@aio.endpoint(write=True)
 def create_account(payload: AccountIn):
     aid = svc.create_account(payload.owner)
     acc = repository.get_account(aid)
@@ -73,20 +179,75 @@ def create_account(payload: AccountIn):
 
 
 @app.get("/accounts", response_model=List[AccountOut])
-def list_accounts():
-    rows = repository.list_accounts()
-    return [AccountOut(id=r["id"], owner=r["owner"], balance=r["balance"]) for r in rows]
+@aio.endpoint()
+def list_accounts(
+    request: Request,
+    response: Response,
+    after_id: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=ACCOUNTS_LIMIT_MAX),
+):
+    """List accounts in id order, one keyset page at a time.
+
+    - JSON (default): at most `limit` accounts (default
+      `ACCOUNTS_LIMIT_DEFAULT`) with ``id > after_id``. When the page is
+      full, the `X-Next-After-Id` header carries the `after_id` of the
+      next page.
+    - `Accept: application/x-ndjson`: streams every account after
+      `after_id` (or the first `limit` of them), one JSON object per
+      line, read from the database page by page so memory stays flat.
+    """
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        page_size = min(limit, repository.ACCOUNTS_PAGE_SIZE) if limit else repository.ACCOUNTS_PAGE_SIZE
+        rows = repository.iter_accounts(after_id, page_size)
+        if limit:
+            rows = itertools.islice(rows, limit)
+        return StreamingResponse(_ndjson_accounts(rows), media_type="application/x-ndjson")
+    limit = limit or ACCOUNTS_LIMIT_DEFAULT
+    rows = repository.list_accounts(after_id, limit)
+    if FAST_JSON:
+        # the header goes on the Response that is actually sent
+        response = _json_response([_account_dict(r) for r in rows])
+    if len(rows) == limit:
+        response.headers["X-Next-After-Id"] = str(rows[-1]["id"])
+    return response if FAST_JSON else [AccountOut(id=r["id"], owner=r["owner"], balance=r["balance"]) for r in rows]
+
+
+def _account_dict(r):
+    # Same shape as AccountOut, without building a model per row.
+    return {"owner": r["owner"], "id": r["id"], "balance": money.to_major(r["balance"])}
+
+
+def _ndjson_accounts(rows):
+    for r in rows:
+        yield json.dumps(_account_dict(r)) + "\n"
+
+
+def _json_response(content) -> Response:
+    # FastAPI sends a returned Response as is: no response_model
+    # validation and no second serialization pass.
+    if orjson is not None:
+        body = orjson.dumps(content)
+    else:
+        body = json.dumps(content, separators=(",", ":")).encode()
+    return Response(content=body, media_type="application/json")
 
 
 @app.get("/accounts/{account_id}", response_model=AccountOut)
+@aio.endpoint()
 def get_account(account_id: int):
-    acc = repository.get_account(account_id)
+    if read_cache is not None:
+        acc = read_cache.get_or_load(("account", account_id), lambda: repository.get_account(account_id))
+    else:
+        acc = repository.get_account(account_id)
     if not acc:
         raise HTTPException(status_code=404, detail="account not found")
+    if FAST_JSON:
+        return _json_response(_account_dict(acc))
     return AccountOut(id=acc["id"], owner=acc["owner"], balance=acc["balance"])
 
 
 @app.post("/accounts/{account_id}/deposit")
+@aio.endpoint(write=True)
 def deposit(account_id: int, payload: AmountIn):
     try:
         new = svc.deposit(account_id, payload.amount)
@@ -94,10 +255,13 @@ def deposit(account_id: int, payload: AmountIn):
         raise HTTPException(status_code=404, detail="account not found")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    return {"id": account_id, "balance": new}
+    except ConcurrentUpdate as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"id": account_id, "balance": money.to_major(new)}
 
 
 @app.post("/accounts/{account_id}/withdraw")
+@aio.endpoint(write=True)
 def withdraw(account_id: int, payload: AmountIn):
     try:
         new = svc.withdraw(account_id, payload.amount)
@@ -105,23 +269,138 @@ def withdraw(account_id: int, payload: AmountIn):
         raise HTTPException(status_code=404, detail="account not found")
     except InsufficientFunds:
         raise HTTPException(status_code=400, detail="insufficient funds")
-    return {"id": account_id, "balance": new}
+    except ConcurrentUpdate as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"id": account_id, "balance": money.to_major(new)}
 
 
 @app.post("/transfer")
+@aio.endpoint(write=True)
 def transfer(payload: TransferIn):
     try:
         svc.transfer(payload.from_id, payload.to_id, payload.amount)
     except KeyError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except InsufficientFunds:
         raise HTTPException(status_code=400, detail="insufficient funds")
+    except ConcurrentUpdate as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return {"ok": True}
 
 
+@app.post("/transfers:batch", response_model=TransferBatchOut)
+async def transfers_batch(request: Request):
+    """Apply many transfers at once, with one result per item.
+
+    - `application/json` body `{"transfers": [...]}`: the whole batch is
+      validated and applied in a single transaction.
+    - `application/x-ndjson` body (one transfer per line): the body is
+      read as a stream and applied in transactions of `BATCH_CHUNK_SIZE`
+      items. Per-item results are spooled to a temporary file (memory up
+      to 1 MB, then disk) and streamed back as NDJSON, so neither side
+      ever holds the full batch in memory.
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        results = await _apply_ndjson_batch(request)
+        return StreamingResponse(_iter_spooled(results), media_type="application/x-ndjson")
+    try:
+        payload = TransferBatchIn.model_validate(await request.json())
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    items = [(t.from_id, t.to_id, t.amount) for t in payload.transfers]
+    try:
+        results = await _run_command(svc.transfer_many, items)
+    except ConcurrentUpdate as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    succeeded = sum(1 for r in results if r["ok"])
+    return TransferBatchOut(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[TransferResult(index=i, **r) for i, r in enumerate(results)],
+    )
+
+
+def _run_command(fn, *args):
+    # the batch endpoint is async already; in async mode its commands go
+    # to the DB writer lane like every other command
+    if aio.ASYNC_DB:
+        return aio.get_executor().run(fn, *args, write=True)
+    return run_in_threadpool(fn, *args)
+
+
+async def _ndjson_lines(request: Request):
+    # Split the streamed body into lines without buffering all of it.
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def _apply_ndjson_batch(request: Request):
+    # Note: the body must be fully consumed before the response starts;
+    # a StreamingResponse may not read the request body itself.
+    spool = tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+b")
+    index = 0
+    chunk: List = []
+
+    async def flush():
+        # `chunk` holds (index, item-or-error) pairs in input order
+        valid = [item for _, item in chunk if not isinstance(item, str)]
+        try:
+            applied = iter(await _run_command(svc.transfer_many, valid) if valid else [])
+        except ConcurrentUpdate as e:
+            applied = iter([{"ok": False, "error": str(e)}] * len(valid))
+        for i, item in chunk:
+            result = {"ok": False, "error": item} if isinstance(item, str) else next(applied)
+            spool.write((json.dumps({"index": i, **result}) + "\n").encode())
+        chunk.clear()
+
+    async for line in _ndjson_lines(request):
+        try:
+            t = TransferIn.model_validate_json(line)
+            chunk.append((index, (t.from_id, t.to_id, t.amount)))
+        except ValidationError:
+            chunk.append((index, "invalid transfer"))
+        index += 1
+        if len(chunk) >= BATCH_CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+    spool.seek(0)
+    return spool
+
+
+def _iter_spooled(spool):
+    try:
+        for line in spool:
+            yield line
+    finally:
+        spool.close()
+
+
+@app.get("/accounts/{account_id}/events")
+@aio.endpoint()
+def account_events(account_id: int):
+    # audit trail kept by the event-sourced write-model
+    if WRITE_MODEL != "events":
+        raise HTTPException(status_code=404, detail="event store not enabled")
+    return [{**e, "amount": money.to_major(e["amount"])} for e in event_store.history(account_id)]
+
+
 @app.get("/balances/{account_id}")
+@aio.endpoint()
 def get_balance(account_id: int):
-    b = repository.get_account_balance(account_id)
+    if read_cache is not None:
+        b = read_cache.get_or_load(("balance", account_id), lambda: repository.get_account_balance(account_id))
+    else:
+        b = repository.get_account_balance(account_id)
     if b is None:
         raise HTTPException(status_code=404, detail="balance not found")
-    return {"account_id": account_id, "balance": b}
+    return {"account_id": account_id, "balance": money.to_major(b)}
@@ -0,0 +1,79 @@
+"""Money as integer minor units (e.g. cents).
+
+Floats cannot represent most decimal amounts exactly: 0.1 + 0.2 is not
+0.3, and after enough deposits and withdrawals a REAL balance drifts
+away from the true value. We therefore store, add and compare money as
+an integer number of minor units; ``MONEY_SCALE`` is the number of
+decimal places (2 = cents).
+
+The conversion happens exactly once at each edge:
+- in: `to_minor` parses a decimal amount from the client (rejecting
+  fractions of a minor unit) into an int;
+- out: `to_major` turns the int back into a decimal number for JSON.
+
+Everything in between (service arithmetic, SQLite columns, events,
+snapshots, the read-model and the cache) only ever sees ints.
+
+Learner notes:
+- `Amount` (request fields) and `Balance` (response fields) are Pydantic
+  types: the model attribute is an int in minor units, while the JSON
+  schema and the JSON text show a decimal number, so the HTTP contract
+  does not change. `Amount` parses decimals; `Balance` expects a value
+  that is already in minor units (e.g. straight from the database).
+- Amounts are parsed through `Decimal(str(x))`, so a client sending
+  ``0.1`` gets exactly 10 cents, not 10.000000000000002.
+- ``MONEY_SCALE`` is recorded in the database (`repository.init_db`);
+  opening a DB with a different scale is refused rather than silently
+  misreading every balance.
+"""
+import os
+from decimal import Decimal, InvalidOperation
+from typing import Annotated
+
+from pydantic import BeforeValidator, PlainSerializer, WithJsonSchema
+
+MONEY_SCALE = int(os.getenv("MONEY_SCALE", "2"))
+MINOR_PER_MAJOR = 10 ** MONEY_SCALE
+
+
+def to_minor(amount) -> int:
+    """Parse a decimal amount (number or string) into integer minor units.
+
+    Raises ValueError for non-numbers and for amounts with more decimal
+    places than ``MONEY_SCALE``.
+    """
+    if isinstance(amount, bool):
+        raise ValueError("amount must be a number")
+    try:
+        value = Decimal(str(amount)) * MINOR_PER_MAJOR
+    except InvalidOperation:
+        raise ValueError("amount must be a number")
+    if not value.is_finite() or value != value.to_integral_value():
+        raise ValueError(f"amount must have at most {MONEY_SCALE} decimal places")
+    return int(value)
+
+
+def to_major(minor: int) -> float:
+    """Integer minor units -> decimal number for JSON responses."""
+    return minor / MINOR_PER_MAJOR
+
+
+def minor(amount) -> int:
+    """Coerce a value that is already in minor units to an int.
+
+    Service methods take minor units; integral floats (``50.0``) are
+    accepted for convenience, fractional ones are a programming error.
+    """
+    value = int(amount)
+    if value != amount:
+        raise ValueError("amount must be a whole number of minor units")
+    return value
+
+
+# Pydantic field types: decimal in JSON, int minor units in Python.
+Balance = Annotated[
+    int,
+    PlainSerializer(to_major, return_type=float),
+    WithJsonSchema({"type": "number"}),
+]
+Amount = Annotated[Balance, BeforeValidator(to_minor)]
@@ -0,0 +1,211 @@
+"""Projection workers that drain the outbox into the read model.
+
+The write side only appends `account_changed` events to the `outbox`
+table inside its own transaction (one commit per command). Everything
+else happens here, off the request path:
+
+    outbox  --(batch)-->  account_balances + projection_checkpoints
+                 \\-->  events.publish(...) for other in-process subscribers
+
+Learner notes:
+- Partitioning: worker N handles accounts where ``account_id % workers
+  == N``. Events for one account always land in the same partition, so
+  they are applied in commit order, while different partitions progress
+  independently.
+- Checkpointing: each partition stores the last outbox id it applied in
+  `projection_checkpoints`, in the same transaction as the read-model
+  update. After a crash a worker resumes from its checkpoint.
+- Delivery is at-least-once. Events carry the absolute balance (not a
+  delta), so applying one twice is harmless.
+- Retries: a failing batch is retried with exponential backoff; if it
+  still fails the checkpoint is not advanced and the batch is picked up
+  again on the next poll.
+- Lag: `lag()` reports pending events and the age of the oldest one per
+  partition. Watch it the way you'd watch consumer lag on a broker.
+- Modes: with ``PROJECTION_MODE=async`` (default) the app starts a pool
+  of worker threads on startup. With ``PROJECTION_MODE=sync`` - or when
+  the workers are not running, e.g. in tests that don't start the app -
+  the command thread drains the outbox itself right after committing,
+  which keeps reads deterministic at the price of a second commit.
+"""
+import os
+import threading
+import time
+from typing import Dict, List
+
+from . import events
+from . import repository
+
+PROJECTION_MODE = os.getenv("PROJECTION_MODE", "async")
+PROJECTION_WORKERS = int(os.getenv("PROJECTION_WORKERS", "2"))
+PROJECTION_BATCH_SIZE = int(os.getenv("PROJECTION_BATCH_SIZE", "500"))
+PROJECTION_POLL_INTERVAL = float(os.getenv("PROJECTION_POLL_INTERVAL", "0.5"))
+PROJECTION_MAX_RETRIES = int(os.getenv("PROJECTION_MAX_RETRIES", "3"))
+# delete applied outbox rows after roughly this many events
+OUTBOX_PRUNE_EVERY = int(os.getenv("OUTBOX_PRUNE_EVERY", "1000"))
+
+
+class ProjectionRunner:
+    """Drains the outbox into `account_balances`, one partition per worker."""
+
+    def __init__(
+        self,
+        workers: int = PROJECTION_WORKERS,
+        batch_size: int = PROJECTION_BATCH_SIZE,
+        poll_interval: float = PROJECTION_POLL_INTERVAL,
+        max_retries: int = PROJECTION_MAX_RETRIES,
+    ):
+        self.partitions = max(1, workers)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        # one drainer per partition at a time keeps per-account ordering
+        self._locks = [threading.Lock() for _ in range(self.partitions)]
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self._stats: Dict = {"batches": 0, "events": 0, "retries": 0, "failures": 0, "last_error": None}
+        self._since_prune = 0
+
+    def checkpoint_name(self, partition: int) -> str:
+        return f"account_balances:{partition}/{self.partitions}"
+
+    # -- processing -------------------------------------------------------
+    def run_once(self, partition: int) -> int:
+        """Apply at most one batch for `partition`; return events applied."""
+        with self._locks[partition]:
+            name = self.checkpoint_name(partition)
+            position = repository.get_checkpoint(name)
+            batch = repository.read_outbox(position, self.batch_size, partition, self.partitions)
+            if not batch:
+                return 0
+            last_id = batch[-1][0]
+            balances = [(e["account_id"], e["balance"]) for _, e in batch if e.get("type") == "account_changed"]
+            if not self._apply_with_retries(name, last_id, balances):
+                return 0
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["events"] += len(batch)
+            self._since_prune += len(batch)
+            prune = self._since_prune >= OUTBOX_PRUNE_EVERY
+            if prune:
+                self._since_prune = 0
+        if prune:
+            self.prune()
+        # notify other in-process subscribers (caches, analytics, ...)
+        for _, event in batch:
+            events.publish(event)
+        return len(batch)
+
+    def _apply_with_retries(self, name: str, position: int, balances) -> bool:
+        delay = 0.05
+        for attempt in range(self.max_retries + 1):
+            try:
+                repository.apply_balance_projection(name, position, balances)
+                return True
+            except Exception as e:
+                with self._stats_lock:
+                    self._stats["last_error"] = f"{type(e).__name__}: {e}"
+                    if attempt < self.max_retries:
+                        self._stats["retries"] += 1
+                    else:
+                        self._stats["failures"] += 1
+                if attempt < self.max_retries:
+                    time.sleep(delay)
+                    delay *= 2
+        return False
+
+    def drain(self) -> int:
+        """Apply everything pending on the calling thread."""
+        total = 0
+        for partition in range(self.partitions):
+            while True:
+                n = self.run_once(partition)
+                total += n
+                if n < self.batch_size:
+                    break
+        return total
+
+    # -- worker pool ------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return any(t.is_alive() for t in self._threads)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._worker, args=(p,), name=f"projection-{p}", daemon=True)
+            for p in range(self.partitions)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _worker(self, partition: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                n = self.run_once(partition)
+            except Exception as e:
+                # e.g. the database is unavailable; back off and try again
+                with self._stats_lock:
+                    self._stats["last_error"] = f"{type(e).__name__}: {e}"
+                n = 0
+            if n == 0:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def notify(self) -> None:
+        """Called by the write side after a commit that appended events."""
+        if PROJECTION_MODE == "async" and self.running:
+            self._wakeup.set()
+        else:
+            self.drain()
+
+    # -- metrics ----------------------------------------------------------
+    def lag(self) -> Dict[str, Dict]:
+        now = time.time()
+        result = {}
+        for partition in range(self.partitions):
+            name = self.checkpoint_name(partition)
+            position = repository.get_checkpoint(name)
+            pending, oldest = repository.outbox_lag(position, partition, self.partitions)
+            result[name] = {
+                "checkpoint": position,
+                "pending_events": pending,
+                "lag_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            }
+        return result
+
+    def prune(self) -> int:
+        """
+        Delete outbox rows that every partition has applied.
+
+        The bound is the oldest event still pending in any partition, not
+        the lowest checkpoint: a partition that never got an event keeps
+        checkpoint 0 and would otherwise stop pruning for good.
+        """
+        # read the head first: events committed after it are never pruned
+        up_to = repository.outbox_head()
+        for p in range(self.partitions):
+            pending = repository.first_pending_id(repository.get_checkpoint(self.checkpoint_name(p)), p, self.partitions)
+            if pending is not None:
+                up_to = min(up_to, pending - 1)
+        return repository.prune_outbox(up_to) if up_to else 0
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            data = dict(self._stats)
+        data.update(mode=PROJECTION_MODE, workers=self.partitions, running=self.running, batch_size=self.batch_size)
+        return data
+
+
+runner = ProjectionRunner()
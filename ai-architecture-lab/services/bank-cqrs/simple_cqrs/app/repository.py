@@ -10,33 +10,72 @@ Learner notes:
 - Read vs Write models: `accounts` is the canonical write model; the
     `account_balances` table is a denormalized read-model used by query
     endpoints for fast access.
+- Connections come from a shared pool (see `db.py`): queries use a
+    reader connection, anything that writes uses the single writer.
+- Transactional outbox: commands append their events to the `outbox`
+    table in the SAME transaction as the `accounts` update, so an event
+    exists if and only if the change was committed. Projection workers
+    (see `projections.py`) drain it into `account_balances` and record
+    how far they got in `projection_checkpoints`.
+- Money columns hold INTEGER minor units (see `money.py`). Databases
+    created before that stored REAL major units; `init_db` converts them
+    once, tracked by SQLite's `PRAGMA user_version`.
 """
-import sqlite3
+import json
 import os
-from typing import Optional, Dict, List
+import time
+from typing import Optional, Dict, Iterable, Iterator, List, Tuple
+
+from . import db
+from . import money
 
 DB_PATH = os.getenv("DB_PATH", "./bank.db")
+# rows fetched per query when listing accounts
+ACCOUNTS_PAGE_SIZE = int(os.getenv("ACCOUNTS_PAGE_SIZE", "500"))
+
+# PRAGMA user_version of the current schema:
+#   0 - money stored as REAL major units (or an empty database)
+#   1 - money stored as INTEGER minor units
+SCHEMA_VERSION = 1
+
+# (table, column) pairs holding money; the event store tables only exist
+# when WRITE_MODEL=events has been used on this database.
+MONEY_COLUMNS = (
+    ("accounts", "balance"),
+    ("account_balances", "balance"),
+    ("account_events", "amount"),
+    ("account_snapshots", "balance"),
+)
 
 
-def get_db_conn():
-    """Return a sqlite3 connection configured to return rows as dict-like objects.
+def get_pool() -> db.ConnectionPool:
+    """Return the connection pool for the current DB_PATH."""
+    return db.get_pool(DB_PATH)
 
-    We centralize connection creation so tests can monkeypatch DB_PATH and
-    create isolated DB files.
+
+def get_db_conn(write: bool = False):
+    """Check out a pooled connection that returns rows as dict-like objects.
+
+    Pass ``write=True`` for the serialized writer connection. Calling
+    ``close()`` on the result returns it to the pool. We centralize
+    connection handling so tests can monkeypatch DB_PATH and create
+    isolated DB files.
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    pool = get_pool()
+    return pool.writer() if write else pool.reader()
 
 
 def init_db():
-    conn = get_db_conn()
+    conn = get_db_conn(write=True)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < 1 and _table_exists(conn, "accounts"):
+        migrate_money_to_minor_units(conn)
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS accounts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             owner TEXT NOT NULL,
-            balance REAL NOT NULL
+            balance INTEGER NOT NULL
         )
         """
     )
@@ -45,19 +84,88 @@ def init_db():
         """
         CREATE TABLE IF NOT EXISTS account_balances (
             account_id INTEGER PRIMARY KEY,
-            balance REAL NOT NULL
+            balance INTEGER NOT NULL
         )
         """
     )
+    # transactional outbox: events waiting to be projected
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            account_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """
+    )
+    # last outbox id applied by each projection (partition)
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS projection_checkpoints (
+            name TEXT PRIMARY KEY,
+            position INTEGER NOT NULL
+        )
+        """
+    )
+    # settings the stored data depends on (currently the money scale)
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO schema_meta (key, value) VALUES ('money_scale', ?)", (str(money.MONEY_SCALE),))
+    scale = int(conn.execute("SELECT value FROM schema_meta WHERE key = 'money_scale'").fetchone()[0])
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     conn.close()
+    if scale != money.MONEY_SCALE:
+        raise RuntimeError(f"database stores money with scale {scale}, but MONEY_SCALE={money.MONEY_SCALE}")
+
+
+def _table_exists(conn, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def migrate_money_to_minor_units(conn) -> None:
+    """Convert a pre-v1 database from REAL major units to INTEGER minor units.
+
+    A column's type affinity cannot be changed in place (an int written to
+    a REAL column is read back as a float), so each money column is
+    replaced: add an INTEGER column, fill it with the rounded minor-unit
+    value, drop the old column and rename the new one. Pending outbox
+    events carry balances in their JSON payload and are rewritten too.
+    Everything runs in one transaction; needs SQLite >= 3.35 (DROP COLUMN).
+    """
+    cur = conn.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        for table, column in MONEY_COLUMNS:
+            if not _table_exists(conn, table):
+                continue
+            tmp = f"{column}_minor"
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {tmp} INTEGER NOT NULL DEFAULT 0")
+            cur.execute(f"UPDATE {table} SET {tmp} = CAST(ROUND({column} * ?) AS INTEGER)", (money.MINOR_PER_MAJOR,))
+            cur.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+            cur.execute(f"ALTER TABLE {table} RENAME COLUMN {tmp} TO {column}")
+        if _table_exists(conn, "outbox"):
+            rows = cur.execute("SELECT id, payload FROM outbox").fetchall()
+            updates = []
+            for outbox_id, payload in rows:
+                event = json.loads(payload)
+                if "balance" in event:
+                    event["balance"] = money.to_minor(round(event["balance"], money.MONEY_SCALE))
+                    updates.append((json.dumps(event), outbox_id))
+            cur.executemany("UPDATE outbox SET payload = ? WHERE id = ?", updates)
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
 
 
-def create_account(owner: str, initial_balance: float = 0.0) -> int:
+def create_account(owner: str, initial_balance: int = 0) -> int:
     # Insert into the write-model (accounts) and return the generated id
-    conn = get_db_conn()
+    conn = get_db_conn(write=True)
     cur = conn.cursor()
-    cur.execute("INSERT INTO accounts (owner, balance) VALUES (?, ?)", (owner, float(initial_balance)))
+    cur.execute("INSERT INTO accounts (owner, balance) VALUES (?, ?)", (owner, int(initial_balance)))
     conn.commit()
     aid = cur.lastrowid
     conn.close()
@@ -73,27 +181,212 @@ def get_account(account_id: int) -> Optional[Dict]:
     return {"id": row["id"], "owner": row["owner"], "balance": row["balance"]}
 
 
-def list_accounts() -> List[Dict]:
+def list_accounts(after_id: int = 0, limit: int = ACCOUNTS_PAGE_SIZE) -> List[Dict]:
+    """One page of accounts with ``id > after_id``, in id order.
+
+    Keyset pagination: the next page starts after the last id of this one.
+    Unlike OFFSET, SQLite seeks straight to `after_id` in the primary-key
+    B-tree, so every page costs the same no matter how deep it is.
+    """
     conn = get_db_conn()
-    rows = conn.execute("SELECT id, owner, balance FROM accounts ORDER BY id").fetchall()
+    rows = conn.execute(
+        "SELECT id, owner, balance FROM accounts WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+    ).fetchall()
     conn.close()
     return [{"id": r["id"], "owner": r["owner"], "balance": r["balance"]} for r in rows]
 
 
-def upsert_account_balance(account_id: int, balance: float) -> None:
+def iter_accounts(after_id: int = 0, page_size: int = ACCOUNTS_PAGE_SIZE) -> Iterator[Dict]:
+    """Yield every account with ``id > after_id`` one keyset page at a time.
+
+    At most one page is in memory, and the reader connection goes back to
+    the pool between pages, so a slow consumer (e.g. a client reading a
+    streamed response) never pins a pooled connection.
+    """
+    while True:
+        page = list_accounts(after_id, page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after_id = page[-1]["id"]
+
+
+UPSERT_BALANCE_SQL = "INSERT INTO account_balances (account_id, balance) VALUES (?, ?) ON CONFLICT(account_id) DO UPDATE SET balance=excluded.balance"
+
+
+def coalesce_balances(balances: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # Only the LAST balance per account matters for the read-model. Sorting
+    # by account id makes the upserts walk the B-tree in key order.
+    latest: Dict[int, int] = {}
+    for account_id, balance in balances:
+        latest[account_id] = int(balance)
+    return sorted(latest.items())
+
+
+def _upsert_balances(cur, balances: Iterable[Tuple[int, int]]) -> int:
+    rows = coalesce_balances(balances)
+    cur.executemany(UPSERT_BALANCE_SQL, rows)
+    return len(rows)
+
+
+def upsert_account_balance(account_id: int, balance: int) -> None:
     # Maintain the denormalized read-model. ON CONFLICT ensures we can
     # insert-or-update in a single statement.
+    upsert_account_balances([(account_id, balance)])
+
+
+def upsert_account_balances(balances: Iterable[Tuple[int, int]]) -> int:
+    """Bulk projection API: apply many (account_id, balance) pairs at once.
+
+    Pairs are coalesced (last value per account wins) and written with one
+    `executemany` inside a single transaction. Returns the number of rows
+    written.
+    """
+    conn = get_db_conn(write=True)
+    try:
+        written = _upsert_balances(conn.cursor(), balances)
+        conn.commit()
+    finally:
+        conn.close()
+    return written
+
+
+def rebuild_account_balances(checkpoints: Iterable[str] = ()) -> int:
+    """Replay: rebuild `account_balances` from the `accounts` write-model.
+
+    Runs as a single INSERT ... SELECT so SQLite copies the rows without
+    a round-trip through Python per account. Every outbox event committed
+    so far is already reflected in `accounts`, so the given projection
+    checkpoints are moved to the current end of the outbox.
+    """
+    conn = get_db_conn(write=True)
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM account_balances")
+        cur.execute("INSERT INTO account_balances (account_id, balance) SELECT id, balance FROM accounts ORDER BY id")
+        rebuilt = cur.rowcount
+        head = cur.execute("SELECT COALESCE(MAX(id), 0) FROM outbox").fetchone()[0]
+        cur.executemany(
+            "INSERT INTO projection_checkpoints (name, position) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET position=excluded.position",
+            [(name, head) for name in checkpoints],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return rebuilt
+
+
+def get_account_balance(account_id: int) -> Optional[int]:
+    conn = get_db_conn()
+    row = conn.execute("SELECT balance FROM account_balances WHERE account_id = ?", (account_id,)).fetchone()
+    conn.close()
+    if not row:
+        return None
+    return row["balance"]
+
+
+def get_balances(account_ids: Iterable[int]) -> Dict[int, int]:
+    # Write-model balances for many accounts; ids that don't exist are
+    # simply missing from the result. Chunked to stay below SQLite's
+    # bound-parameter limit.
+    ids = sorted(set(account_ids))
+    result: Dict[int, int] = {}
+    conn = get_db_conn()
+    try:
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for r in conn.execute(f"SELECT id, balance FROM accounts WHERE id IN ({placeholders})", chunk):
+                result[r["id"]] = r["balance"]
+    finally:
+        conn.close()
+    return result
+
+
+def append_outbox(cur, event: Dict) -> None:
+    # Must be called on the cursor of the write transaction that produced
+    # the event; the caller commits both together.
+    append_outbox_many(cur, [event])
+
+
+def append_outbox_many(cur, events: Iterable[Dict]) -> None:
+    now = time.time()
+    cur.executemany(
+        "INSERT INTO outbox (type, account_id, payload, created_at) VALUES (?, ?, ?, ?)",
+        [(e["type"], e["account_id"], json.dumps(e), now) for e in events],
+    )
+
+
+def read_outbox(after_id: int, limit: int, partition: int = 0, partitions: int = 1) -> List[Tuple[int, Dict]]:
+    # Events of one partition (account_id % partitions) in commit order.
     conn = get_db_conn()
+    rows = conn.execute(
+        "SELECT id, payload FROM outbox WHERE id > ? AND account_id % ? = ? ORDER BY id LIMIT ?",
+        (after_id, partitions, partition, limit),
+    ).fetchall()
+    conn.close()
+    return [(r["id"], json.loads(r["payload"])) for r in rows]
+
+
+def outbox_lag(after_id: int, partition: int = 0, partitions: int = 1) -> Tuple[int, Optional[float]]:
+    # (number of pending events, created_at of the oldest pending event)
+    conn = get_db_conn()
+    row = conn.execute(
+        "SELECT COUNT(*), MIN(created_at) FROM outbox WHERE id > ? AND account_id % ? = ?",
+        (after_id, partitions, partition),
+    ).fetchone()
+    conn.close()
+    return row[0], row[1]
+
+
+def first_pending_id(after_id: int, partition: int = 0, partitions: int = 1) -> Optional[int]:
+    # Oldest event of the partition not applied yet (None = all applied).
+    conn = get_db_conn()
+    row = conn.execute(
+        "SELECT MIN(id) FROM outbox WHERE id > ? AND account_id % ? = ?",
+        (after_id, partitions, partition),
+    ).fetchone()
+    conn.close()
+    return row[0]
+
+
+def outbox_head() -> int:
+    # Id of the newest outbox event (0 when the outbox is empty).
+    conn = get_db_conn()
+    head = conn.execute("SELECT COALESCE(MAX(id), 0) FROM outbox").fetchone()[0]
+    conn.close()
+    return head
+
+
+def prune_outbox(up_to_id: int) -> int:
+    # Delete events every projection has already applied.
+    conn = get_db_conn(write=True)
     cur = conn.cursor()
-    cur.execute("INSERT INTO account_balances (account_id, balance) VALUES (?, ?) ON CONFLICT(account_id) DO UPDATE SET balance=excluded.balance", (account_id, float(balance)))
+    cur.execute("DELETE FROM outbox WHERE id <= ?", (up_to_id,))
     conn.commit()
+    deleted = cur.rowcount
     conn.close()
+    return deleted
 
 
-def get_account_balance(account_id: int) -> Optional[float]:
+def get_checkpoint(name: str) -> int:
     conn = get_db_conn()
-    row = conn.execute("SELECT balance FROM account_balances WHERE account_id = ?", (account_id,)).fetchone()
+    row = conn.execute("SELECT position FROM projection_checkpoints WHERE name = ?", (name,)).fetchone()
     conn.close()
-    if not row:
-        return None
-    return float(row["balance"])
+    return row["position"] if row else 0
+
+
+def apply_balance_projection(name: str, position: int, balances: List[Tuple[int, int]]) -> None:
+    # Apply a batch of projected balances and advance the checkpoint in ONE
+    # transaction, so a crash never leaves them out of step.
+    conn = get_db_conn(write=True)
+    try:
+        cur = conn.cursor()
+        _upsert_balances(cur, balances)
+        cur.execute(
+            "INSERT INTO projection_checkpoints (name, position) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET position=excluded.position",
+            (name, position),
+        )
+        conn.commit()
+    finally:
+        conn.close()
@@ -9,113 +9,368 @@ Notes for learners:
 - Inputs/outputs: methods accept primitive types and return simple
     values (ids or balances). Errors are raised for invalid inputs or
     business rule violations (eg. insufficient funds).
+- Money: amounts and balances are integer minor units (cents with the
+    default `MONEY_SCALE`, see `money.py`); the API layer converts from
+    and to decimal numbers. All arithmetic here is exact int arithmetic.
 - Transaction handling: for simplicity we open and commit sqlite
-    transactions directly here via the repository. In a larger app you'd
-    move transactional boundaries to a dedicated unit-of-work.
-- Events: we publish events after write-model changes. The demo uses a
-    synchronous in-process projection so the read-model is updated
-    immediately; in real-world CQRS you may have async/eventual
-    consistency via a message broker.
+    transactions directly here on the repository's pooled writer
+    connection. In a larger app you'd move transactional boundaries to a
+    dedicated unit-of-work.
+- Concurrency: commands lock only the accounts they touch (striped
+    locks, see `locks.py`), validate on a reader connection and then
+    write in a short `BEGIN IMMEDIATE` transaction. Commands on disjoint
+    accounts don't wait for each other while they read and validate;
+    only the final write is serialized, as SQLite requires.
+- Events: deposits, withdrawals and transfers write their
+    `account_changed` events to the outbox in the same transaction as the
+    balance update. Projection workers (`projections.py`) apply them to
+    the read-model and publish them on the in-process bus, so a command
+    costs exactly one commit.
+- `EventSourcedAccountService` offers the same commands on top of the
+    append-only event store (`event_store.py`) instead of overwriting the
+    balance in place.
 """
-from typing import Optional
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
 from . import repository
+from . import event_store
 from . import events
+from . import locks
+from . import money
+from . import projections
+
+
+MAX_CONFLICT_RETRIES = 5
 
 
 class InsufficientFunds(Exception):
     pass
 
 
+class ConcurrentUpdate(Exception):
+    """Another writer changed an account between our read and our write."""
+
+
 class AccountService:
-    def create_account(self, owner: str, initial_balance: float = 0.0) -> int:
+    def create_account(self, owner: str, initial_balance: int = 0) -> int:
+        initial_balance = money.minor(initial_balance)
         # write-model: insert the account row and return its id
         aid = repository.create_account(owner, initial_balance)
 
         # publish an event describing what changed. In a real system this
         # would be emitted to a broker so other services/workers could
         # react asynchronously.
-        events.publish({"type": "account_changed", "account_id": aid, "balance": float(initial_balance)})
+        events.publish({"type": "account_changed", "account_id": aid, "balance": initial_balance})
 
-        # For this small demo we also update the read-model synchronously
-        # so queries immediately reflect the change. This keeps the
-        # example deterministic and easy to follow for learners.
-        repository.upsert_account_balance(aid, float(initial_balance))
+        # Account creation bypasses the outbox and updates the read-model
+        # synchronously, so a client can query the new id straight away.
+        repository.upsert_account_balance(aid, initial_balance)
         return aid
 
-    def deposit(self, account_id: int, amount: float) -> float:
-        if amount <= 0:
-            raise ValueError("deposit amount must be positive")
+    def _read_balance(self, account_id: int, missing: str = "account not found") -> int:
+        # Reads go through a pooled reader connection, outside the writer's
+        # critical section. The caller holds the account's lock, so the
+        # value cannot change before we write.
         conn = repository.get_db_conn()
         try:
             cur = conn.cursor()
             cur.execute("SELECT balance FROM accounts WHERE id = ?", (account_id,))
             row = cur.fetchone()
-            if not row:
-                raise KeyError("account not found")
-            new_balance = float(row[0]) + float(amount)
-            cur.execute("UPDATE accounts SET balance = ? WHERE id = ?", (new_balance, account_id))
+        finally:
+            conn.close()
+        if not row:
+            raise KeyError(missing)
+        return row[0]
+
+    def _write_balances(self, changes: List[Tuple[int, int, int]]) -> None:
+        """Apply (account_id, old_balance, new_balance) changes in ONE transaction.
+
+        `BEGIN IMMEDIATE` takes SQLite's write lock up front. Each UPDATE is
+        conditional on the balance we validated against; if another process
+        changed it in the meantime nothing is written and ConcurrentUpdate
+        is raised so the caller can retry.
+        """
+        conn = repository.get_db_conn(write=True)
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            cur.executemany(
+                "UPDATE accounts SET balance = ? WHERE id = ? AND balance = ?",
+                [(new, account_id, old) for account_id, old, new in changes],
+            )
+            if cur.rowcount != len(changes):
+                raise ConcurrentUpdate("account changed concurrently")
+            # the events are committed atomically with the balance changes
+            repository.append_outbox_many(
+                cur, [{"type": "account_changed", "account_id": account_id, "balance": new} for account_id, _, new in changes]
+            )
             conn.commit()
         finally:
+            # returning the connection rolls back an unfinished transaction
             conn.close()
 
-        # After mutating the write-model, publish an event and update the
-        # read-model so queries can read the new balance. The event allows
-        # decoupled projections in a real system; here it co-exists with a
-        # direct upsert for simplicity.
-        events.publish({"type": "account_changed", "account_id": account_id, "balance": new_balance})
-        repository.upsert_account_balance(account_id, new_balance)
+    def _locked(self, account_ids: Tuple[int, ...], command):
+        # Run `command()` holding the per-account locks; retry when another
+        # process won the race for one of the rows.
+        for _ in range(MAX_CONFLICT_RETRIES):
+            with locks.account_locks.acquire(*account_ids):
+                try:
+                    return command()
+                except ConcurrentUpdate:
+                    continue
+        raise ConcurrentUpdate("too many concurrent updates, try again")
+
+    def deposit(self, account_id: int, amount: int) -> int:
+        amount = money.minor(amount)
+        if amount <= 0:
+            raise ValueError("deposit amount must be positive")
+
+        def command():
+            current = self._read_balance(account_id)
+            new_balance = current + amount
+            self._write_balances([(account_id, current, new_balance)])
+            return new_balance
+
+        new_balance = self._locked((account_id,), command)
+        # Hand off to the projection workers, which update the read-model
+        # and publish the event to in-process subscribers.
+        projections.runner.notify()
         return new_balance
 
-    def withdraw(self, account_id: int, amount: float) -> float:
+    def withdraw(self, account_id: int, amount: int) -> int:
+        amount = money.minor(amount)
         if amount <= 0:
             raise ValueError("withdraw amount must be positive")
-        conn = repository.get_db_conn()
+
+        def command():
+            current = self._read_balance(account_id)
+            if current < amount:
+                raise InsufficientFunds("insufficient funds")
+            new_balance = current - amount
+            self._write_balances([(account_id, current, new_balance)])
+            return new_balance
+
+        new_balance = self._locked((account_id,), command)
+        projections.runner.notify()
+        return new_balance
+
+    def transfer(self, from_id: int, to_id: int, amount: int) -> None:
+        amount = money.minor(amount)
+        if amount <= 0:
+            raise ValueError("transfer amount must be positive")
+        if from_id == to_id:
+            raise ValueError("cannot transfer to the same account")
+
+        def command():
+            src = self._read_balance(from_id, "from account not found")
+            dst = self._read_balance(to_id, "to account not found")
+            if src < amount:
+                raise InsufficientFunds("insufficient funds")
+            # one event per account, committed with both balance updates
+            self._write_balances([
+                (from_id, src, src - amount),
+                (to_id, dst, dst + amount),
+            ])
+
+        # Locks are taken in a fixed order, so transfers A->B and B->A
+        # cannot deadlock; transfers between disjoint pairs don't wait.
+        self._locked((from_id, to_id), command)
+        projections.runner.notify()
+
+    def transfer_many(self, items: Iterable[Tuple[int, int, int]]) -> List[Dict]:
+        """Validate and apply a batch of (from_id, to_id, amount) transfers.
+
+        Items are checked in order against the running balances of the
+        batch, so a later item can spend money an earlier one moved in.
+        Invalid items are reported and skipped; all valid ones are written
+        in ONE transaction with one event per changed account. Returns one
+        result per item: ``{"ok": True}`` or ``{"ok": False, "error": ...}``.
+        """
+        items = [(from_id, to_id, money.minor(amount)) for from_id, to_id, amount in items]
+        account_ids = tuple({i for from_id, to_id, _ in items for i in (from_id, to_id)})
+
+        def command():
+            original = repository.get_balances(account_ids)
+            balances = dict(original)
+            results = []
+            for from_id, to_id, amount in items:
+                error = _transfer_error(balances, from_id, to_id, amount)
+                if error:
+                    results.append({"ok": False, "error": error})
+                    continue
+                balances[from_id] -= amount
+                balances[to_id] += amount
+                results.append({"ok": True})
+            changes = [(aid, original[aid], balances[aid]) for aid in sorted(balances) if balances[aid] != original[aid]]
+            if changes:
+                self._write_balances(changes)
+            return results
+
+        results = self._locked(account_ids, command)
+        if any(r["ok"] for r in results):
+            projections.runner.notify()
+        return results
+
+
+def _transfer_error(balances: Dict[int, int], from_id: int, to_id: int, amount: int) -> Optional[str]:
+    # Same rules as AccountService.transfer, as a message instead of a raise.
+    if amount <= 0:
+        return "transfer amount must be positive"
+    if from_id == to_id:
+        return "cannot transfer to the same account"
+    if from_id not in balances:
+        return "from account not found"
+    if to_id not in balances:
+        return "to account not found"
+    if balances[from_id] < amount:
+        return "insufficient funds"
+    return None
+
+
+class EventSourcedAccountService(AccountService):
+    """Account commands backed by the append-only event store.
+
+    Each command rebuilds the aggregate (snapshot + newer events),
+    validates against the rebuilt balance and appends new events. In the
+    same transaction it keeps the `accounts` row in step (so the existing
+    query endpoints keep working), appends to the outbox for the
+    projections and takes a snapshot when one is due. The aggregate is
+    loaded inside the `BEGIN IMMEDIATE` write transaction, so the writer
+    lock protects the read-modify-write and the per-account locks are not
+    needed here.
+    """
+
+    def __init__(self, snapshot_interval: int = event_store.SNAPSHOT_INTERVAL):
+        self.snapshot_interval = snapshot_interval
+
+    def create_account(self, owner: str, initial_balance: int = 0) -> int:
+        initial_balance = money.minor(initial_balance)
+        conn = repository.get_db_conn(write=True)
         try:
             cur = conn.cursor()
-            cur.execute("SELECT balance FROM accounts WHERE id = ?", (account_id,))
-            row = cur.fetchone()
-            if not row:
-                raise KeyError("account not found")
-            current = float(row[0])
-            if current < amount:
+            cur.execute("INSERT INTO accounts (owner, balance) VALUES (?, ?)", (owner, initial_balance))
+            aid = cur.lastrowid
+            event_store.append(cur, [(aid, 1, "opened", initial_balance, None)])
+            conn.commit()
+        finally:
+            conn.close()
+
+        events.publish({"type": "account_changed", "account_id": aid, "balance": initial_balance})
+        repository.upsert_account_balance(aid, initial_balance)
+        return aid
+
+    def _record(self, cur, changes: List[Tuple[event_store.AccountState, str, int, Optional[str]]]) -> None:
+        # Number and append the new events as one batch, then bring the
+        # derived state (accounts row, outbox, snapshot) up to date.
+        new_events = []
+        for state, kind, amount, transfer_id in changes:
+            state.seq += 1
+            state.balance += event_store.EVENT_SIGNS[kind] * amount
+            new_events.append((state.account_id, state.seq, kind, amount, transfer_id))
+        event_store.append(cur, new_events)
+        touched = {state.account_id: state for state, _, _, _ in changes}
+        for state in touched.values():
+            cur.execute("UPDATE accounts SET balance = ? WHERE id = ?", (state.balance, state.account_id))
+            repository.append_outbox(cur, {"type": "account_changed", "account_id": state.account_id, "balance": state.balance})
+            event_store.maybe_snapshot(cur, state, self.snapshot_interval)
+
+    def deposit(self, account_id: int, amount: int) -> int:
+        amount = money.minor(amount)
+        if amount <= 0:
+            raise ValueError("deposit amount must be positive")
+        conn = repository.get_db_conn(write=True)
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            state = event_store.load(cur, account_id)
+            self._record(cur, [(state, "deposited", amount, None)])
+            conn.commit()
+        finally:
+            conn.close()
+
+        projections.runner.notify()
+        return state.balance
+
+    def withdraw(self, account_id: int, amount: int) -> int:
+        amount = money.minor(amount)
+        if amount <= 0:
+            raise ValueError("withdraw amount must be positive")
+        conn = repository.get_db_conn(write=True)
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            state = event_store.load(cur, account_id)
+            if state.balance < amount:
                 raise InsufficientFunds("insufficient funds")
-            new_balance = current - float(amount)
-            cur.execute("UPDATE accounts SET balance = ? WHERE id = ?", (new_balance, account_id))
+            self._record(cur, [(state, "withdrawn", amount, None)])
             conn.commit()
         finally:
             conn.close()
 
-        events.publish({"type": "account_changed", "account_id": account_id, "balance": new_balance})
-        repository.upsert_account_balance(account_id, new_balance)
-        return new_balance
+        projections.runner.notify()
+        return state.balance
 
-    def transfer(self, from_id: int, to_id: int, amount: float) -> None:
+    def transfer(self, from_id: int, to_id: int, amount: int) -> None:
+        amount = money.minor(amount)
         if amount <= 0:
             raise ValueError("transfer amount must be positive")
-        conn = repository.get_db_conn()
+        if from_id == to_id:
+            raise ValueError("cannot transfer to the same account")
+        conn = repository.get_db_conn(write=True)
         try:
             cur = conn.cursor()
-            # check from
-            cur.execute("SELECT balance FROM accounts WHERE id = ?", (from_id,))
-            r1 = cur.fetchone()
-            if not r1:
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                src = event_store.load(cur, from_id)
+            except KeyError:
                 raise KeyError("from account not found")
-            cur.execute("SELECT balance FROM accounts WHERE id = ?", (to_id,))
-            r2 = cur.fetchone()
-            if not r2:
+            try:
+                dst = event_store.load(cur, to_id)
+            except KeyError:
                 raise KeyError("to account not found")
-            if float(r1[0]) < amount:
+            if src.balance < amount:
                 raise InsufficientFunds("insufficient funds")
-            new_from = float(r1[0]) - float(amount)
-            new_to = float(r2[0]) + float(amount)
-            cur.execute("UPDATE accounts SET balance = ? WHERE id = ?", (new_from, from_id))
-            cur.execute("UPDATE accounts SET balance = ? WHERE id = ?", (new_to, to_id))
+            # both legs share a transfer id so the history links them
+            transfer_id = uuid.uuid4().hex
+            self._record(cur, [(src, "transfer_out", amount, transfer_id), (dst, "transfer_in", amount, transfer_id)])
+            conn.commit()
+        finally:
+            conn.close()
+
+        projections.runner.notify()
+
+    def transfer_many(self, items: Iterable[Tuple[int, int, int]]) -> List[Dict]:
+        # Same contract as AccountService.transfer_many, recorded as
+        # transfer_in/transfer_out events in one append batch.
+        items = [(from_id, to_id, money.minor(amount)) for from_id, to_id, amount in items]
+        conn = repository.get_db_conn(write=True)
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            states: Dict[int, event_store.AccountState] = {}
+            for account_id in {i for from_id, to_id, _ in items for i in (from_id, to_id)}:
+                try:
+                    states[account_id] = event_store.load(cur, account_id)
+                except KeyError:
+                    pass
+            balances = {aid: st.balance for aid, st in states.items()}
+            results, changes = [], []
+            for from_id, to_id, amount in items:
+                error = _transfer_error(balances, from_id, to_id, amount)
+                if error:
+                    results.append({"ok": False, "error": error})
+                    continue
+                balances[from_id] -= amount
+                balances[to_id] += amount
+                transfer_id = uuid.uuid4().hex
+                changes += [(states[from_id], "transfer_out", amount, transfer_id), (states[to_id], "transfer_in", amount, transfer_id)]
+                results.append({"ok": True})
+            if changes:
+                self._record(cur, changes)
             conn.commit()
         finally:
             conn.close()
 
-        # publish events for both accounts and update read-model synchronously
-        events.publish({"type": "account_changed", "account_id": from_id, "balance": new_from})
-        events.publish({"type": "account_changed", "account_id": to_id, "balance": new_to})
-        repository.upsert_account_balance(from_id, new_from)
-        repository.upsert_account_balance(to_id, new_to)
+        if changes:
+            projections.runner.notify()
+        return results
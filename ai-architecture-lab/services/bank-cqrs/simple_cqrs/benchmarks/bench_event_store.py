@@ -0,0 +1,85 @@
+"""Benchmark: aggregate rebuild time vs snapshot interval.
+
+For each snapshot interval, seeds ``--accounts`` accounts with
+``--events`` events each (batched appends through `event_store.append`,
+snapshots every `interval` events as the service would write them) and
+then measures the average time to rebuild one account with
+`event_store.load`. Interval 0 means "no snapshots": every rebuild
+replays the full history.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_event_store.py --events 5000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app import event_store, repository
+
+
+def seed(accounts: int, events: int, interval: int) -> float:
+    """Append the history for every account; return appended events/s."""
+    conn = repository.get_db_conn(write=True)
+    cur = conn.cursor()
+    rng = random.Random(42)
+    appended = 0
+    start = time.perf_counter()
+    for aid in range(1, accounts + 1):
+        cur.execute("INSERT INTO accounts (id, owner, balance) VALUES (?, ?, 0)", (aid, f"owner-{aid}"))
+        # stop at a random point so the tail after the last snapshot varies
+        n = rng.randint(events // 2, events)
+        appended += n
+        state = event_store.AccountState(account_id=aid, seq=0, balance=0)
+        batch = []
+        for seq in range(1, n + 1):
+            kind = "opened" if seq == 1 else rng.choice(("deposited", "withdrawn"))
+            amount = 100_000 if seq == 1 else 100
+            batch.append((aid, seq, kind, amount, None))
+            state.seq = seq
+            state.balance += event_store.EVENT_SIGNS[kind] * amount
+            if interval and state.seq - state.snapshot_seq >= interval:
+                event_store.append(cur, batch)
+                batch = []
+                event_store.maybe_snapshot(cur, state, interval)
+        event_store.append(cur, batch)
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return appended / elapsed
+
+
+def rebuild(accounts: int, rounds: int) -> float:
+    conn = repository.get_db_conn()
+    cur = conn.cursor()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for aid in range(1, accounts + 1):
+            event_store.load(cur, aid)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed / (rounds * accounts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for interval in (0, 1000, 100, 10):
+            repository.DB_PATH = os.path.join(tmp, f"es-{interval}.db")
+            repository.init_db()
+            event_store.init_db()
+            rate = seed(args.accounts, args.events, interval)
+            per_rebuild = rebuild(args.accounts, args.rounds)
+            label = "none" if interval == 0 else str(interval)
+            print(f"snapshot interval {label:>5}: rebuild {per_rebuild * 1e6:10.1f} us/account   (append ~{rate:,.0f} events/s)")
+
+
+if __name__ == "__main__":
+    main()
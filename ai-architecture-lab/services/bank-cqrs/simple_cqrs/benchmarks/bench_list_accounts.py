@@ -0,0 +1,76 @@
+"""Benchmark: listing accounts with fetchall vs keyset pages vs streaming.
+
+Seeds ``--accounts`` accounts and measures wall time and peak Python
+memory (tracemalloc, which also slows the timed code down, so compare
+the times with each other rather than with production) for:
+
+- fetchall: the old `list_accounts`, one query materializing every row;
+- page: one keyset page deep in the table (`list_accounts(after_id, 1000)`),
+  which should cost the same at any depth;
+- stream: serializing every account to NDJSON through `iter_accounts`,
+  as `GET /accounts` does with `Accept: application/x-ndjson`.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_list_accounts.py --accounts 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app import main as api
+from app import repository
+
+
+def seed(n: int) -> None:
+    conn = repository.get_db_conn(write=True)
+    conn.executemany(
+        "INSERT INTO accounts (id, owner, balance) VALUES (?, ?, ?)",
+        ((i, f"owner-{i}", i % 100_000) for i in range(1, n + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure(label: str, fn) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed:8.3f}s   peak {peak / 1e6:8.1f} MB   ({result:,} rows)")
+
+
+def fetchall() -> int:
+    conn = repository.get_db_conn()
+    rows = conn.execute("SELECT id, owner, balance FROM accounts ORDER BY id").fetchall()
+    conn.close()
+    return len([{"id": r["id"], "owner": r["owner"], "balance": r["balance"]} for r in rows])
+
+
+def stream() -> int:
+    count = 0
+    for _ in api._ndjson_accounts(repository.iter_accounts()):
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        repository.DB_PATH = os.path.join(tmp, "list.db")
+        repository.init_db()
+        seed(args.accounts)
+        measure("fetchall (before)", fetchall)
+        measure("first page (limit=1000)", lambda: len(repository.list_accounts(0, 1000)))
+        measure("last page (limit=1000)", lambda: len(repository.list_accounts(args.accounts - 1000, 1000)))
+        measure("NDJSON stream, all rows", stream)
+
+
+if __name__ == "__main__":
+    main()
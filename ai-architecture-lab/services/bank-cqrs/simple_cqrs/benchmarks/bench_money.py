@@ -0,0 +1,95 @@
+"""Benchmark: float major units vs integer minor units.
+
+Compares the two money representations on the operations the bank does
+all the time:
+
+- arithmetic: applying ``--ops`` random deposits/withdrawals to a set of
+  balances, and how far the float result drifts from the exact one;
+- serialization: `json.dumps`/`json.loads` of ``account_changed`` event
+  payloads (what the outbox stores), plus the cost of the int -> decimal
+  conversion the API does on the way out (`money.to_major`);
+- aggregation: `SUM(balance)` over a REAL vs an INTEGER SQLite column.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_money.py --ops 1000000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import time
+from decimal import Decimal
+
+from app import money
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def arithmetic(ops: int) -> None:
+    rng = random.Random(1)
+    deltas = [rng.randint(-5000, 5000) for _ in range(ops)]  # cents
+    slots = [rng.randrange(100) for _ in range(ops)]
+    float_deltas = [d / 100 for d in deltas]
+    floats = [0.0] * 100
+    ints = [0] * 100
+
+    def run_float():
+        for i, d in zip(slots, float_deltas):
+            floats[i] += d
+
+    def run_int():
+        for i, d in zip(slots, deltas):
+            ints[i] += d
+
+    tf, ti = timed(run_float), timed(run_int)
+    exact = [Decimal(v) / 100 for v in ints]
+    drift = max(abs(Decimal(f) - e) for f, e in zip(floats, exact))
+    wrong = sum(1 for f, v in zip(floats, ints) if round(f * 100) != v or f != v / 100)
+    print(f"arithmetic     float {tf * 1e9 / ops:6.1f} ns/op   int {ti * 1e9 / ops:6.1f} ns/op")
+    print(f"               float drift after {ops:,} ops: max {drift:.2E}, {wrong}/100 balances not equal to the exact value")
+
+
+def serialization(ops: int) -> None:
+    n = min(ops, 200_000)
+    float_events = [{"type": "account_changed", "account_id": i, "balance": i * 1.01} for i in range(n)]
+    int_events = [{"type": "account_changed", "account_id": i, "balance": i * 101} for i in range(n)]
+    for label, events in (("float", float_events), ("int", int_events)):
+        encoded = []
+        t_dump = timed(lambda: encoded.extend(json.dumps(e) for e in events))
+        t_load = timed(lambda: [json.loads(s) for s in encoded])
+        size = sum(map(len, encoded)) / n
+        print(f"json {label:<6}    dumps {t_dump * 1e9 / n:6.0f} ns   loads {t_load * 1e9 / n:6.0f} ns   {size:5.1f} bytes/event")
+    t_major = timed(lambda: [money.to_major(e["balance"]) for e in int_events])
+    print(f"to_major       {t_major * 1e9 / n:6.0f} ns per value (int -> decimal at the API edge)")
+
+
+def aggregation(rows: int) -> None:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE real_money (balance REAL NOT NULL)")
+    conn.execute("CREATE TABLE int_money (balance INTEGER NOT NULL)")
+    conn.executemany("INSERT INTO real_money VALUES (?)", ((0.1,) for _ in range(rows)))
+    conn.executemany("INSERT INTO int_money VALUES (?)", ((10,) for _ in range(rows)))
+    for table in ("real_money", "int_money"):
+        result = []
+        elapsed = timed(lambda: result.append(conn.execute(f"SELECT SUM(balance) FROM {table}").fetchone()[0]))
+        print(f"SUM {table:<10} {elapsed * 1e3:7.2f} ms   result {result[0]!r}  (expected {rows / 10:.1f} / {rows * 10})")
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=1_000_000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    arithmetic(args.ops)
+    serialization(args.ops)
+    aggregation(args.rows)
+
+
+if __name__ == "__main__":
+    main()
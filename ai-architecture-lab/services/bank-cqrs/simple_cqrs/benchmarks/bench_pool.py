@@ -0,0 +1,76 @@
+"""Benchmark: per-request connections vs the shared connection pool.
+
+Measures requests/second on ``GET /accounts/{id}`` and
+``POST /accounts/{id}/deposit`` twice:
+
+- "before": every repository/service call opens and closes its own
+  ``sqlite3`` connection (the original behaviour, recreated here by
+  patching ``repository.get_db_conn``)
+- "after": the pooled readers + single writer from ``app/db.py``
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_pool.py --requests 2000 --threads 8
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module, reload
+
+
+def unpooled_conn(write: bool = False):
+    # the pre-pool implementation: connect, set row factory, caller closes
+    from app import repository
+
+    conn = sqlite3.connect(repository.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def load_app(db_path: str):
+    os.environ["DB_PATH"] = db_path
+    repository = reload(import_module("app.repository"))
+    repository.init_db()
+    main = reload(import_module("app.main"))
+    return repository, main
+
+
+def run(client, method: str, url: str, n: int, threads: int, body=None) -> float:
+    def one(_):
+        r = client.request(method, url, json=body)
+        assert r.status_code == 200, r.text
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(one, range(n)))
+    return n / (time.perf_counter() - start)
+
+
+def bench(label: str, pooled: bool, n: int, threads: int) -> None:
+    from fastapi.testclient import TestClient
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository, main = load_app(os.path.join(tmp, "bench.db"))
+        if not pooled:
+            repository.get_db_conn = unpooled_conn
+        with TestClient(main.app) as client:
+            aid = client.post("/accounts", json={"owner": "bench"}).json()["id"]
+            get_rps = run(client, "GET", f"/accounts/{aid}", n, threads)
+            dep_rps = run(client, "POST", f"/accounts/{aid}/deposit", n, threads, {"amount": 1.0})
+        print(f"{label:<8} GET /accounts/{{id}}: {get_rps:8.0f} req/s   POST /deposit: {dep_rps:8.0f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    bench("before", pooled=False, n=args.requests, threads=args.threads)
+    bench("after", pooled=True, n=args.requests, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Benchmark: outbox write latency and projection throughput.
+
+1. Command latency for ``AccountService.deposit`` when the outbox is
+   drained inline (``PROJECTION_MODE=sync``: two commits per command)
+   versus by background workers (one commit per command).
+2. Projection throughput (events/s) as a function of batch size.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_projections.py --events 20000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from app import projections, repository
+from app.service import AccountService
+
+
+def fresh_db(tmp: str, name: str) -> None:
+    repository.DB_PATH = os.path.join(tmp, name)
+    repository.init_db()
+
+
+def deposit_latency(n: int, background: bool) -> float:
+    runner = projections.ProjectionRunner(poll_interval=0.01)
+    projections.runner = runner
+    projections.PROJECTION_MODE = "async" if background else "sync"
+    if background:
+        runner.start()
+    svc = AccountService()
+    aid = svc.create_account("bench")
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        svc.deposit(aid, 100)
+        samples.append(time.perf_counter() - start)
+    runner.stop()
+    return statistics.median(samples) * 1e6
+
+
+def seed_outbox(n: int, accounts: int) -> None:
+    conn = repository.get_db_conn(write=True)
+    cur = conn.cursor()
+    for i in range(n):
+        aid = i % accounts + 1
+        repository.append_outbox(cur, {"type": "account_changed", "account_id": aid, "balance": i})
+    conn.commit()
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--accounts", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh_db(tmp, "sync.db")
+        print(f"deposit p50, inline projection : {deposit_latency(args.commands, background=False):8.1f} us")
+        fresh_db(tmp, "async.db")
+        print(f"deposit p50, background workers: {deposit_latency(args.commands, background=True):8.1f} us")
+
+        for batch_size in (1, 10, 100, 1000):
+            fresh_db(tmp, f"batch{batch_size}.db")
+            seed_outbox(args.events, args.accounts)
+            runner = projections.ProjectionRunner(workers=1, batch_size=batch_size)
+            start = time.perf_counter()
+            applied = runner.drain()
+            elapsed = time.perf_counter() - start
+            print(f"batch_size={batch_size:<5} {applied / elapsed:10.0f} events/s")
+
+
+if __name__ == "__main__":
+    main()
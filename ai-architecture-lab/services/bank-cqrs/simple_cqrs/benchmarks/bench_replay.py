@@ -0,0 +1,65 @@
+"""Benchmark: rebuild the `account_balances` read-model.
+
+Seeds N accounts (default 1M), then reports the time for:
+
+- the replay command (`app.replay`, a single INSERT ... SELECT)
+- the bulk projection API (`repository.upsert_account_balances`,
+  coalesced pairs applied with one `executemany`)
+- per-account `upsert_account_balance` calls, one commit each, on a
+  sample of the accounts (extrapolated; a full run would take far longer)
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_replay.py --accounts 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app import replay, repository
+
+
+def seed(n: int) -> None:
+    conn = repository.get_db_conn(write=True)
+    conn.executemany(
+        "INSERT INTO accounts (id, owner, balance) VALUES (?, ?, ?)",
+        ((i, f"owner-{i}", i % 100_000) for i in range(1, n + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repository.DB_PATH = os.path.join(tmp, "replay.db")
+        repository.init_db()
+        seed(args.accounts)
+
+        start = time.perf_counter()
+        rows = replay.replay()
+        elapsed = time.perf_counter() - start
+        print(f"replay (INSERT ... SELECT)  {rows:>9} rows  {elapsed:7.2f}s  {rows / elapsed:12.0f} rows/s")
+
+        pairs = [(i, i % 100_000) for i in range(1, args.accounts + 1)]
+        start = time.perf_counter()
+        rows = repository.upsert_account_balances(pairs)
+        elapsed = time.perf_counter() - start
+        print(f"bulk upsert (executemany)   {rows:>9} rows  {elapsed:7.2f}s  {rows / elapsed:12.0f} rows/s")
+
+        sample = min(args.sample, args.accounts)
+        start = time.perf_counter()
+        for account_id, balance in pairs[:sample]:
+            repository.upsert_account_balance(account_id, balance)
+        elapsed = time.perf_counter() - start
+        per_row = elapsed / sample
+        print(f"per-row upsert (estimated)  {args.accounts:>9} rows  {per_row * args.accounts:7.2f}s  {1 / per_row:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import asyncio
+import threading
+from importlib import reload
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import aio, repository
+
+
+@pytest.fixture
+def async_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository, "DB_PATH", str(tmp_path / "aio.db"))
+    repository.init_db()
+    aio.ASYNC_DB = True
+    from app import main
+    reload(main)
+    try:
+        yield main, TestClient(main.app)
+    finally:
+        aio.ASYNC_DB = False
+        aio.shutdown()
+        reload(main)
+
+
+def test_async_mode_runs_handlers_on_db_threads(async_client):
+    main, client = async_client
+    assert asyncio.iscoroutinefunction(main.deposit)
+
+    seen = []
+    original = repository.get_account
+
+    def spy(account_id):
+        seen.append(threading.current_thread().name)
+        return original(account_id)
+
+    repository.get_account = spy
+    try:
+        aid = client.post("/accounts", json={"owner": "Async"}).json()["id"]
+        assert client.post(f"/accounts/{aid}/deposit", json={"amount": 12.5}).json()["balance"] == 12.5
+        assert client.get(f"/accounts/{aid}").json()["balance"] == 12.5
+    finally:
+        repository.get_account = original
+    # POST /accounts reads back on the writer lane, GET on a reader thread
+    assert seen[0].startswith("db-write") and seen[-1].startswith("db-read")
+
+    r = client.get("/accounts", params={"limit": 1})
+    assert r.json()[0]["id"] == aid and r.headers["x-next-after-id"] == str(aid)
+    assert client.get("/accounts/999").status_code == 404
@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -48,3 +50,71 @@ def test_transfer(client):
     b2 = client.get(f"/balances/{a2}").json()["balance"]
     assert b1 == 30.0
     assert b2 == 20.0
+
+
+def test_transfer_batch_json_and_ndjson(client):
+    a = client.post("/accounts", json={"owner": "A"}).json()["id"]
+    b = client.post("/accounts", json={"owner": "B"}).json()["id"]
+    client.post(f"/accounts/{a}/deposit", json={"amount": 100.0})
+
+    r = client.post("/transfers:batch", json={"transfers": [
+        {"from_id": a, "to_id": b, "amount": 60.0},
+        {"from_id": a, "to_id": b, "amount": 60.0},
+        {"from_id": b, "to_id": a, "amount": 10.0},
+        {"from_id": a, "to_id": 999, "amount": 1.0},
+    ]})
+    assert r.status_code == 200
+    body = r.json()
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+    assert body["results"][1]["error"] == "insufficient funds"
+    assert client.get(f"/balances/{a}").json()["balance"] == 50.0
+    assert client.get(f"/balances/{b}").json()["balance"] == 50.0
+
+    lines = "\n".join([
+        f'{{"from_id": {b}, "to_id": {a}, "amount": 5.0}}',
+        "not json",
+        f'{{"from_id": {a}, "to_id": {b}, "amount": 1000.0}}',
+    ])
+    r = client.post("/transfers:batch", content=lines, headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200
+    results = [json.loads(line) for line in r.text.splitlines()]
+    assert [x["ok"] for x in results] == [True, False, False]
+    assert [x["index"] for x in results] == [0, 1, 2]
+    assert client.get(f"/balances/{a}").json()["balance"] == 55.0
+
+
+def test_list_accounts_keyset_pages_and_ndjson(client):
+    ids = [client.post("/accounts", json={"owner": f"o{i}"}).json()["id"] for i in range(5)]
+
+    r = client.get("/accounts", params={"limit": 2})
+    assert [a["id"] for a in r.json()] == ids[:2]
+    seen = [a["id"] for a in r.json()]
+    while "x-next-after-id" in r.headers:
+        r = client.get("/accounts", params={"limit": 2, "after_id": r.headers["x-next-after-id"]})
+        seen += [a["id"] for a in r.json()]
+    assert seen == ids
+    assert client.get("/accounts", params={"limit": 5000}).status_code == 422
+
+    r = client.get("/accounts", params={"after_id": ids[1]}, headers={"accept": "application/x-ndjson"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [a["id"] for a in rows] == ids[2:]
+    assert rows[0] == {"owner": "o2", "id": ids[2], "balance": 0.0}
+
+
+def test_fast_json_mode_returns_the_same_documents(client, monkeypatch):
+    from app import main
+
+    ids = [client.post("/accounts", json={"owner": f"ö{i}"}).json()["id"] for i in range(3)]
+    client.post(f"/accounts/{ids[0]}/deposit", json={"amount": 12.34})
+    urls = ["/accounts?limit=2", f"/accounts/{ids[0]}"]
+    slow = [client.get(url) for url in urls]
+    monkeypatch.setattr(main, "FAST_JSON", True)
+    fast = [client.get(url) for url in urls]
+
+    for s, f in zip(slow, fast):
+        assert f.headers["content-type"] == "application/json"
+        assert f.json() == s.json()
+    assert fast[1].json()["balance"] == 12.34
+    assert fast[0].headers["x-next-after-id"] == str(ids[1])
+    assert client.get("/accounts/999").status_code == 404
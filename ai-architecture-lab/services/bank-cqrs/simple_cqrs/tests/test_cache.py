@@ -0,0 +1,39 @@
+from importlib import import_module, reload
+
+from fastapi.testclient import TestClient
+
+from app.cache import MISSING, LRUCache
+
+
+def test_lru_eviction_ttl_and_counters():
+    now = [0.0]
+    c = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # "b" is now least recently used
+    c.set("c", 3)
+    assert c.get("b") is MISSING
+    now[0] = 11
+    assert c.get("a") is MISSING
+    stats = c.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+
+
+def test_balance_cache_is_refreshed_by_events(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "cache.db"))
+    reload(import_module("app.repository")).init_db()
+    main = reload(import_module("app.main"))
+    client = TestClient(main.app)
+
+    aid = client.post("/accounts", json={"owner": "Cached"}).json()["id"]
+    assert client.get(f"/balances/{aid}").json()["balance"] == 0.0
+    assert client.get(f"/accounts/{aid}").json()["balance"] == 0.0
+    client.post(f"/accounts/{aid}/deposit", json={"amount": 25.0})
+
+    hits = main.read_cache.stats()["hits"]
+    assert client.get(f"/balances/{aid}").json()["balance"] == 25.0
+    assert client.get(f"/accounts/{aid}").json()["balance"] == 25.0
+    assert main.read_cache.stats()["hits"] == hits + 2
@@ -0,0 +1,39 @@
+import threading
+
+from app import db
+
+
+def test_reader_connections_are_reused(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "pool.db"), size=2)
+    c1 = pool.reader()
+    raw = c1._conn
+    c1.close()
+    c2 = pool.reader()
+    assert c2._conn is raw
+    c2.close()
+    assert pool.stats()["connections_opened"] == 1
+    health = pool.health_check()
+    assert health["ok"] is True
+    assert health["journal_mode"] == "wal"
+    pool.close()
+
+
+def test_single_writer_is_serialized(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / "pool.db"), size=2, timeout=0.2)
+    w = pool.writer()
+    errors = []
+
+    def try_writer():
+        try:
+            pool.writer().close()
+        except db.PoolTimeout as e:
+            errors.append(e)
+
+    t = threading.Thread(target=try_writer)
+    t.start()
+    t.join()
+    assert len(errors) == 1
+    w.close()
+    # once released the writer can be checked out again
+    pool.writer().close()
+    pool.close()
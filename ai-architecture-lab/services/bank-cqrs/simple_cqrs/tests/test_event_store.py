@@ -0,0 +1,50 @@
+import pytest
+
+from app import event_store, repository
+from app.service import EventSourcedAccountService, InsufficientFunds
+
+
+@pytest.fixture
+def svc(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository, "DB_PATH", str(tmp_path / "events.db"))
+    repository.init_db()
+    event_store.init_db()
+    return EventSourcedAccountService(snapshot_interval=3)
+
+
+def load(account_id):
+    conn = repository.get_db_conn()
+    try:
+        return event_store.load(conn.cursor(), account_id)
+    finally:
+        conn.close()
+
+
+def test_commands_append_events_and_snapshot(svc):
+    a = svc.create_account("A", 10.0)
+    b = svc.create_account("B")
+    for _ in range(3):
+        svc.deposit(a, 5.0)
+    svc.transfer(a, b, 12.0)
+    with pytest.raises(InsufficientFunds):
+        svc.withdraw(b, 100.0)
+
+    state = load(a)
+    assert state.balance == 13.0
+    assert state.seq == 5
+    # a snapshot was taken at seq 3; only the events after it are replayed
+    assert state.snapshot_seq == 3
+    assert state.replayed == 2
+    assert repository.get_account(a)["balance"] == 13.0
+    assert repository.get_account_balance(b) == 12.0
+
+    kinds = [e["type"] for e in event_store.history(a)]
+    assert kinds == ["opened", "deposited", "deposited", "deposited", "transfer_out"]
+
+
+def test_existing_accounts_are_bootstrapped(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository, "DB_PATH", str(tmp_path / "legacy.db"))
+    repository.init_db()
+    aid = repository.create_account("Legacy", 7.0)
+    event_store.init_db()
+    assert load(aid).balance == 7.0
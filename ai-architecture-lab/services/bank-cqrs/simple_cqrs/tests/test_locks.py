@@ -0,0 +1,41 @@
+import random
+import threading
+
+from app import repository
+from app.locks import StripedLockManager
+from app.service import AccountService, InsufficientFunds
+
+
+def test_stripes_are_deduplicated_and_ordered():
+    locks = StripedLockManager(stripes=8)
+    assert locks.stripes_for(13, 2, 5) == [2, 5]
+    # both directions of a transfer take the same locks in the same order
+    assert locks.stripes_for(3, 9) == locks.stripes_for(9, 3) == [1, 3]
+    with locks.acquire(1, 9):  # same stripe, taken once
+        pass
+
+
+def test_concurrent_transfers_conserve_money(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository, "DB_PATH", str(tmp_path / "locks.db"))
+    repository.init_db()
+    svc = AccountService()
+    ids = [svc.create_account(f"acc-{i}", 100.0) for i in range(6)]
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(50):
+            a, b = rng.sample(ids, 2)
+            try:
+                svc.transfer(a, b, rng.randint(1, 30))
+            except InsufficientFunds:
+                pass
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    balances = [repository.get_account(i)["balance"] for i in ids]
+    assert sum(balances) == 600
+    assert min(balances) >= 0
@@ -0,0 +1,70 @@
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import money, repository
+
+
+def test_to_minor_is_exact_and_rejects_fractions_of_a_cent():
+    assert money.to_minor(0.1) == 10
+    assert money.to_minor("19.99") == 1999
+    assert money.to_minor(5) == 500
+    assert money.to_major(1999) == 19.99
+    for bad in (0.001, "abc", True, float("inf")):
+        with pytest.raises(ValueError):
+            money.to_minor(bad)
+
+
+def test_api_amounts_are_exact(tmp_path, monkeypatch):
+    monkeypatch.setattr(repository, "DB_PATH", str(tmp_path / "money.db"))
+    repository.init_db()
+    from app import main
+    client = TestClient(main.app)
+    aid = client.post("/accounts", json={"owner": "Cents"}).json()["id"]
+
+    for _ in range(10):
+        client.post(f"/accounts/{aid}/deposit", json={"amount": 0.1})
+    r = client.post(f"/accounts/{aid}/withdraw", json={"amount": 0.3})
+    assert r.json()["balance"] == 0.7  # a float sum would give 0.7000000000000001
+    assert client.get(f"/balances/{aid}").json()["balance"] == 0.7
+    assert repository.get_account(aid)["balance"] == 70
+
+    r = client.post(f"/accounts/{aid}/deposit", json={"amount": 0.001})
+    assert r.status_code == 422
+
+
+def test_init_db_migrates_real_balances_to_minor_units(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    legacy.executescript(
+        """
+        CREATE TABLE accounts (id INTEGER PRIMARY KEY AUTOINCREMENT, owner TEXT NOT NULL, balance REAL NOT NULL);
+        CREATE TABLE account_balances (account_id INTEGER PRIMARY KEY, balance REAL NOT NULL);
+        CREATE TABLE outbox (id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, account_id INTEGER NOT NULL,
+                             payload TEXT NOT NULL, created_at REAL NOT NULL);
+        INSERT INTO accounts (owner, balance) VALUES ('A', 10.1), ('B', 0.30000000000000004);
+        INSERT INTO account_balances VALUES (1, 10.1), (2, 0.30000000000000004);
+        """
+    )
+    legacy.execute(
+        "INSERT INTO outbox (type, account_id, payload, created_at) VALUES ('account_changed', 1, ?, 0)",
+        (json.dumps({"type": "account_changed", "account_id": 1, "balance": 10.1}),),
+    )
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setattr(repository, "DB_PATH", path)
+    repository.init_db()
+    repository.init_db()  # second run is a no-op
+
+    conn = repository.get_db_conn()
+    try:
+        rows = conn.execute("SELECT id, balance, typeof(balance) FROM accounts ORDER BY id").fetchall()
+        assert [tuple(r) for r in rows] == [(1, 1010, "integer"), (2, 30, "integer")]
+        assert conn.execute("SELECT SUM(balance) FROM account_balances").fetchone()[0] == 1040
+        assert json.loads(conn.execute("SELECT payload FROM outbox").fetchone()[0])["balance"] == 1010
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == repository.SCHEMA_VERSION
+    finally:
+        conn.close()
@@ -0,0 +1,92 @@
+"""
+Optional Async Mode for the Blog CMS
+====================================
+
+Every route in `main.py` is a normal `def` function that talks to SQLite
+with the blocking `sqlite3` module. FastAPI runs such functions on a
+shared pool of threads so the server is not frozen while one request
+waits for the database.
+
+When many clients arrive at once, they all queue for those same threads.
+Setting the environment variable ``ASYNC_DB=1`` turns on an alternative:
+
+- routes marked with `@aio.endpoint()` become `async def` routes;
+- the transaction script itself runs on threads owned by this module:
+  a few reader threads (``ASYNC_DB_READERS``, default 8) for SELECTs and
+  ONE writer thread (``ASYNC_DB_WRITERS``, default 1) for INSERT /
+  UPDATE / DELETE.
+
+Beginner tip: SQLite lets only one connection write at a time. Sending
+all writes to one thread means they simply wait their turn in line
+instead of many threads bumping into "database is locked".
+
+The code inside each route does not change at all; only the place it
+runs changes. Try both modes with `common/utils/loadtest.py`.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+ASYNC_DB_READERS = int(os.getenv("ASYNC_DB_READERS", "8"))
+ASYNC_DB_WRITERS = int(os.getenv("ASYNC_DB_WRITERS", "1"))
+
+
+class DBExecutor:
+    """Reader threads + writer lane for blocking DB calls."""
+
+    def __init__(self, readers: int = ASYNC_DB_READERS, writers: int = ASYNC_DB_WRITERS):
+        self._readers = ThreadPoolExecutor(max(1, readers), thread_name_prefix="db-read")
+        self._writers = ThreadPoolExecutor(max(1, writers), thread_name_prefix="db-write")
+
+    async def run(self, fn, *args, write: bool = False, **kwargs):
+        """Run `fn` on the right pool and wait for it without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        pool = self._writers if write else self._readers
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._readers.shutdown(wait=True)
+        self._writers.shutdown(wait=True)
+
+
+_executor: Optional[DBExecutor] = None
+
+
+def get_executor() -> DBExecutor:
+    """Return the app's executor, creating it on first use (again after shutdown())."""
+    global _executor
+    if _executor is None:
+        _executor = DBExecutor()
+    return _executor
+
+
+def shutdown() -> None:
+    """Stop the threads (called when the server shuts down)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def endpoint(write: bool = False):
+    """
+    Decorator for API handlers (put it *below* the `@app.get/post` line).
+
+    - ASYNC_DB off → the handler is returned unchanged.
+    - ASYNC_DB on  → an `async def` wrapper runs it on the executor.
+    """
+    def decorate(fn):
+        if not ASYNC_DB:
+            return fn
+
+        @functools.wraps(fn)
+        async def run(*args, **kwargs):
+            return await get_executor().run(fn, *args, write=write, **kwargs)
+
+        return run
+
+    return decorate
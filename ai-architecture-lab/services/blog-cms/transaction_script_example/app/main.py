@@ -36,14 +36,26 @@ Notes for learners
 - Tests override this path so every test runs on a clean database.  
 - No ORMs (like SQLAlchemy) are used here — only raw SQL so you can
   clearly see how data is saved and retrieved.
+- Optional: `ASYNC_DB=1` runs the same routes as `async def` functions on
+  dedicated database threads (see `aio.py`).
+- Optional: `FAST_JSON=1` makes the read routes turn SQLite rows straight
+  into JSON bytes instead of building one `PostOut` model per post.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from pydantic import BaseModel
+import json
 import sqlite3
 from typing import List
 import os
 
+try:
+    import orjson
+except ImportError:  # optional: the json module encodes the same, only slower
+    orjson = None
+
+from . import aio
+
 # ==============================================================
 # DATABASE CONFIGURATION
 # ==============================================================
@@ -53,6 +65,10 @@ import os
 # Tests can override this path to use a temporary database.
 DB_PATH = os.getenv("DB_PATH", "./posts.db")
 
+# FAST_JSON=1 skips the Pydantic models on the read routes (see json_response).
+# The JSON the client gets looks exactly the same.
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
 # Create the FastAPI application.
 app = FastAPI(title="Blog CMS - Transaction Script Example")
 
@@ -109,6 +125,21 @@ def init_db():
     conn.close()
 
 
+def json_response(content) -> Response:
+    """
+    Turn plain Python data (dicts, lists, strings, numbers) into JSON bytes.
+
+    FastAPI sends a returned Response exactly as it is, so the rows never
+    become Pydantic models and are not checked and converted a second
+    time. orjson is used when it is installed.
+    """
+    if orjson is not None:
+        body = orjson.dumps(content)
+    else:
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+    return Response(content=body, media_type="application/json")
+
+
 # Initialize the DB as soon as the file loads.
 try:
     init_db()
@@ -123,6 +154,12 @@ def startup():
     init_db()
 
 
+@app.on_event("shutdown")
+def shutdown():
+    """Runs when FastAPI stops — stops the async-mode database threads."""
+    aio.shutdown()
+
+
 # ==============================================================
 # ROUTES (CRUD ENDPOINTS)
 # ==============================================================
@@ -131,6 +168,7 @@ def startup():
 # CREATE A NEW POST
 # ---------------------------
 @app.post("/posts", response_model=PostOut)
+@aio.endpoint(write=True)
 def create_post(post: PostIn):
     """
     Create a new blog post.
@@ -160,6 +198,7 @@ def create_post(post: PostIn):
 # LIST ALL POSTS
 # ---------------------------
 @app.get("/posts", response_model=List[PostOut])
+@aio.endpoint()
 def list_posts():
     """
     Return all posts in the database.
@@ -172,6 +211,10 @@ def list_posts():
     ).fetchall()
     conn.close()
 
+    # Fast mode: rows → dicts → JSON bytes, same fields as PostOut
+    if FAST_JSON:
+        return json_response([{"title": r["title"], "content": r["content"], "id": r["id"]} for r in rows])
+
     # Convert SQLite rows into PostOut objects
     return [PostOut(id=r["id"], title=r["title"], content=r["content"]) for r in rows]
 
@@ -180,6 +223,7 @@ def list_posts():
 # GET A SINGLE POST BY ID
 # ---------------------------
 @app.get("/posts/{post_id}", response_model=PostOut)
+@aio.endpoint()
 def get_post(post_id: int):
     """
     Return one post by its ID.
@@ -196,6 +240,9 @@ def get_post(post_id: int):
     if not row:
         raise HTTPException(status_code=404, detail="Post not found")
 
+    if FAST_JSON:
+        return json_response({"title": row["title"], "content": row["content"], "id": row["id"]})
+
     return PostOut(id=row["id"], title=row["title"], content=row["content"])
 
 
@@ -203,6 +250,7 @@ def get_post(post_id: int):
 # UPDATE A POST
 # ---------------------------
 @app.put("/posts/{post_id}", response_model=PostOut)
+@aio.endpoint(write=True)
 def update_post(post_id: int, post: PostIn):
     """
     Update an existing post.
@@ -233,6 +281,7 @@ def update_post(post_id: int, post: PostIn):
 # DELETE A POST
 # ---------------------------
 @app.delete("/posts/{post_id}")
+@aio.endpoint(write=True)
 def delete_post(post_id: int):
     """
     Delete a post by ID.
@@ -42,3 +42,37 @@ def test_update_and_delete_post(client):
     r3 = client.delete(f"/posts/{pid}")
     assert r3.status_code == 200
     assert r3.json()["deleted"] is True
+
+
+def test_async_mode_runs_the_same_routes(tmp_path, monkeypatch):
+    import asyncio
+    from importlib import reload
+    import app.aio as aio
+    import app.main as mainmod
+
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "async_posts.db"))
+    monkeypatch.setattr(aio, "ASYNC_DB", True)
+    reload(mainmod)
+    try:
+        assert asyncio.iscoroutinefunction(mainmod.create_post)
+        client = TestClient(mainmod.app)
+        pid = client.post("/posts", json={"title": "T", "content": "C"}).json()["id"]
+        assert client.get(f"/posts/{pid}").json()["title"] == "T"
+        assert client.delete(f"/posts/{pid}").json() == {"deleted": True}
+        assert client.get(f"/posts/{pid}").status_code == 404
+    finally:
+        aio.shutdown()
+
+
+def test_fast_json_mode_returns_the_same_documents(client, monkeypatch):
+    import app.main as mainmod
+
+    for i in range(3):
+        client.post("/posts", json={"title": f"Tïtle {i}", "content": "Body"})
+    slow = [client.get("/posts").json(), client.get("/posts/2").json()]
+    monkeypatch.setattr(mainmod, "FAST_JSON", True)
+    fast = [client.get("/posts"), client.get("/posts/2")]
+
+    assert [r.json() for r in fast] == slow
+    assert fast[0].headers["content-type"] == "application/json"
+    assert client.get("/posts/99").status_code == 404
@@ -0,0 +1,95 @@
+"""
+Async Mode (Beginner Explanation)
+=================================
+
+The endpoints in `api.py` are normal `def` functions. FastAPI runs them
+on a shared threadpool, because the Repository uses the blocking
+`sqlite3` module. That is fine for a demo, but under many concurrent
+clients the requests fight over those threads and over SQLite's single
+write lock.
+
+Setting ``ASYNC_DB=1`` switches on an alternative mode:
+
+- endpoints marked with `@aio.endpoint()` become `async def` endpoints;
+- their work runs on a small `DBExecutor` owned by this app:
+    * reader threads (``ASYNC_DB_READERS``, default 8) for queries,
+    * a writer lane (``ASYNC_DB_WRITERS``, default 1) for anything that
+      saves a Conversation.
+
+Why a single writer lane?
+-------------------------
+SQLite allows one writer at a time. Adding a message is
+load → domain rule → save; running those on one thread means two
+requests can never interleave their load and save, and no thread sits
+waiting on the database lock.
+
+Nothing in the Domain Model or the Repository changes — only *where*
+the API layer runs them. `common/utils/loadtest.py` compares both modes.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+ASYNC_DB = os.getenv("ASYNC_DB", "0") == "1"
+ASYNC_DB_READERS = int(os.getenv("ASYNC_DB_READERS", "8"))
+ASYNC_DB_WRITERS = int(os.getenv("ASYNC_DB_WRITERS", "1"))
+
+
+class DBExecutor:
+    """Reader threads + writer lane for blocking DB calls."""
+
+    def __init__(self, readers: int = ASYNC_DB_READERS, writers: int = ASYNC_DB_WRITERS):
+        self._readers = ThreadPoolExecutor(max(1, readers), thread_name_prefix="db-read")
+        self._writers = ThreadPoolExecutor(max(1, writers), thread_name_prefix="db-write")
+
+    async def run(self, fn, *args, write: bool = False, **kwargs):
+        """Run `fn` on the right pool and wait for it without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        pool = self._writers if write else self._readers
+        return await loop.run_in_executor(pool, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        self._readers.shutdown(wait=True)
+        self._writers.shutdown(wait=True)
+
+
+_executor: Optional[DBExecutor] = None
+
+
+def get_executor() -> DBExecutor:
+    """Return the app's executor, creating it on first use (again after shutdown())."""
+    global _executor
+    if _executor is None:
+        _executor = DBExecutor()
+    return _executor
+
+
+def shutdown() -> None:
+    """Stop the threads (called when the server shuts down)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+def endpoint(write: bool = False):
+    """
+    Decorator for API handlers (put it *below* the `@app.get/post` line).
+
+    - ASYNC_DB off → the handler is returned unchanged.
+    - ASYNC_DB on  → an `async def` wrapper runs it on the executor.
+    """
+    def decorate(fn):
+        if not ASYNC_DB:
+            return fn
+
+        @functools.wraps(fn)
+        async def run(*args, **kwargs):
+            return await get_executor().run(fn, *args, write=write, **kwargs)
+
+        return run
+
+    return decorate
@@ -42,14 +42,31 @@ This gives us:
 - Clean separation between HTTP, business rules, and database
 """
 
+import asyncio
+import datetime
+import json
 import os
-from typing import List
+import random
+import time
+from typing import List, Literal, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from .domain import Conversation
-from .repository import ConversationRepository
+try:
+    import orjson
+except ImportError:  # optional: the json module encodes the same, only slower
+    orjson = None
+
+from . import aio
+from . import archiver
+from . import consumers
+from . import export
+from . import importer
+from . import streaming
+from .domain import Conversation, Message, datetime_to_micros
+from .repository import ConcurrentUpdate, ConversationRepository
 
 
 # -------------------------------------------------------------------
@@ -64,6 +81,36 @@ from .repository import ConversationRepository
 DB_PATH = os.getenv("DB_PATH", "./conversations.db")
 repo = ConversationRepository(DB_PATH)
 
+# Domain events saved to the outbox are handled off the request path by
+# an async consumer pool (see consumers.py). Analytics is the example
+# consumer; add more with `pipeline.subscribe(handler)`.
+pipeline = consumers.EventPipeline(repo)
+analytics = consumers.Analytics()
+pipeline.subscribe(analytics.handle)
+# Live streams: the hub fans new messages out to connected SSE clients.
+hub = streaming.MessageHub()
+pipeline.subscribe(hub.handle)
+# Old closed conversations move to the archive file in the background
+# (see archiver.py); reads find them there transparently.
+archive_job = archiver.Archiver(repo)
+
+# Conversations are returned with one page of messages (newest last).
+MESSAGES_LIMIT_DEFAULT = int(os.getenv("MESSAGES_LIMIT_DEFAULT", "100"))
+MESSAGES_LIMIT_MAX = int(os.getenv("MESSAGES_LIMIT_MAX", "1000"))
+# page size of GET /conversations
+CONVERSATIONS_LIMIT_DEFAULT = int(os.getenv("CONVERSATIONS_LIMIT_DEFAULT", "100"))
+CONVERSATIONS_LIMIT_MAX = int(os.getenv("CONVERSATIONS_LIMIT_MAX", "1000"))
+# how often a write is retried when another request saved the same
+# conversation between its load and its save (see _retry_on_conflict)
+CONFLICT_RETRIES = int(os.getenv("CONFLICT_RETRIES", "10"))
+# results per page of GET /search
+SEARCH_LIMIT_DEFAULT = int(os.getenv("SEARCH_LIMIT_DEFAULT", "20"))
+SEARCH_LIMIT_MAX = int(os.getenv("SEARCH_LIMIT_MAX", "100"))
+# FAST_JSON=1: the conversation read endpoints encode plain dicts straight
+# to JSON bytes instead of building a Pydantic model per message (see
+# _json_response); the response schemas stay the same
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
+
 
 # -------------------------------------------------------------------
 # FASTAPI APPLICATION INITIALIZATION
@@ -71,6 +118,27 @@ repo = ConversationRepository(DB_PATH)
 app = FastAPI(title="Chat Domain Model Demo")
 
 
+# The event pipeline runs on the server's event loop (EVENTS_MODE=off
+# only stores the events), and so does the archiver job (ARCHIVE_MODE=off
+# turns it off).
+@app.on_event("startup")
+async def startup():
+    if consumers.EVENTS_MODE == "async":
+        await pipeline.start()
+    if archiver.ARCHIVE_MODE == "async":
+        await archive_job.start()
+
+
+# ASYNC_DB=1 runs the endpoints marked @aio.endpoint as `async def`
+# handlers on dedicated DB threads (see aio.py). Stop those threads
+# when the server shuts down.
+@app.on_event("shutdown")
+async def shutdown():
+    await pipeline.stop()
+    await archive_job.stop()
+    aio.shutdown()
+
+
 # -------------------------------------------------------------------
 # REQUEST/RESPONSE MODELS (Pydantic DTOs)
 # -------------------------------------------------------------------
@@ -86,6 +154,7 @@ class MessageIn(BaseModel):
 
 
 class MessageOut(BaseModel):
+    id: int
     sender: str
     text: str
     created_at: str
@@ -96,33 +165,174 @@ class ConversationOut(BaseModel):
     title: str
     closed: bool
     messages: List[MessageOut]
+    # pass as ?before= to fetch the previous (older) page; None = no more
+    next_before: Optional[int] = None
+
+
+class SearchHitOut(BaseModel):
+    conversation_id: int
+    message: MessageOut
+    snippet: str
+    score: Optional[float] = None
+
+
+class SearchOut(BaseModel):
+    results: List[SearchHitOut]
+    # pass as ?offset= to fetch the next page; None = no more
+    next_offset: Optional[int] = None
+
+
+class SenderMessageOut(MessageOut):
+    conversation_id: int
+
+
+class SenderConversationOut(BaseModel):
+    conversation_id: int
+    # the sender's messages in it (since the requested time) and the newest one's time
+    message_count: int
+    last_message_at: str
+
+
+class ImportErrorOut(BaseModel):
+    line: int
+    error: str
+
+
+class ImportOut(BaseModel):
+    lines: int
+    conversations: int
+    messages: int
+    rejected: int
+    # the first rejected lines (all of them are counted in `rejected`)
+    errors: List[ImportErrorOut]
+    seconds: float
+    rows_per_second: float
+
+
+class ConversationStatsOut(BaseModel):
+    id: int
+    message_count: int
+    total_word_count: int
+    last_message: Optional[MessageOut] = None
+
+
+# -------------------------------------------------------------------
+# HELPER: epoch micros → ISO 8601 string (UTC, no offset)
+# -------------------------------------------------------------------
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _format_micros(micros: int) -> str:
+    """
+    The domain keeps timestamps as integer microseconds; clients get the
+    same ISO format as always, e.g. "2024-01-01T12:00:00.123456".
+    Integer arithmetic only, so no precision is lost to floats.
+    """
+    return (_EPOCH + datetime.timedelta(microseconds=micros)).isoformat()
 
 
 # -------------------------------------------------------------------
 # HELPER: Convert domain Conversation → Pydantic ConversationOut
 # -------------------------------------------------------------------
-def _conv_to_out(conv: Conversation) -> ConversationOut:
+def _conv_to_out(conv: Conversation, limit: int = MESSAGES_LIMIT_DEFAULT) -> ConversationOut:
     """
     Converts a *domain* Conversation object into a *Pydantic* API response.
 
     API layer uses Pydantic → Domain layer uses dataclasses.
     This translation step is normal in layered architecture.
+
+    Only the newest `limit` loaded messages are returned; `next_before`
+    points at the page before them when there is one.
     """
+    page, next_before = _page(conv, limit)
     return ConversationOut(
         id=conv.id,
         title=conv.title,
         closed=conv.closed,
-        messages=[
-            MessageOut(sender=m.sender, text=m.text, created_at=m.created_at)
-            for m in conv.messages
-        ],
+        messages=[_message_to_out(m) for m in page],
+        next_before=next_before,
     )
 
 
+def _message_to_out(m: Message) -> MessageOut:
+    return MessageOut(id=m.id, sender=m.sender, text=m.text, created_at=_format_micros(m.created_at))
+
+
+def _page(conv: Conversation, limit: int):
+    """The newest `limit` loaded messages and the `next_before` that goes with them."""
+    page = conv.messages[-limit:] if limit else []
+    has_older = conv.has_older_messages or len(conv.messages) > len(page)
+    return page, (page[0].id if page and has_older else None)
+
+
+# -------------------------------------------------------------------
+# HELPER: the fast path (FAST_JSON=1) — same JSON, no Pydantic models
+# -------------------------------------------------------------------
+def _conv_to_dict(conv: Conversation, limit: int = MESSAGES_LIMIT_DEFAULT) -> dict:
+    """`_conv_to_out` as plain dicts and lists: the fields of ConversationOut."""
+    page, next_before = _page(conv, limit)
+    return {
+        "id": conv.id,
+        "title": conv.title,
+        "closed": conv.closed,
+        "messages": [
+            {"id": m.id, "sender": m.sender, "text": m.text, "created_at": _format_micros(m.created_at)}
+            for m in page
+        ],
+        "next_before": next_before,
+    }
+
+
+def _json_response(content) -> Response:
+    """
+    Encode `content` (dicts, lists, str, int...) to JSON bytes right here.
+
+    FastAPI sends a returned Response as is: no response_model
+    validation, no second serialization pass. The `response_model` on the
+    route still documents the schema. orjson is used when installed.
+    """
+    if orjson is not None:
+        body = orjson.dumps(content)
+    else:
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+    return Response(content=body, media_type="application/json")
+
+
+# -------------------------------------------------------------------
+# HELPER: retry a load → change → save when it lost a race
+# -------------------------------------------------------------------
+def _retry_on_conflict(command):
+    """
+    Run `command()` — load a conversation, change it, save it — and run
+    it again from the start when the save raises ConcurrentUpdate.
+
+    Every attempt reloads the conversation, so the domain rules judge the
+    latest state: a message for a conversation that was closed in the
+    meantime is rejected instead of being written. Attempts are spread
+    out with a random, growing backoff (capped at 100 ms); after
+    CONFLICT_RETRIES retries the client gets 409 Conflict. That is meant
+    for occasional races — dozens of clients writing into ONE
+    conversation at the same moment will see some 409s.
+
+    With ASYNC_DB the commands run on the writer lane, which serializes
+    this process's saves: the competing save has already committed, so
+    the retry runs at once. Sleeping there would stall every write.
+    """
+    for attempt in range(CONFLICT_RETRIES + 1):
+        try:
+            return command()
+        except ConcurrentUpdate:
+            if attempt == CONFLICT_RETRIES:
+                raise HTTPException(status_code=409, detail="conversation changed concurrently, try again")
+            if not aio.ASYNC_DB:
+                time.sleep(random.uniform(0, min(0.1, 0.002 * 2 ** attempt)))
+
+
 # ===================================================================
 # ENDPOINT: CREATE A NEW CONVERSATION
 # ===================================================================
 @app.post("/conversations", response_model=ConversationOut)
+@aio.endpoint(write=True)
 def create_conversation(payload: ConversationIn):
     """
     Create a new conversation.
@@ -140,29 +350,97 @@ def create_conversation(payload: ConversationIn):
     return _conv_to_out(saved)
 
 
+# ===================================================================
+# ENDPOINT: LIST CONVERSATIONS (PAGINATED)
+# ===================================================================
+@app.get("/conversations", response_model=List[ConversationOut])
+@aio.endpoint()
+def list_conversations(
+    response: Response,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(CONVERSATIONS_LIMIT_DEFAULT, ge=1, le=CONVERSATIONS_LIMIT_MAX),
+    messages: int = Query(0, ge=0, le=MESSAGES_LIMIT_MAX),
+):
+    """
+    List conversations in id order, one page at a time.
+
+    - `after_id` / `limit`: keyset pagination. When the page is full, the
+      `X-Next-After-Id` response header holds the `after_id` of the next page.
+    - `messages`: how many of each conversation's newest messages to
+      include (default 0 = headers only).
+
+    The Repository loads the whole page with a couple of set-based
+    queries instead of one `get()` per conversation.
+    """
+    convs = repo.list_page(after_id=after_id, limit=limit, messages=messages)
+    if FAST_JSON:
+        # the header goes on the Response that is actually sent
+        response = _json_response([_conv_to_dict(c, messages) for c in convs])
+    if len(convs) == limit:
+        response.headers["X-Next-After-Id"] = str(convs[-1].id)
+    return response if FAST_JSON else [_conv_to_out(c, messages) for c in convs]
+
+
 # ===================================================================
 # ENDPOINT: GET ONE CONVERSATION BY ID
 # ===================================================================
 @app.get("/conversations/{conv_id}", response_model=ConversationOut)
-def get_conversation(conv_id: int):
+@aio.endpoint()
+def get_conversation(
+    conv_id: int,
+    limit: int = Query(MESSAGES_LIMIT_DEFAULT, ge=1, le=MESSAGES_LIMIT_MAX),
+    before: Optional[int] = Query(None, ge=1),
+):
     """
-    Retrieve a single conversation by ID.
+    Retrieve a single conversation by ID with one page of its messages.
+
+    - `limit`: how many messages (the newest ones by default)
+    - `before`: only messages older than this message id; use the
+      `next_before` value of the previous response to scroll back
 
     Notice:
     - No SQL here
     - No business logic here
     - All heavy lifting happens in the Repo + Domain
     """
-    conv = repo.get(conv_id)
+    conv = repo.get(conv_id, limit=limit, before=before)
     if not conv:
         raise HTTPException(status_code=404, detail="conversation not found")
-    return _conv_to_out(conv)
+    if FAST_JSON:
+        return _json_response(_conv_to_dict(conv, limit))
+    return _conv_to_out(conv, limit)
+
+
+# ===================================================================
+# ENDPOINT: CONVERSATION STATS
+# ===================================================================
+@app.get("/conversations/{conv_id}/stats", response_model=ConversationStatsOut)
+@aio.endpoint()
+def conversation_stats(conv_id: int):
+    """
+    Message count, word count and last message of a conversation.
+
+    The counts are stored on the conversation row (kept up to date by
+    every save), and the last message is the newest page of size 1 — so
+    this costs the same for 10 messages as for 10 million.
+    """
+    conv = repo.get(conv_id, limit=1)
+    if not conv:
+        raise HTTPException(status_code=404, detail="conversation not found")
+    last = conv.last_message()
+    return ConversationStatsOut(
+        id=conv.id,
+        message_count=conv.message_count(),
+        total_word_count=conv.total_word_count(),
+        last_message=_message_to_out(last) if last else None,
+    )
 
 
 # ===================================================================
 # ENDPOINT: ADD A MESSAGE TO A CONVERSATION
 # ===================================================================
 @app.post("/conversations/{conv_id}/messages", response_model=ConversationOut)
+@aio.endpoint(write=True)
 def add_message(conv_id: int, payload: MessageIn):
     """
     Add a new message to the conversation.
@@ -174,18 +452,30 @@ def add_message(conv_id: int, payload: MessageIn):
       and convert it into a proper HTTP response.
 
     This is the value of putting logic in the Domain Model.
-    """
-    conv = repo.get(conv_id)
-    if not conv:
-        raise HTTPException(status_code=404, detail="conversation not found")
 
-    try:
-        conv.add_message(payload.sender, payload.text)
-    except ValueError as e:
-        # Domain rule violation → translate into HTTP 400 Bad Request
-        raise HTTPException(status_code=400, detail=str(e))
+    Only the latest page of messages is loaded: the save writes just the
+    new message, and the response shows the same page GET would.
 
-    repo.save(conv)
+    Concurrent requests for the same conversation do not need a lock: a
+    save that lost the race is retried from the load (409 if it keeps
+    losing).
+    """
+    def command():
+        conv = repo.get(conv_id, limit=MESSAGES_LIMIT_DEFAULT)
+        if not conv:
+            raise HTTPException(status_code=404, detail="conversation not found")
+
+        try:
+            conv.add_message(payload.sender, payload.text)
+        except ValueError as e:
+            # Domain rule violation → translate into HTTP 400 Bad Request
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return repo.save(conv)
+
+    conv = _retry_on_conflict(command)
+    # the MessageAdded event is in the outbox; wake the consumers
+    pipeline.notify()
     return _conv_to_out(conv)
 
 
@@ -193,6 +483,7 @@ def add_message(conv_id: int, payload: MessageIn):
 # ENDPOINT: CLOSE A CONVERSATION
 # ===================================================================
 @app.post("/conversations/{conv_id}/close", response_model=ConversationOut)
+@aio.endpoint(write=True)
 def close_conversation(conv_id: int):
     """
     Mark the conversation as closed.
@@ -204,11 +495,289 @@ def close_conversation(conv_id: int):
     This endpoint simply delegates to:
       - Domain logic (conv.close())
       - Repository persistence (repo.save())
+
+    Closing only touches the header, so no message rows are loaded and
+    the response carries an empty `messages` list.
+    """
+    def command():
+        conv = repo.get(conv_id, limit=0)
+        if not conv:
+            raise HTTPException(status_code=404, detail="conversation not found")
+
+        conv.close()
+        return repo.save(conv)
+
+    conv = _retry_on_conflict(command)
+    pipeline.notify()
+    return _conv_to_out(conv, limit=0)
+
+
+# ===================================================================
+# ENDPOINT: BULK IMPORT (NDJSON)
+# ===================================================================
+@app.post("/import", response_model=ImportOut)
+async def import_messages(request: Request):
+    """
+    Import conversations and messages from an NDJSON request body.
+
+    The format and the rules are described in importer.py. The body is
+    read chunk by chunk as it arrives and stored in batches of
+    `IMPORT_BATCH_SIZE` rows, so even a very large upload never sits in
+    memory. The response reports how many rows were imported and which
+    lines were rejected.
+
+    For files of many GB, prefer the command line (`python -m app.importer`):
+    no HTTP upload, and it prints progress as it goes.
+    """
+    bulk = importer.BulkImporter(repo)
+
+    async def run(fn, *args):
+        # the importer writes: with ASYNC_DB, take the writer lane
+        if aio.ASYNC_DB:
+            return await aio.get_executor().run(fn, *args, write=True)
+        return await asyncio.to_thread(fn, *args)
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await run(bulk.feed, chunk)
+        stats = await run(bulk.finish)
+    except ConcurrentUpdate:
+        # a conversation picked up by id changed while we imported into it
+        raise HTTPException(
+            status_code=409,
+            detail=f"conversation changed concurrently after {bulk.stats.lines} lines; the batches before were stored",
+        )
+    return ImportOut(
+        lines=stats.lines,
+        conversations=stats.conversations,
+        messages=stats.messages,
+        rejected=stats.rejected,
+        errors=[ImportErrorOut(line=line, error=error) for line, error in stats.errors],
+        seconds=stats.seconds,
+        rows_per_second=stats.rows_per_second(),
+    )
+
+
+# ===================================================================
+# ENDPOINT: ANALYTICS EXPORT
+# ===================================================================
+@app.get("/export/{table}")
+def export_table(
+    table: Literal["messages", "conversations"],
+    format: Literal["auto", "parquet", "arrow", "csv"] = export.EXPORT_FORMAT,
+):
+    """
+    Download a whole table as one file, streamed chunk by chunk.
+
+    - `messages`: id, conversation_id, sender, text, created_at
+    - `conversations`: id, title, closed, message_count, word_count,
+      first_message_at, last_message_at
+    - `format`: `parquet` or `arrow` (need pyarrow on the server), `csv`,
+      or `auto` (parquet when possible, else csv)
+
+    Rows go from the Repository straight into the file format (see
+    export.py) — no Pydantic model per message — and only one chunk is
+    in memory at a time.
+    """
+    try:
+        fmt = export.resolve_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def body():
+        # runs on the threadpool: each chunk is read, encoded and sent in turn
+        sink = export.ChunkSink()
+        writer = export.open_writer(sink, table, fmt)
+        for rows in export.iter_rows(repo, table):
+            writer.write(rows)
+            yield sink.take()
+        writer.close()
+        yield sink.take()
+
+    filename = f"{table}.{export.EXTENSIONS[fmt]}"
+    return StreamingResponse(
+        body(),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ===================================================================
+# ENDPOINT: FULL-TEXT SEARCH
+# ===================================================================
+@app.get("/search", response_model=SearchOut)
+@aio.endpoint()
+def search_messages(
+    q: str = Query(..., min_length=1),
+    conversation_id: Optional[int] = Query(None, ge=1),
+    limit: int = Query(SEARCH_LIMIT_DEFAULT, ge=1, le=SEARCH_LIMIT_MAX),
+    offset: int = Query(0, ge=0),
+    order: Literal["rank", "newest"] = "rank",
+):
+    """
+    Search message text, best matches first.
+
+    - `q`: words that must all appear (any case/accents; `word*` = prefix)
+    - `conversation_id`: only search this conversation
+    - `order`: `rank` (best match first) or `newest` (cheaper for words
+      that occur in very many messages)
+    - `limit` / `offset`: one page of results; `next_offset` points at the
+      next page
+
+    Each result has a `snippet` with the matches wrapped in <mark>…</mark>.
+    """
+    hits = repo.search(q, conversation_id=conversation_id, limit=limit + 1, offset=offset, order=order)
+    return SearchOut(
+        results=[
+            SearchHitOut(conversation_id=h.conversation_id, message=_message_to_out(h.message), snippet=h.snippet, score=h.score)
+            for h in hits[:limit]
+        ],
+        next_offset=offset + limit if len(hits) > limit else None,
+    )
+
+
+# ===================================================================
+# ENDPOINTS: MESSAGES / CONVERSATIONS OF ONE SENDER
+# ===================================================================
+@app.get("/senders/{sender}/messages", response_model=List[SenderMessageOut])
+@aio.endpoint()
+def sender_messages(
+    sender: str,
+    response: Response,
+    since: Optional[datetime.datetime] = Query(None),
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(MESSAGES_LIMIT_DEFAULT, ge=1, le=MESSAGES_LIMIT_MAX),
+):
+    """
+    Messages of `sender` across all conversations, oldest first.
+
+    - `since`: only messages created at or after this time (ISO 8601,
+      UTC when it has no offset), e.g. the last hour
+    - `after_id` / `limit`: keyset pagination. When the page is full, the
+      `X-Next-After-Id` response header holds the `after_id` of the next page.
+
+    Served by the (sender, created_at) index: a page costs the same on a
+    table of 1k or 10M messages.
+    """
+    try:
+        rows = repo.messages_by_sender(
+            sender, since=datetime_to_micros(since) if since is not None else None, after_id=after_id, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(rows) == limit:
+        response.headers["X-Next-After-Id"] = str(rows[-1].message.id)
+    return [
+        SenderMessageOut(conversation_id=r.conversation_id, **_message_to_out(r.message).model_dump())
+        for r in rows
+    ]
+
+
+@app.get("/senders/{sender}/conversations", response_model=List[SenderConversationOut])
+@aio.endpoint()
+def sender_conversations(
+    sender: str,
+    response: Response,
+    since: Optional[datetime.datetime] = Query(None),
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(CONVERSATIONS_LIMIT_DEFAULT, ge=1, le=CONVERSATIONS_LIMIT_MAX),
+):
+    """
+    Conversations `sender` took part in (since `since`), in id order, with
+    how many messages they wrote there. Paginated like `GET /conversations`.
+    """
+    rows = repo.sender_conversations(
+        sender, since=datetime_to_micros(since) if since is not None else None, after_id=after_id, limit=limit
+    )
+    if len(rows) == limit:
+        response.headers["X-Next-After-Id"] = str(rows[-1].conversation_id)
+    return [
+        SenderConversationOut(
+            conversation_id=r.conversation_id,
+            message_count=r.message_count,
+            last_message_at=_format_micros(r.last_message_at),
+        )
+        for r in rows
+    ]
+
+
+# ===================================================================
+# ENDPOINT: EVENT PIPELINE METRICS
+# ===================================================================
+@app.get("/events/metrics")
+@aio.endpoint()
+def event_metrics():
+    """
+    Health of the event pipeline: queue depth per partition, backpressure
+    waits, handled/failed counters, and how many events (and how old the
+    oldest) are still waiting in the outbox. Plus the analytics consumer's
+    counters, to see events arrive.
     """
-    conv = repo.get(conv_id)
+    return {**pipeline.metrics(), "analytics": analytics.snapshot(), "streams": hub.stats()}
+
+
+# ===================================================================
+# ENDPOINT: ARCHIVE METRICS
+# ===================================================================
+@app.get("/archive/metrics")
+@aio.endpoint()
+def archive_metrics():
+    """
+    The archiver job's counters (conversations and messages moved, hot
+    database bytes freed), the sizes of the hot database and the archive
+    file, and the p50/p99 latency of reads served from the archive.
+    """
+    return archive_job.metrics()
+
+
+# ===================================================================
+# ENDPOINT: STREAM NEW MESSAGES (SERVER-SENT EVENTS)
+# ===================================================================
+@app.get("/conversations/{conv_id}/stream")
+async def stream_conversation(
+    conv_id: int,
+    after: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[int] = Header(None, ge=0),
+):
+    """
+    Push new messages of a conversation as they arrive, instead of polling.
+
+    A `text/event-stream` (Server-Sent Events) response that stays open:
+
+        id: 42
+        event: message
+        data: {"id": 42, "sender": "alice", "text": "hi", "created_at": "..."}
+
+    - `after`: first send the stored messages with a larger id (the
+      cursor); without it, only messages added from now on are sent.
+      Browsers' `EventSource` reconnects with a `Last-Event-ID` header,
+      which is used the same way, so a reconnect misses nothing.
+    - `event: closed` is sent when the conversation is closed; the stream
+      ends after it.
+    - A `: heartbeat` comment is sent when nothing happened for a while.
+
+    Every client is a subscriber of the in-process hub (streaming.py):
+    new messages reach all of them without a query per client.
+    """
+    conv = await asyncio.to_thread(repo.get, conv_id, 1)
     if not conv:
         raise HTTPException(status_code=404, detail="conversation not found")
-
-    conv.close()
-    repo.save(conv)
-    return _conv_to_out(conv)
+    cursor = after if after is not None else last_event_id
+
+    async def sse():
+        async for kind, message in streaming.stream_messages(hub, repo, conv, cursor):
+            if kind == "message":
+                out = _message_to_out(Message(message["sender"], message["text"], message["created_at"], message["id"]))
+                yield f"id: {out.id}\nevent: message\ndata: {out.model_dump_json()}\n\n"
+            elif kind == "closed":
+                yield f"event: closed\ndata: {json.dumps({'id': conv_id})}\n\n"
+            else:
+                yield ": heartbeat\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        # keep proxies from buffering or caching the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,206 @@
+"""
+Archive Store (Beginner Explanation)
+====================================
+
+Closed conversations never change again, but their messages stay in the
+hot `messages` table forever: every index lookup walks a B-tree that
+keeps growing with chats nobody reads.
+
+The archive is a second SQLite file (``ARCHIVE_DB_PATH``, by default
+next to the main database) that holds those messages compressed:
+
+    archived_messages: (conversation_id, first_id) → one blob of ARCHIVE_CHUNK messages
+
+- A blob is ``ARCHIVE_CHUNK`` consecutive messages of one conversation,
+  stored column by column (ids, senders, texts, timestamps) as JSON and
+  compressed with zlib — or zstd when ``ARCHIVE_CODEC=zstd`` and the
+  optional `zstandard` package is installed. Chat text repeats a lot, so
+  a blob is several times smaller than its rows.
+- Reading the newest page of an archived conversation decompresses only
+  the newest blob(s); scrolling back (`before=`) skips to the blob that
+  holds that id through the primary key.
+- Each blob records its codec, so changing ``ARCHIVE_CODEC`` later only
+  affects new blobs.
+
+This module only stores and reads blobs. Moving conversations here is
+the Repository's job (`archive_conversation`), run by the background
+job in `archiver.py`; `ConversationRepository.get` reads archived
+conversations from here without the caller noticing.
+"""
+
+import collections
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib (standard library) is the default
+    zstandard = None
+
+ARCHIVE_CHUNK = int(os.getenv("ARCHIVE_CHUNK", "1000"))
+ARCHIVE_CODEC = os.getenv("ARCHIVE_CODEC", "zlib")
+
+# codec name -> (compress, decompress)
+CODECS = {"zlib": (lambda data: zlib.compress(data, 6), zlib.decompress)}
+if zstandard is not None:
+    CODECS["zstd"] = (zstandard.ZstdCompressor(level=10).compress, zstandard.ZstdDecompressor().decompress)
+
+# (id, sender, text, created_at) — the message columns, in this order
+Row = Tuple[int, str, str, int]
+
+
+def default_path(db_path: str) -> str:
+    """`./conversations.db` → `./conversations.archive.db`."""
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.archive{ext or '.db'}"
+
+
+class ReadStats:
+    """Latency of archived reads: a count and the most recent samples."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = collections.deque(maxlen=window)
+        self.reads = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self.reads += 1
+
+    def summary(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            reads = self.reads
+
+        def percentile_ms(q: float) -> Optional[float]:
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1e3, 3) if samples else None
+
+        return {"reads": reads, "p50_ms": percentile_ms(0.50), "p99_ms": percentile_ms(0.99)}
+
+
+class ArchiveStore:
+    """Compressed message blobs of archived conversations, in their own SQLite file."""
+
+    def __init__(self, path: str, chunk_size: int = ARCHIVE_CHUNK, codec: str = ARCHIVE_CODEC):
+        if codec not in CODECS:
+            raise ValueError(f"unknown archive codec {codec!r} (available: {', '.join(CODECS)})")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.codec = codec
+        self.reads = ReadStats()
+        conn = self._conn()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archived_messages (
+                    conversation_id INTEGER NOT NULL,
+                    first_id INTEGER NOT NULL,
+                    last_id INTEGER NOT NULL,
+                    message_count INTEGER NOT NULL,
+                    codec TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (conversation_id, first_id)
+                )
+                """
+            )
+        finally:
+            conn.close()
+
+    def _conn(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    # ------------------------------------------------------------------
+    # write
+    # ------------------------------------------------------------------
+    def put(self, conv_id: int, rows: Iterable[Row]) -> Tuple[int, Optional[int]]:
+        """
+        Store a conversation's messages (id order) as blobs, replacing
+        what was stored for it before. Returns (messages, last id).
+
+        `rows` may be a cursor: it is read one chunk at a time.
+        """
+        rows = iter(rows)
+        count, last_id = 0, None
+        with self._conn() as conn:
+            conn.execute("DELETE FROM archived_messages WHERE conversation_id=?", (conv_id,))
+            while chunk := list(itertools.islice(rows, self.chunk_size)):
+                conn.execute(
+                    "INSERT INTO archived_messages (conversation_id, first_id, last_id, message_count, codec, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (conv_id, chunk[0][0], chunk[-1][0], len(chunk), self.codec, self._encode(chunk)),
+                )
+                count += len(chunk)
+                last_id = chunk[-1][0]
+        return count, last_id
+
+    # ------------------------------------------------------------------
+    # read
+    # ------------------------------------------------------------------
+    def page(self, conv_id: int, limit: Optional[int] = None, before: Optional[int] = None) -> Tuple[List[Row], bool]:
+        """
+        Like `ConversationRepository.get`: the newest `limit` messages
+        older than `before` (all of them when `limit` is None), oldest
+        first, and whether older ones exist.
+        """
+        if limit is None:
+            return [r for r in self.iter_rows(conv_id) if before is None or r[0] < before], False
+        sql = "SELECT codec, data FROM archived_messages WHERE conversation_id=?"
+        params: list = [conv_id]
+        if before is not None:
+            sql += " AND first_id < ?"
+            params.append(before)
+        newest_first: List[Row] = []
+        conn = self._conn()
+        try:
+            for codec, data in conn.execute(sql + " ORDER BY first_id DESC", params):
+                newest_first.extend(r for r in reversed(self._decode(codec, data)) if before is None or r[0] < before)
+                # one extra row tells whether older ones exist
+                if len(newest_first) > limit:
+                    break
+        finally:
+            conn.close()
+        return newest_first[:limit][::-1], len(newest_first) > limit
+
+    def iter_rows(self, conv_id: int, after_id: int = 0) -> Iterator[Row]:
+        """Every message with id > `after_id`, oldest first, one blob in memory at a time."""
+        while True:
+            conn = self._conn()
+            try:
+                row = conn.execute(
+                    "SELECT first_id, codec, data FROM archived_messages WHERE conversation_id=? AND last_id > ? "
+                    "ORDER BY first_id LIMIT 1",
+                    (conv_id, after_id),
+                ).fetchone()
+            finally:
+                conn.close()
+            if row is None:
+                return
+            rows = self._decode(row[1], row[2])
+            yield from (r for r in rows if r[0] > after_id)
+            after_id = rows[-1][0]
+
+    def size_bytes(self) -> int:
+        """Size of the archive file on disk (WAL included)."""
+        return sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+
+    # ------------------------------------------------------------------
+    # blob format: columns as JSON, compressed
+    # ------------------------------------------------------------------
+    def _encode(self, rows: List[Row]) -> bytes:
+        columns = [list(column) for column in zip(*rows)]
+        return CODECS[self.codec][0](json.dumps(columns, separators=(",", ":")).encode())
+
+    @staticmethod
+    def _decode(codec: str, data: bytes) -> List[Row]:
+        if codec not in CODECS:
+            raise ValueError(f"archive blob uses codec {codec!r}, which is not available here")
+        return list(zip(*json.loads(CODECS[codec][1](data))))
@@ -0,0 +1,187 @@
+"""
+Archiver Job (Beginner Explanation)
+===================================
+
+Moves old closed conversations from the hot database to the archive
+file (see archive.py), a few at a time, in the background:
+
+    every ARCHIVE_INTERVAL_SECONDS:
+        find up to ARCHIVE_BATCH closed conversations whose last message
+        is older than ARCHIVE_AFTER_DAYS
+        for each: repo.archive_conversation(id), then pause ARCHIVE_PAUSE_SECONDS
+
+- Throttled on purpose: each move is one short write transaction, and
+  the pause between moves leaves the database lock to the requests. A
+  big backlog is worked off batch after batch, but never faster than one
+  conversation per ``ARCHIVE_PAUSE_SECONDS``.
+- Batches resume where the previous one stopped (keyset by conversation
+  id); once a batch comes back short, the next run starts over.
+- Nothing changes for clients: `ConversationRepository.get` reads
+  archived conversations from the archive. Archived messages are no
+  longer in the search index or in `GET /export/messages`.
+- `metrics()` reports what was moved, how many bytes of the hot
+  database that freed, and the latency of archived reads.
+
+``ARCHIVE_MODE=async`` (default) runs the job on the app's event loop,
+its database work on a worker thread; ``off`` never archives
+automatically. Run a batch by hand (``--all`` repeats until nothing is
+left, ``--vacuum`` then shrinks the file):
+
+    DB_PATH=./conversations.db python -m app.archiver --older-than-days 30 --all --vacuum
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .domain import now_micros
+from .repository import ConversationRepository
+
+ARCHIVE_MODE = os.getenv("ARCHIVE_MODE", "async")
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "100"))
+ARCHIVE_PAUSE_SECONDS = float(os.getenv("ARCHIVE_PAUSE_SECONDS", "0.05"))
+
+MICROS_PER_DAY = 86_400 * 1_000_000
+
+
+class Archiver:
+    """Periodically archives old closed conversations; see the module docstring."""
+
+    def __init__(
+        self,
+        repo: ConversationRepository,
+        after_days: float = ARCHIVE_AFTER_DAYS,
+        interval: float = ARCHIVE_INTERVAL_SECONDS,
+        batch: int = ARCHIVE_BATCH,
+        pause: float = ARCHIVE_PAUSE_SECONDS,
+    ):
+        self.repo = repo
+        self.after_days = after_days
+        self.interval = interval
+        self.batch = batch
+        self.pause = pause
+        self._after_id = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._stats: Dict = {
+            "runs": 0,
+            "conversations": 0,
+            "messages": 0,
+            "freed_bytes": 0,
+            "last_run_seconds": None,
+            "last_error": None,
+        }
+
+    def run_once(self) -> int:
+        """
+        One throttled batch: archive up to `batch` conversations; return
+        how many were archived. Blocking — the async job runs it on a
+        worker thread.
+        """
+        start = time.perf_counter()
+        used_before = self.repo.storage_stats()["hot_used_bytes"]
+        cutoff = now_micros() - int(self.after_days * MICROS_PER_DAY)
+        ids = self.repo.archive_candidates(cutoff, self._after_id, self.batch)
+        # a short batch reached the end: the next run starts over
+        self._after_id = ids[-1] if len(ids) == self.batch else 0
+        archived = messages = 0
+        for i, conv_id in enumerate(ids):
+            if i and self.pause:
+                time.sleep(self.pause)
+            moved = self.repo.archive_conversation(conv_id)
+            if moved:
+                archived += 1
+                messages += moved
+        freed = used_before - self.repo.storage_stats()["hot_used_bytes"]
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["conversations"] += archived
+            self._stats["messages"] += messages
+            self._stats["freed_bytes"] += max(0, freed)
+            self._stats["last_run_seconds"] = round(time.perf_counter() - start, 3)
+        return archived
+
+    @property
+    def more(self) -> bool:
+        """The last batch was full: more conversations may be waiting."""
+        return self._after_id != 0
+
+    # -- background job ---------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the periodic job on the running event loop (first batch right away)."""
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+                while self.more:
+                    await asyncio.sleep(self.pause)
+                    await asyncio.to_thread(self.run_once)
+            except Exception as e:  # keep the job alive; try again next interval
+                with self._lock:
+                    self._stats["last_error"] = repr(e)
+            await asyncio.sleep(self.interval)
+
+    def metrics(self) -> Dict:
+        """Job counters, hot/archive sizes and archived-read latency."""
+        with self._lock:
+            job = dict(self._stats)
+        return {
+            "running": self.running,
+            "after_days": self.after_days,
+            "job": job,
+            "storage": self.repo.storage_stats(),
+            "archived_reads": self.repo.archive.reads.summary(),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move old closed conversations to the archive file")
+    parser.add_argument("--older-than-days", type=float, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch", type=int, default=ARCHIVE_BATCH, help="conversations per batch")
+    parser.add_argument("--pause", type=float, default=ARCHIVE_PAUSE_SECONDS, help="seconds between conversations")
+    parser.add_argument("--all", action="store_true", help="repeat batches until nothing is left to archive")
+    parser.add_argument("--vacuum", action="store_true", help="shrink the database file afterwards")
+    args = parser.parse_args()
+    db_path = os.getenv("DB_PATH", "./conversations.db")
+    repo = ConversationRepository(db_path)
+    archiver = Archiver(repo, after_days=args.older_than_days, batch=args.batch, pause=args.pause)
+    before = repo.storage_stats()
+    archiver.run_once()
+    while args.all and archiver.more:
+        job = archiver.metrics()["job"]
+        print(f"  {job['conversations']:>10,} conversations  {job['messages']:>12,} messages archived", flush=True)
+        archiver.run_once()
+    if args.vacuum:
+        repo.vacuum()
+    after, job = repo.storage_stats(), archiver.metrics()["job"]
+    print(
+        f"archived {job['conversations']} conversations ({job['messages']} messages) into {repo.archive.path}\n"
+        f"hot database in use: {before['hot_used_bytes'] / 1e6:.1f} MB -> {after['hot_used_bytes'] / 1e6:.1f} MB, "
+        f"file: {before['hot_file_bytes'] / 1e6:.1f} MB -> {after['hot_file_bytes'] / 1e6:.1f} MB, "
+        f"archive file: {after['archive_file_bytes'] / 1e6:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
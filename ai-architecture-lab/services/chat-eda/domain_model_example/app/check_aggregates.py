@@ -0,0 +1,37 @@
+"""Consistency check for the stored conversation totals.
+
+`conversations.message_count` and `word_count` are maintained on every
+save. This command recomputes them from the message rows and lists the
+conversations where they disagree (e.g. after rows were edited by hand or
+restored from a backup); `--fix` also corrects them:
+
+    DB_PATH=./conversations.db python -m app.check_aggregates [--fix]
+
+Exits with status 1 when mismatches remain, so it can run as a cron or
+CI check.
+"""
+import argparse
+import os
+import sys
+import time
+
+from .repository import ConversationRepository
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute conversation totals from the messages table")
+    parser.add_argument("--fix", action="store_true", help="store the recomputed totals")
+    args = parser.parse_args()
+    db_path = os.getenv("DB_PATH", "./conversations.db")
+    start = time.perf_counter()
+    mismatches = ConversationRepository(db_path).check_aggregates(fix=args.fix)
+    for m in mismatches:
+        print(f"conversation {m.conversation_id}: stored (messages, words) = {m.stored}, actual = {m.actual}")
+    action = "fixed" if args.fix else "found"
+    print(f"{action} {len(mismatches)} mismatches in {time.perf_counter() - start:.2f}s ({db_path})")
+    if mismatches and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Event Consumers (Beginner Explanation)
+======================================
+
+This is the "EDA" (event-driven architecture) part of chat-eda.
+
+When a request adds a message, the API only has to do the essential
+work: apply the domain rules and save. Everything that *reacts* to the
+change — search indexing, analytics, notifications — can happen a moment
+later, without making the client wait. Domain events carry the news:
+
+    request:   domain change ──► save() ──► conversations/messages + outbox   (one transaction)
+    pipeline:  outbox ──► relay ──► broker (bounded queues) ──► consumer pool ──► handlers
+
+- The outbox (a table) makes events durable: an event is stored if and
+  only if its change was committed.
+- The relay reads the outbox in id order and publishes each event to the
+  broker. `InProcessBroker` stands in for Kafka/RabbitMQ: one bounded
+  `asyncio.Queue` per partition.
+- Worker tasks (the consumer pool) take events from their partition and
+  run every subscribed handler.
+
+Learner notes
+-------------
+- Ordering: events are partitioned by conversation id, so the events of
+  one conversation are handled in order by one worker, while different
+  conversations are handled in parallel.
+- Backpressure: the queues are bounded (``EVENT_QUEUE_SIZE``). When the
+  handlers fall behind, `publish` waits, so the relay stops reading —
+  the backlog stays in the outbox on disk instead of growing in memory.
+  `metrics()` counts how often that happened.
+- Delivery is at-least-once. The checkpoint (stored in
+  `consumer_checkpoints`) only moves past an event once it and every
+  event before it have been handled; after a restart, anything after the
+  checkpoint is delivered again. Handlers must tolerate duplicates.
+- Retries: a failing handler is retried with exponential backoff; after
+  ``EVENT_MAX_RETRIES`` the event is counted as failed and skipped so one
+  bad event cannot stall its partition.
+- Handlers may be `async def` (run on the event loop) or plain functions
+  (run on a worker thread so they cannot block the loop).
+
+Settings: ``EVENTS_MODE`` (``async`` = start the pipeline with the app,
+``off`` = only store events), ``EVENT_WORKERS``, ``EVENT_QUEUE_SIZE``,
+``EVENT_BATCH_SIZE``, ``EVENT_POLL_INTERVAL``, ``EVENT_MAX_RETRIES``,
+``OUTBOX_PRUNE_EVERY``.
+"""
+
+import asyncio
+import collections
+import os
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+EVENTS_MODE = os.getenv("EVENTS_MODE", "async")
+EVENT_WORKERS = int(os.getenv("EVENT_WORKERS", "4"))
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "500"))
+EVENT_POLL_INTERVAL = float(os.getenv("EVENT_POLL_INTERVAL", "0.5"))
+EVENT_MAX_RETRIES = int(os.getenv("EVENT_MAX_RETRIES", "3"))
+# delete handled outbox rows after roughly this many events
+OUTBOX_PRUNE_EVERY = int(os.getenv("OUTBOX_PRUNE_EVERY", "1000"))
+
+
+class InProcessBroker:
+    """Stand-in for a message broker: one bounded queue per partition."""
+
+    def __init__(self, partitions: int, capacity: int):
+        self.queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=capacity) for _ in range(partitions)]
+        self.capacity = capacity
+        self.backpressure_waits = 0
+
+    def partition_for(self, event: Dict) -> int:
+        return event["conversation_id"] % len(self.queues)
+
+    async def publish(self, event: Dict) -> None:
+        queue = self.queues[self.partition_for(event)]
+        if queue.full():
+            # consumers are behind: wait for room instead of buffering more
+            self.backpressure_waits += 1
+        await queue.put(event)
+
+    def depths(self) -> List[int]:
+        return [q.qsize() for q in self.queues]
+
+
+class EventPipeline:
+    """Relays outbox events through the broker to a pool of async consumers."""
+
+    CHECKPOINT = "event_pipeline"
+
+    def __init__(
+        self,
+        repo,
+        workers: int = EVENT_WORKERS,
+        queue_size: int = EVENT_QUEUE_SIZE,
+        batch_size: int = EVENT_BATCH_SIZE,
+        poll_interval: float = EVENT_POLL_INTERVAL,
+        max_retries: int = EVENT_MAX_RETRIES,
+        prune_every: int = OUTBOX_PRUNE_EVERY,
+    ):
+        self.repo = repo
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self.prune_every = prune_every  # 0 = keep every outbox row
+        self.handlers: List[Callable] = []
+        self.broker: Optional[InProcessBroker] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        # relayed but not yet handled, in outbox order; the checkpoint is
+        # the id just before the oldest of them
+        self._in_flight: Deque[int] = collections.deque()
+        self._handled: Set[int] = set()
+        self._checkpoint = 0
+        self._saved_checkpoint = 0
+        self._relayed_up_to = 0
+        self._since_prune = 0
+        self._stats_lock = threading.Lock()
+        self._stats: Dict = {"relayed": 0, "handled": 0, "retries": 0, "failures": 0, "last_error": None}
+
+    def subscribe(self, handler: Callable) -> Callable:
+        """Register `handler(event_dict)`; works as a decorator too."""
+        self.handlers.append(handler)
+        return handler
+
+    # -- lifecycle --------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        loop = self._loop
+        return loop is not None and not loop.is_closed() and any(not t.done() for t in self._tasks)
+
+    async def start(self) -> None:
+        """Start the relay and the worker tasks on the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self.broker = InProcessBroker(self.workers, self.queue_size)
+        self._checkpoint = self._saved_checkpoint = self._relayed_up_to = await asyncio.to_thread(
+            self.repo.get_checkpoint, self.CHECKPOINT
+        )
+        self._in_flight.clear()
+        self._handled.clear()
+        self._tasks = [asyncio.create_task(self._relay(), name="event-relay")]
+        self._tasks += [asyncio.create_task(self._worker(p), name=f"event-worker-{p}") for p in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stop all tasks and store the checkpoint. Unhandled events stay in the outbox."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._save_checkpoint()
+
+    def notify(self) -> None:
+        """
+        Called by the API after a save that recorded events. Safe to call
+        from any thread; without it the relay still finds new events
+        within `poll_interval`.
+        """
+        if self.running:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def drain(self, timeout: float = 30.0) -> None:
+        """Wait until every event currently in the outbox has been handled."""
+        deadline = time.monotonic() + timeout
+        head = await asyncio.to_thread(self.repo.outbox_head)
+        self.notify()
+        while self._checkpoint < head:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"events not handled in {timeout}s (checkpoint {self._checkpoint} < {head})")
+            await asyncio.sleep(0.005)
+        await self._save_checkpoint()
+
+    # -- relay: outbox -> broker -------------------------------------------
+    async def _relay(self) -> None:
+        while True:
+            try:
+                batch = await asyncio.to_thread(self.repo.read_outbox, self._relayed_up_to, self.batch_size)
+            except Exception as e:
+                # e.g. the database is locked or unavailable; try again later
+                self._record_error(e)
+                batch = []
+            for event in batch:
+                self._in_flight.append(event["event_id"])
+                self._relayed_up_to = event["event_id"]
+                await self.broker.publish(event)
+            with self._stats_lock:
+                self._stats["relayed"] += len(batch)
+            await self._save_checkpoint()
+            if len(batch) < self.batch_size:
+                # asyncio.wait, not wait_for: on Python < 3.12 wait_for can
+                # swallow a cancel that lands as the event fires, and
+                # stop() would then wait for this task forever
+                waiter = asyncio.ensure_future(self._wakeup.wait())
+                try:
+                    await asyncio.wait({waiter}, timeout=self.poll_interval)
+                finally:
+                    waiter.cancel()
+                self._wakeup.clear()
+
+    # -- consumer pool: broker -> handlers ---------------------------------
+    async def _worker(self, partition: int) -> None:
+        queue = self.broker.queues[partition]
+        while True:
+            event = await queue.get()
+            try:
+                await self._handle(event)
+            finally:
+                queue.task_done()
+                self._mark_handled(event["event_id"])
+
+    async def _handle(self, event: Dict) -> None:
+        for handler in self.handlers:
+            delay = 0.05
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if asyncio.iscoroutinefunction(handler):
+                        await handler(event)
+                    else:
+                        await asyncio.to_thread(handler, event)
+                    break
+                except Exception as e:
+                    self._record_error(e)
+                    with self._stats_lock:
+                        self._stats["retries" if attempt < self.max_retries else "failures"] += 1
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(delay)
+                        delay *= 2
+        with self._stats_lock:
+            self._stats["handled"] += 1
+
+    def _mark_handled(self, event_id: int) -> None:
+        # Workers finish out of order; only advance over a contiguous prefix.
+        self._handled.add(event_id)
+        while self._in_flight and self._in_flight[0] in self._handled:
+            self._checkpoint = self._in_flight.popleft()
+            self._handled.discard(self._checkpoint)
+            self._since_prune += 1
+
+    async def _save_checkpoint(self) -> None:
+        position = self._checkpoint
+        if position <= self._saved_checkpoint:
+            return
+        try:
+            # The relay and drain()/stop() both save, and a cancelled relay's
+            # write may still finish late: only ever move the checkpoint forward.
+            await asyncio.to_thread(self.repo.advance_checkpoint, self.CHECKPOINT, position)
+            self._saved_checkpoint = max(self._saved_checkpoint, position)
+            if self.prune_every and self._since_prune >= self.prune_every:
+                self._since_prune = 0
+                await asyncio.to_thread(self.repo.prune_outbox, position)
+        except Exception as e:
+            self._record_error(e)
+
+    def _record_error(self, e: Exception) -> None:
+        with self._stats_lock:
+            self._stats["last_error"] = f"{type(e).__name__}: {e}"
+
+    # -- metrics ------------------------------------------------------------
+    def metrics(self) -> Dict:
+        """
+        Pipeline health: queue depth per partition (and its capacity), how
+        often the relay had to wait for room (backpressure), counters, and
+        the outbox backlog behind the checkpoint (count and age).
+
+        Blocking (reads the outbox): call it from a thread, not the loop.
+        """
+        pending, oldest = self.repo.outbox_lag(self._checkpoint)
+        with self._stats_lock:
+            data = dict(self._stats)
+        data.update(
+            mode=EVENTS_MODE,
+            running=self.running,
+            workers=self.workers,
+            queue_capacity=self.queue_size,
+            queue_depth=self.broker.depths() if self.broker else [0] * self.workers,
+            backpressure_waits=self.broker.backpressure_waits if self.broker else 0,
+            checkpoint=self._checkpoint,
+            pending_events=pending,
+            lag_seconds=round((time.time_ns() // 1000 - oldest) / 1e6, 3) if oldest is not None else 0.0,
+        )
+        return data
+
+
+class Analytics:
+    """
+    Example consumer: live counters that would otherwise need a full scan
+    of the messages table (messages per sender, closed conversations).
+    In a real system this would feed a metrics store or a warehouse.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.messages_by_sender: Dict[str, int] = collections.Counter()
+        self.conversations_closed = 0
+
+    async def handle(self, event: Dict) -> None:
+        with self._lock:
+            if event["type"] == "MessageAdded":
+                self.messages_by_sender[event["sender"]] += 1
+            elif event["type"] == "ConversationClosed":
+                self.conversations_closed += 1
+
+    def snapshot(self, top: int = 10) -> Dict:
+        with self._lock:
+            return {
+                "top_senders": dict(self.messages_by_sender.most_common(top)),
+                "conversations_closed": self.conversations_closed,
+            }
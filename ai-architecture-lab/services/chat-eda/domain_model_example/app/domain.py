@@ -27,28 +27,78 @@ NOT inside API handlers.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import datetime
+import time
 
 
-@dataclass
+def now_micros() -> int:
+    """Current UTC time as integer microseconds since the Unix epoch."""
+    return time.time_ns() // 1000
+
+
+def datetime_to_micros(dt: datetime.datetime) -> int:
+    """A datetime as integer microseconds since the Unix epoch (naive = UTC)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    delta = dt - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def word_count(text: str) -> int:
+    """How many whitespace-separated words `text` has."""
+    return len(text.split())
+
+
+@dataclass(slots=True)
 class Message:
     """
     DOMAIN ENTITY: A single message in a conversation.
 
     - sender: who sent the message
     - text: the content
-    - created_at: timestamp (auto-set at creation)
+    - created_at: UTC timestamp in microseconds since the epoch
+      (auto-set at creation)
+    - id: identity assigned when the message is first saved (None before)
 
     Note: This class has no database knowledge — that's intentional!
     The domain layer should NOT know about persistence.
+
+    Why `slots=True` and an integer timestamp?
+    ------------------------------------------
+    A long chat is loaded as many thousands of Message objects. A normal
+    class gives every instance its own `__dict__`; with `__slots__` the
+    fields are stored in fixed places inside the object instead, which
+    makes each message much smaller. The timestamp stays a plain int
+    (cheap to create, compare and store); it is turned into a readable
+    ISO string only in the API layer, when a message is sent out.
     """
     sender: str
     text: str
-    created_at: str = field(default_factory=lambda: datetime.datetime.utcnow().isoformat())
+    created_at: int = field(default_factory=now_micros)
+    id: Optional[int] = None
+
 
+# ----------------------------------------------------------------------
+# DOMAIN EVENTS
+# ----------------------------------------------------------------------
+# Facts about something that already happened to a Conversation. The
+# aggregate records them as it changes; the Repository writes them to the
+# `outbox` table in the same transaction as the change itself, and
+# consumers (consumers.py) react to them later, off the request path.
+@dataclass(slots=True)
+class MessageAdded:
+    """DOMAIN EVENT: `message` was added to the conversation."""
+    message: Message
 
-@dataclass
+
+@dataclass(slots=True)
+class ConversationClosed:
+    """DOMAIN EVENT: the conversation was closed (at `closed_at`, epoch micros)."""
+    closed_at: int = field(default_factory=now_micros)
+
+
+@dataclass(slots=True)
 class Conversation:
     """
     DOMAIN ENTITY: A conversation holds multiple messages
@@ -59,13 +109,58 @@ class Conversation:
     - This class defines what a conversation *is* (state)
     - It also defines what a conversation *can do* (behavior)
     - This separation of concerns is what makes this a Domain Model
+
+    Loaded windows:
+    ---------------
+    A long chat is not always loaded in full. The Repository may load only
+    the header (no messages) or the most recent page of messages; then
+    `messages` holds just that window, in chronological order, and
+    `has_older_messages` says whether older ones exist in storage.
+
+    Aggregates:
+    -----------
+    `total_messages` and `total_words` cover ALL messages, loaded or not.
+    `add_message` keeps them up to date one message at a time, and the
+    Repository stores them on the conversation row, so `message_count()`
+    and `total_word_count()` never need the messages themselves.
+
+    Events:
+    -------
+    Every change is also recorded as a domain event (`MessageAdded`,
+    `ConversationClosed`). `pending_events()` lists those not yet saved.
+
+    Version:
+    --------
+    `version` is the stored version this object was loaded at. The
+    Repository refuses to save over a newer one, so two requests that
+    changed the same conversation at once cannot overwrite each other.
     """
     id: Optional[int] = None
     title: str = ""
     messages: List[Message] = field(default_factory=list)
     closed: bool = False
-
-    def add_message(self, sender: str, text: str) -> Message:
+    has_older_messages: bool = field(default=False, compare=False)
+    total_messages: int = field(default=0, compare=False)
+    total_words: int = field(default=0, compare=False)
+    version: int = field(default=0, compare=False)
+
+    # Change tracking (used by the Repository, invisible to callers):
+    # how many messages and which (title, closed) values are already
+    # stored. Messages are append-only, so everything after the first
+    # `_persisted_count` messages is new.
+    _persisted_count: int = field(default=0, init=False, repr=False, compare=False)
+    _persisted_header: Optional[Tuple[str, bool]] = field(default=None, init=False, repr=False, compare=False)
+    _events: list = field(default_factory=list, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Built directly with a list of messages (not loaded from storage)?
+        # Then the aggregates start from those messages.
+        if self.messages and not self.total_messages:
+            self.total_messages = len(self.messages)
+            self.total_words = sum(word_count(m.text) for m in self.messages)
+            self._events.extend(MessageAdded(m) for m in self.messages)
+
+    def add_message(self, sender: str, text: str, created_at: Optional[int] = None) -> Message:
         """
         Domain Logic:
         -------------
@@ -73,26 +168,60 @@ class Conversation:
 
         This rule lives here because it belongs to the *business logic*,
         NOT the database or HTTP handler.
+
+        `created_at` (epoch micros) defaults to now; imported history
+        passes the original time.
         """
         if self.closed:
             raise ValueError("Cannot add message to closed conversation")
 
-        msg = Message(sender=sender, text=text)
+        msg = Message(sender=sender, text=text) if created_at is None else Message(sender, text, created_at)
         self.messages.append(msg)
+        self.total_messages += 1
+        self.total_words += word_count(text)
+        self._events.append(MessageAdded(msg))
         return msg
 
     def message_count(self) -> int:
-        """Return how many messages are in this conversation."""
-        return len(self.messages)
+        """Return how many messages this conversation has (loaded or not)."""
+        return self.total_messages
 
     def total_word_count(self) -> int:
-        """Count the total number of words across all messages."""
-        return sum(len(m.text.split()) for m in self.messages)
+        """Return the total number of words across all messages (loaded or not)."""
+        return self.total_words
 
     def last_message(self) -> Optional[Message]:
-        """Return the most recent message, or None if empty."""
+        """
+        Return the most recent message, or None if empty.
+
+        Needs the newest message to be loaded: any page loaded with
+        `limit` >= 1 ends with it; a header-only load has no messages.
+        """
         return self.messages[-1] if self.messages else None
 
     def close(self) -> None:
         """Mark conversation as closed (no new messages allowed)."""
-        self.closed = True
+        if not self.closed:
+            self.closed = True
+            self._events.append(ConversationClosed())
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+    def new_messages(self) -> List[Message]:
+        """Messages added since the conversation was loaded or last saved."""
+        return self.messages[self._persisted_count:]
+
+    def header_changed(self) -> bool:
+        """True when title/closed differ from the stored values (or were never stored)."""
+        return self._persisted_header != (self.title, self.closed)
+
+    def pending_events(self) -> list:
+        """Domain events recorded since the conversation was loaded or last saved."""
+        return list(self._events)
+
+    def mark_persisted(self) -> None:
+        """Record the current state (and its events) as stored. Called by the Repository."""
+        self._persisted_count = len(self.messages)
+        self._persisted_header = (self.title, self.closed)
+        self._events.clear()
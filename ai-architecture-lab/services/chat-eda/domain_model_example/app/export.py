@@ -0,0 +1,224 @@
+"""
+Analytics Export (Beginner Explanation)
+=======================================
+
+Analysts want ALL the chat data in one file they can load into a
+dataframe or a warehouse. Paging through `GET /conversations/{id}` one
+conversation at a time builds a Pydantic model per message and a JSON
+document per page — work that only gets thrown away again.
+
+This export streams the tables instead:
+
+    repository (chunks of plain rows, keyset order) ─► writer ─► file / HTTP response
+
+- Rows are read ``EXPORT_CHUNK`` at a time (`repo.message_rows`,
+  `repo.conversation_rows`) and written straight to the output — no
+  domain objects, no Pydantic models, and memory bounded by one chunk.
+- `conversations` carries per-conversation aggregates: message count,
+  word count, first and last message time. They come from the totals
+  stored on every save and from the messages index, so producing them
+  never reads the messages themselves.
+- Formats: Parquet or Arrow (an Arrow IPC stream) when `pyarrow` is
+  installed — columnar, typed, compressed — and CSV always. ``auto`` picks
+  Parquet if it can, else CSV. Timestamps are UTC; in CSV they are
+  integer microseconds since the epoch.
+
+Run it as a command (progress goes to stderr):
+
+    DB_PATH=./conversations.db python -m app.export ./out --format auto
+
+or download one table with `GET /export/{table}` (see api.py).
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from typing import Callable, Iterator, List, Optional
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional: CSV works without it
+    pyarrow = None
+
+from .repository import ConversationRepository
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "50000"))
+EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "auto")
+
+TABLES = {
+    "messages": ("id", "conversation_id", "sender", "text", "created_at"),
+    "conversations": ("id", "title", "closed", "message_count", "word_count", "first_message_at", "last_message_at"),
+}
+FORMATS = ("auto", "parquet", "arrow", "csv")
+# file extension and HTTP media type per format
+EXTENSIONS = {"parquet": "parquet", "arrow": "arrows", "csv": "csv"}
+MEDIA_TYPES = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.stream", "csv": "text/csv"}
+
+
+def resolve_format(fmt: str) -> str:
+    """`auto` → parquet or csv; raise ValueError for what cannot be written here."""
+    if fmt == "auto":
+        return "parquet" if pyarrow is not None else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    if fmt != "csv" and pyarrow is None:
+        raise ValueError(f"the {fmt} format needs pyarrow (pip install pyarrow); use csv instead")
+    return fmt
+
+
+def iter_rows(repo: ConversationRepository, table: str, chunk_size: int = EXPORT_CHUNK) -> Iterator[List[tuple]]:
+    """All rows of `table` in id order, one chunk (list of tuples) at a time."""
+    read = repo.message_rows if table == "messages" else repo.conversation_rows
+    after = 0
+    while True:
+        rows = read(after, chunk_size)
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1][0]
+
+
+class CsvWriter:
+    """Rows → CSV with a header line; one write to `sink` per chunk."""
+
+    def __init__(self, sink, table: str):
+        self.sink = sink
+        self._write([TABLES[table]])
+
+    def write(self, rows: List[tuple]) -> None:
+        self._write(rows)
+
+    def _write(self, rows) -> None:
+        text = io.StringIO()
+        csv.writer(text).writerows(rows)
+        self.sink.write(text.getvalue().encode())
+
+    def close(self) -> None:
+        pass
+
+
+class ArrowWriter:
+    """
+    Rows → Parquet (one row group per chunk) or an Arrow IPC stream.
+
+    Each chunk is turned into columns (`zip(*rows)`) and converted to
+    typed Arrow arrays column by column.
+    """
+
+    def __init__(self, sink, table: str, fmt: str):
+        self.schema = _arrow_schema(table)
+        if fmt == "parquet":
+            self._writer = pyarrow.parquet.ParquetWriter(sink, self.schema, compression="zstd")
+            self._write = lambda batch: self._writer.write_table(pyarrow.Table.from_batches([batch]))
+        else:
+            self._writer = pyarrow.ipc.new_stream(sink, self.schema)
+            self._write = self._writer.write_batch
+
+    def write(self, rows: List[tuple]) -> None:
+        columns = [
+            pyarrow.array(list(values), type=field.type)
+            for values, field in zip(zip(*rows), self.schema)
+        ]
+        self._write(pyarrow.RecordBatch.from_arrays(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+def _arrow_schema(table: str):
+    micros = pyarrow.timestamp("us", tz="UTC")
+    if table == "messages":
+        types = [pyarrow.int64(), pyarrow.int64(), pyarrow.string(), pyarrow.string(), micros]
+    else:
+        # closed is stored as 0/1: exported as an integer flag
+        types = [pyarrow.int64(), pyarrow.string(), pyarrow.int8(), pyarrow.int64(), pyarrow.int64(), micros, micros]
+    return pyarrow.schema(list(zip(TABLES[table], types)))
+
+
+def open_writer(sink, table: str, fmt: str):
+    """A writer for `table` in the (resolved) format `fmt`, writing to binary `sink`."""
+    return CsvWriter(sink, table) if fmt == "csv" else ArrowWriter(sink, table, fmt)
+
+
+def export_table(
+    repo: ConversationRepository,
+    table: str,
+    sink,
+    fmt: str = EXPORT_FORMAT,
+    chunk_size: int = EXPORT_CHUNK,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Write all of `table` to `sink`; return the number of rows. `progress` gets the running count."""
+    writer = open_writer(sink, table, resolve_format(fmt))
+    count = 0
+    for rows in iter_rows(repo, table, chunk_size):
+        writer.write(rows)
+        count += len(rows)
+        if progress:
+            progress(count)
+    writer.close()
+    return count
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    A write-only file that just collects what is written, so a writer can
+    be drained chunk by chunk into an HTTP response (`take()`).
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export messages and conversations to columnar files")
+    parser.add_argument("out_dir", help="directory for messages.* and conversations.*")
+    parser.add_argument("--format", choices=FORMATS, default=EXPORT_FORMAT)
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK)
+    args = parser.parse_args()
+    try:
+        fmt = resolve_format(args.format)
+    except ValueError as e:
+        parser.error(str(e))
+    db_path = os.getenv("DB_PATH", "./conversations.db")
+    repo = ConversationRepository(db_path)
+    os.makedirs(args.out_dir, exist_ok=True)
+    for table in TABLES:
+        path = os.path.join(args.out_dir, f"{table}.{EXTENSIONS[fmt]}")
+        start = time.perf_counter()
+
+        def report(count: int) -> None:
+            elapsed = time.perf_counter() - start
+            print(f"  {table}: {count:>12,} rows  {count / elapsed:>10,.0f} rows/s", end="\r", file=sys.stderr, flush=True)
+
+        with open(path, "wb") as f:
+            count = export_table(repo, table, f, fmt, args.chunk_size, report)
+        elapsed = time.perf_counter() - start
+        print(file=sys.stderr)
+        print(f"{path}: {count} rows in {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
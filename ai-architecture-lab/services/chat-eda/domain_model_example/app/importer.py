@@ -0,0 +1,266 @@
+"""
+Bulk Import (Beginner Explanation)
+==================================
+
+Moving a chat history from another system through the API costs one
+`POST /conversations/{id}/messages` per message: each loads a page,
+adds ONE message and commits ONE transaction. For millions of messages
+that is millions of commits.
+
+The bulk importer reads NDJSON instead — one JSON object per line:
+
+    {"type": "conversation", "title": "Support #1"}
+    {"type": "message", "sender": "alice", "text": "hi", "created_at": "2021-03-04T10:00:00"}
+    {"type": "message", "sender": "bob", "text": "hello"}
+    {"type": "close"}
+    {"type": "conversation", "id": 42}
+    {"type": "message", "sender": "alice", "text": "added to conversation 42"}
+
+- A `conversation` line starts a new conversation (`title`) or picks up
+  an existing one (`id`); the `message` and `close` lines after it
+  belong to it. `created_at` is an ISO timestamp (UTC unless it has an
+  offset) or epoch microseconds; it defaults to now.
+- Every line goes through the Domain Model (`add_message`, `close`), so
+  the rules still hold: a message for a closed conversation is rejected.
+  Rejected lines are counted and reported with their line number, and
+  the import goes on.
+- Writes are batched: every ``IMPORT_BATCH_SIZE`` rows, the pending
+  conversations and messages are stored with `repo.save_many` — one
+  transaction, one `executemany`.
+- Memory stays bounded whatever the file size: the importer holds one
+  chunk of input, one batch and the current conversation, never the
+  whole file. Lines longer than ``IMPORT_MAX_LINE_BYTES`` are rejected.
+
+A conversation picked up by `id` is saved with the usual version check:
+if a request changes it while the import runs, the import stops with
+`ConcurrentUpdate` (the batches stored before are kept).
+
+Imported history is not written to the outbox: old messages are no news
+for the event consumers or the live streams.
+
+Run it as a command (progress goes to stderr, `-` reads stdin):
+
+    DB_PATH=./conversations.db python -m app.importer history.ndjson
+
+or POST the file to `/import` (see api.py).
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .domain import Conversation, datetime_to_micros
+from .repository import ConversationRepository
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", str(1 << 20)))
+# rejected lines listed in the report (all of them are counted)
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass(slots=True)
+class ImportStats:
+    """Progress (and in the end, the result) of one import."""
+    lines: int = 0
+    conversations: int = 0      # new conversations created
+    messages: int = 0
+    rejected: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)   # (line number, reason)
+    seconds: float = 0.0
+
+    def rows_per_second(self) -> float:
+        return (self.conversations + self.messages) / self.seconds if self.seconds else 0.0
+
+
+class BulkImporter:
+    """
+    Feed it NDJSON bytes in chunks of any size, then call `finish()`.
+
+        importer = BulkImporter(repo)
+        for chunk in chunks:
+            importer.feed(chunk)
+        stats = importer.finish()
+
+    `progress` is called with the stats after every stored batch.
+    """
+
+    def __init__(
+        self,
+        repo: ConversationRepository,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        progress: Optional[Callable[[ImportStats], None]] = None,
+    ):
+        self.repo = repo
+        self.batch_size = batch_size
+        self.progress = progress
+        self.stats = ImportStats()
+        self._start = time.perf_counter()
+        # bytes of a line not complete yet; None = skipping a too long line
+        self._partial: Optional[bytes] = b""
+        self._current: Optional[Conversation] = None
+        # conversations with changes not stored yet, by id when they have one
+        self._batch: List[Conversation] = []
+        self._batch_ids: Dict[int, Conversation] = {}
+        self._pending = 0
+
+    def feed(self, data: bytes) -> None:
+        """Import the complete lines in `data`; keep a partial last line for the next call."""
+        *complete, rest = data.split(b"\n")
+        if complete:
+            if self._partial is None:
+                # the end of a line that was already too long
+                self.stats.lines += 1
+                self._reject(f"line longer than {IMPORT_MAX_LINE_BYTES} bytes")
+                complete = complete[1:]
+            else:
+                complete[0] = self._partial + complete[0]
+            self._partial = rest
+        elif self._partial is not None:
+            self._partial += rest
+        for line in complete:
+            self.stats.lines += 1
+            self._line(line)
+        if self._partial is not None and len(self._partial) > IMPORT_MAX_LINE_BYTES:
+            self._partial = None
+
+    def finish(self) -> ImportStats:
+        """Import the last line (when the input does not end with a newline) and store what is left."""
+        if self._partial is None or self._partial.strip():
+            self.feed(b"\n")
+        self.flush()
+        return self.stats
+
+    def flush(self) -> None:
+        """Store the pending batch in one transaction."""
+        if self._pending:
+            self.repo.save_many(self._batch, events=False)
+            for conv in self._batch:
+                # stored: keep the header, drop the messages
+                conv.messages.clear()
+                conv.mark_persisted()
+        self._batch = [self._current] if self._current is not None else []
+        self._batch_ids = {c.id: c for c in self._batch if c.id is not None}
+        self._pending = 0
+        self.stats.seconds = time.perf_counter() - self._start
+        if self.progress:
+            self.progress(self.stats)
+
+    # ------------------------------------------------------------------
+    def _line(self, line: bytes) -> None:
+        if not line.strip():
+            return
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            return self._reject(f"invalid JSON: {e}")
+        if not isinstance(obj, dict):
+            return self._reject("not a JSON object")
+        kind = obj.get("type")
+        try:
+            if kind == "conversation":
+                self._conversation(obj)
+            elif kind == "message":
+                self._message(obj)
+            elif kind == "close":
+                self._conversation_for_line().close()
+                self._pending += 1
+            else:
+                return self._reject(f"unknown type {kind!r}")
+        except ValueError as e:
+            # a bad field or a broken domain rule: skip this line only
+            return self._reject(str(e))
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def _conversation(self, obj: Dict) -> None:
+        self._current = None
+        if "id" in obj:
+            conv_id = obj["id"]
+            if not isinstance(conv_id, int) or isinstance(conv_id, bool):
+                raise ValueError("conversation id must be an integer")
+            conv = self._batch_ids.get(conv_id)
+            if conv is None:
+                conv = self.repo.get(conv_id, limit=0)
+                if conv is None:
+                    raise ValueError(f"conversation {conv_id} not found")
+                self._batch_ids[conv_id] = conv
+                self._batch.append(conv)
+        else:
+            title = obj.get("title")
+            if not isinstance(title, str):
+                raise ValueError("a new conversation needs a string title")
+            conv = Conversation(title=title)
+            self._batch.append(conv)
+            self.stats.conversations += 1
+            self._pending += 1
+        self._current = conv
+
+    def _message(self, obj: Dict) -> None:
+        sender, text = obj.get("sender"), obj.get("text")
+        if not isinstance(sender, str) or not isinstance(text, str):
+            raise ValueError("a message needs string sender and text")
+        self._conversation_for_line().add_message(sender, text, _to_micros(obj.get("created_at")))
+        self.stats.messages += 1
+        self._pending += 1
+
+    def _conversation_for_line(self) -> Conversation:
+        if self._current is None:
+            raise ValueError("no conversation line before this line")
+        return self._current
+
+    def _reject(self, reason: str) -> None:
+        self.stats.rejected += 1
+        if len(self.stats.errors) < MAX_REPORTED_ERRORS:
+            self.stats.errors.append((self.stats.lines, reason))
+
+
+def _to_micros(value) -> Optional[int]:
+    """`created_at` of an import line → epoch micros (None = now)."""
+    if value is None or (isinstance(value, int) and not isinstance(value, bool)):
+        return value
+    if not isinstance(value, str):
+        raise ValueError("created_at must be an ISO string or epoch microseconds")
+    return datetime_to_micros(datetime.datetime.fromisoformat(value))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import conversations and messages from an NDJSON file")
+    parser.add_argument("path", help="NDJSON file, or - for stdin")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="rows per transaction")
+    args = parser.parse_args()
+    db_path = os.getenv("DB_PATH", "./conversations.db")
+    last_report = 0.0
+
+    def report(stats: ImportStats) -> None:
+        nonlocal last_report
+        if stats.seconds - last_report >= 1:
+            last_report = stats.seconds
+            print(
+                f"  {stats.lines:>12,} lines  {stats.messages:>12,} messages  {stats.rows_per_second():>10,.0f} rows/s",
+                end="\r", file=sys.stderr, flush=True,
+            )
+
+    importer = BulkImporter(ConversationRepository(db_path), batch_size=args.batch_size, progress=report)
+    source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    with source:
+        for chunk in iter(lambda: source.read(1 << 20), b""):
+            importer.feed(chunk)
+    stats = importer.finish()
+    print(file=sys.stderr)
+    for line, reason in stats.errors:
+        print(f"line {line}: {reason}")
+    print(
+        f"imported {stats.conversations} new conversations and {stats.messages} messages from {stats.lines} lines "
+        f"in {stats.seconds:.2f}s ({stats.rows_per_second():,.0f} rows/s), rejected {stats.rejected} ({db_path})"
+    )
+    if stats.rejected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Schema Migrations (Beginner Explanation)
+========================================
+
+A real database outlives the code that created it. When the schema has
+to change (a new index, a new column), the running databases must be
+upgraded in place — that is what *migrations* are for.
+
+How it works here
+-----------------
+- Every schema change is a small function registered with
+  `@migration(<version>)`. Versions are whole numbers, applied in order.
+- SQLite keeps a free integer in the file header, `PRAGMA user_version`.
+  We store the number of the last applied migration there.
+- `migrate(conn)` runs every migration newer than `user_version`, each
+  in its own transaction together with the version bump. A crash halfway
+  leaves the database at the previous version, never in between.
+
+Rules for adding a migration
+----------------------------
+- Never edit a migration that has shipped; add a new one instead.
+- Make it safe on databases created before migrations existed (they
+  start at version 0 but may already have the tables), e.g. with
+  `IF NOT EXISTS`.
+
+The Repository calls `migrate()` when it is created, so the schema is
+always up to date on startup.
+"""
+
+import datetime
+import sqlite3
+from typing import Callable, Dict
+
+# version -> function that applies it
+MIGRATIONS: Dict[int, Callable[[sqlite3.Connection], None]] = {}
+
+
+def migration(version: int):
+    """Register `fn` as the migration to schema `version`."""
+    def register(fn):
+        if version in MIGRATIONS:
+            raise ValueError(f"duplicate migration version {version}")
+        MIGRATIONS[version] = fn
+        return fn
+
+    return register
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def latest_version() -> int:
+    return max(MIGRATIONS, default=0)
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    Bring the database up to the latest version; return that version.
+
+    Also switches the file to WAL journaling (readers no longer block the
+    writer and vice versa). WAL is stored in the file, so this only has
+    an effect the first time.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    version = current_version(conn)
+    for target in sorted(v for v in MIGRATIONS if v > version):
+        # manual transaction control: DDL + version bump commit together
+        previous, conn.isolation_level = conn.isolation_level, None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # re-check: another process may have migrated meanwhile
+            if current_version(conn) < target:
+                MIGRATIONS[target](conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.isolation_level = previous
+        version = target
+    return version
+
+
+# ======================================================================
+# MIGRATIONS — append new ones at the bottom
+# ======================================================================
+@migration(1)
+def create_tables(conn: sqlite3.Connection) -> None:
+    """The original schema: conversations + messages."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            closed INTEGER
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER,
+            sender TEXT,
+            text TEXT,
+            created_at TEXT,
+            FOREIGN KEY(conversation_id) REFERENCES conversations(id)
+        )
+        """
+    )
+
+
+@migration(2)
+def index_messages_by_conversation(conn: sqlite3.Connection) -> None:
+    """
+    Messages are always read per conversation in id order.
+
+    Without this index, loading one conversation scans the whole messages
+    table. `id` is the rowid, so the index also answers id-only queries
+    (counts, existence, keyset bounds) without touching the table.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, id)")
+
+
+def _iso_to_micros(value):
+    """'2024-01-01T12:00:00.123456' (naive UTC, as stored before) → epoch micros."""
+    if value is None or isinstance(value, int):
+        return value
+    dt = datetime.datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=datetime.timezone.utc)
+    delta = dt - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+@migration(3)
+def store_created_at_as_epoch_micros(conn: sqlite3.Connection) -> None:
+    """
+    messages.created_at: ISO text → INTEGER microseconds since the epoch.
+
+    An integer is 8 bytes instead of a 26-character string, sorts and
+    compares natively, and loads straight into `Message.created_at`.
+    SQLite cannot change a column's type, so the table is rebuilt: create
+    the new shape, copy the rows across (converting on the way), drop the
+    old table, rename, and recreate its index. Timestamps that cannot be
+    parsed make the migration fail and roll back, leaving the data as is.
+    """
+    conn.create_function("iso_to_micros", 1, _iso_to_micros, deterministic=True)
+    conn.execute(
+        """
+        CREATE TABLE messages_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER,
+            sender TEXT,
+            text TEXT,
+            created_at INTEGER,
+            FOREIGN KEY(conversation_id) REFERENCES conversations(id)
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO messages_new (id, conversation_id, sender, text, created_at)
+        SELECT id, conversation_id, sender, text, iso_to_micros(created_at) FROM messages
+        """
+    )
+    # keep the AUTOINCREMENT high-water mark, so ids are never reused
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='messages'").fetchone()
+    conn.execute("DROP TABLE messages")
+    conn.execute("ALTER TABLE messages_new RENAME TO messages")
+    if row:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name='messages'", (row[0],))
+    conn.execute("CREATE INDEX idx_messages_conversation ON messages (conversation_id, id)")
+
+
+@migration(4)
+def add_conversation_aggregates(conn: sqlite3.Connection) -> None:
+    """
+    conversations.message_count / word_count: totals kept up to date on
+    every save, so counts never need the messages table. Backfilled here
+    from the existing messages (words counted like `domain.word_count`).
+    """
+    conn.create_function("word_count", 1, lambda text: len(text.split()) if text else 0, deterministic=True)
+    conn.execute("ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE conversations ADD COLUMN word_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        """
+        UPDATE conversations SET
+            message_count = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id),
+            word_count = (SELECT COALESCE(SUM(word_count(text)), 0) FROM messages WHERE conversation_id = conversations.id)
+        """
+    )
+
+
+@migration(5)
+def create_outbox(conn: sqlite3.Connection) -> None:
+    """
+    Transactional outbox for domain events, plus consumer checkpoints.
+
+    `save()` appends a row per event in the same transaction as the change,
+    so an event exists if and only if its change was committed. Consumers
+    read the outbox in id order and store how far they got in
+    `consumer_checkpoints`.
+    """
+    conn.execute(
+        """
+        CREATE TABLE outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            conversation_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute("CREATE TABLE consumer_checkpoints (name TEXT PRIMARY KEY, position INTEGER NOT NULL)")
+
+
+@migration(6)
+def create_message_search_index(conn: sqlite3.Connection) -> None:
+    """
+    Full-text index over messages.text (SQLite FTS5).
+
+    `messages_fts` is an *external content* table: it stores only the
+    search index and reads the text from `messages` (rowid = message id),
+    so the text is not stored twice. `conversation_id` is indexed too, so
+    "search within one conversation" is answered inside the index. Triggers update the index in the
+    same transaction as every insert/update/delete on `messages`, so a
+    committed message is always searchable. Existing messages are indexed
+    once by 'rebuild'.
+
+    Note for later migrations: rebuilding the `messages` table drops these
+    triggers; recreate them afterwards.
+    """
+    conn.execute("CREATE VIRTUAL TABLE messages_fts USING fts5(text, conversation_id, content='messages', content_rowid='id')")
+    conn.execute(
+        """
+        CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts (rowid, text, conversation_id) VALUES (new.id, new.text, new.conversation_id);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, text, conversation_id)
+            VALUES ('delete', old.id, old.text, old.conversation_id);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER messages_fts_update AFTER UPDATE OF text, conversation_id ON messages BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, text, conversation_id)
+            VALUES ('delete', old.id, old.text, old.conversation_id);
+            INSERT INTO messages_fts (rowid, text, conversation_id) VALUES (new.id, new.text, new.conversation_id);
+        END
+        """
+    )
+    conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+
+
+@migration(7)
+def add_conversation_version(conn: sqlite3.Connection) -> None:
+    """
+    conversations.version: bumped by every save that changes a
+    conversation. A save only applies while the version is still the one
+    it loaded (optimistic concurrency, see `ConversationRepository.save`).
+    """
+    conn.execute("ALTER TABLE conversations ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(8)
+def add_conversation_archived_at(conn: sqlite3.Connection) -> None:
+    """
+    conversations.archived_at: when the conversation's messages were moved
+    to the archive file (epoch micros; NULL = they are in `messages`).
+    See archive.py. The partial index lists the closed conversations not
+    archived yet, so the archiver finds them without scanning the table.
+    """
+    conn.execute("ALTER TABLE conversations ADD COLUMN archived_at INTEGER")
+    conn.execute("CREATE INDEX idx_conversations_archivable ON conversations (id) WHERE closed = 1 AND archived_at IS NULL")
+
+
+@migration(9)
+def create_message_sender_index(conn: sqlite3.Connection) -> None:
+    """
+    (sender, created_at) index on messages: "messages from X since T" and
+    "conversations X took part in" read one range of this index instead
+    of every message. created_at is already a sortable integer (epoch
+    micros, migration 3), and the rowid that SQLite appends to every index
+    entry is the message id, so ties on created_at page by id.
+    """
+    conn.execute("CREATE INDEX idx_messages_sender_created ON messages (sender, created_at)")
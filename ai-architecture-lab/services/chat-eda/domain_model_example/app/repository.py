@@ -24,9 +24,47 @@ Think of it as a translator:
 This is the pattern used in MOST modern backend systems.
 """
 
+import json
+import os
 import sqlite3
-from typing import Optional, List
-from .domain import Conversation, Message
+import sys
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, List, Set, Tuple
+from . import archive
+from . import migrations
+from .domain import Conversation, ConversationClosed, Message, MessageAdded, now_micros, word_count
+
+
+class AggregateMismatch(NamedTuple):
+    """A conversation whose stored totals disagree with its message rows."""
+    conversation_id: int
+    stored: tuple   # (message_count, word_count) on the conversation row
+    actual: tuple   # the same, recomputed from the messages table
+
+
+class ConcurrentUpdate(Exception):
+    """Another writer saved the conversation between our load and our save."""
+
+
+class SearchHit(NamedTuple):
+    """One full-text search result."""
+    conversation_id: int
+    message: Message
+    snippet: str              # the matching part of the text, matches wrapped in <mark>…</mark>
+    score: Optional[float]    # bm25 relevance, lower = better match (None when ordered by newest)
+
+
+class SenderMessage(NamedTuple):
+    """One message of a sender, with the conversation it belongs to."""
+    conversation_id: int
+    message: Message
+
+
+class SenderConversation(NamedTuple):
+    """A conversation a sender wrote in, and how much."""
+    conversation_id: int
+    message_count: int        # the sender's messages in it (since the requested time)
+    last_message_at: int      # epoch micros of the sender's newest message in it
 
 
 class ConversationRepository:
@@ -40,43 +78,44 @@ class ConversationRepository:
     - Domain models stay clean and reusable
     """
 
-    def __init__(self, db_path: str = "./conversations.db"):
+    # ids per IN (...) list when loading many conversations at once,
+    # well below SQLite's bound-parameter limit
+    IN_CHUNK = 500
+
+    # ranked search scores at most this many of the newest matches
+    RANK_WINDOW = 10_000
+
+    def __init__(self, db_path: str = "./conversations.db", archive_path: Optional[str] = None):
         self.db_path = db_path
         self._ensure_tables()
+        # messages of old closed conversations live in a second, compressed
+        # SQLite file (see archive.py); reads go there transparently
+        self.archive = archive.ArchiveStore(archive_path or os.getenv("ARCHIVE_DB_PATH") or archive.default_path(db_path))
 
     def _conn(self):
-        """Create a new SQLite connection. SQLite stores everything in one file."""
-        return sqlite3.connect(self.db_path)
+        """
+        Create a new SQLite connection. SQLite stores everything in one file.
+
+        Per-connection settings: enforce FOREIGN KEYs (off by default in
+        SQLite!) and wait up to 5s for a lock instead of failing at once.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
 
     def _ensure_tables(self):
         """
-        Create tables if they don't exist yet.
+        Create or upgrade the schema by applying pending migrations.
 
-        This is intentionally simple — real systems might use migrations.
+        See `migrations.py`: each schema change is a numbered migration,
+        and the database remembers which ones it already has.
         """
-        with self._conn() as conn:
-            cur = conn.cursor()
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS conversations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT,
-                    closed INTEGER
-                )
-                """
-            )
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    conversation_id INTEGER,
-                    sender TEXT,
-                    text TEXT,
-                    created_at TEXT,
-                    FOREIGN KEY(conversation_id) REFERENCES conversations(id)
-                )
-                """
-            )
+        conn = self._conn()
+        try:
+            migrations.migrate(conn)
+        finally:
+            conn.close()
 
     # ======================================================================
     # SAVE OPERATION (Insert or Update a Conversation)
@@ -88,105 +127,785 @@ class ConversationRepository:
         Beginner notes:
         ---------------
         - If conv.id is None → it's new, so INSERT it.
-        - Otherwise UPDATE existing row.
-        - Messages are deleted & re-inserted (simple but not optimal)
+        - Otherwise UPDATE the row, but only if title/closed changed.
+        - Messages are append-only: only the messages added since the
+          conversation was loaded (`conv.new_messages()`) are inserted,
+          all in one `executemany`. Adding one message to a chat with
+          10,000 messages writes ONE row, not 10,000.
+        - The stored totals (message_count, word_count) are *incremented*
+          by the new messages in the same transaction, so they always
+          match the rows — even if two requests append at the same time.
+        - The conversation's pending domain events are appended to the
+          `outbox` table in that same transaction too (transactional
+          outbox): committed change ⇔ stored event, never one without
+          the other.
+        - Optimistic concurrency: saving a change bumps the conversation's
+          `version`, but only if it still is the version `conv` was loaded
+          at (`... WHERE id=? AND version=?`). If another request saved
+          the conversation in between, nothing is written and
+          `ConcurrentUpdate` is raised: load it again and retry (the
+          domain rules then see the latest state, e.g. that it was
+          closed meanwhile). No lock is held between load and save.
         """
-        with self._conn() as conn:
-            cur = conn.cursor()
+        self.save_many([conv])
+        return conv
 
-            if conv.id is None:
-                # Insert new conversation
-                cur.execute(
-                    "INSERT INTO conversations (title, closed) VALUES (?, ?)",
-                    (conv.title, int(conv.closed)),
-                )
-                conv.id = cur.lastrowid
+    def save_many(self, convs: List[Conversation], events: bool = True) -> None:
+        """
+        Save many Conversations in ONE transaction: what `save()` does,
+        but with one `executemany` for the new messages of all of them.
 
-            else:
-                # Update existing conversation
-                cur.execute(
-                    "UPDATE conversations SET title=?, closed=? WHERE id=?",
-                    (conv.title, int(conv.closed), conv.id),
-                )
-                # Simplest approach: wipe messages & re-add
-                cur.execute("DELETE FROM messages WHERE conversation_id=?", (conv.id,))
+        Used by the bulk importer (importer.py) to write thousands of
+        messages per commit. `events=False` skips the outbox — for history
+        imported from another system, which is no news to any consumer.
+        """
+        bumped = []
+        with self._conn() as conn:
+            cur = conn.cursor()
 
-            # Insert messages
-            for m in conv.messages:
-                cur.execute(
+            for conv in convs:
+                if conv.id is None:
+                    # Insert new conversation
+                    cur.execute(
+                        "INSERT INTO conversations (title, closed) VALUES (?, ?)",
+                        (conv.title, int(conv.closed)),
+                    )
+                    conv.id = cur.lastrowid
+
+                elif conv.header_changed() or conv.new_messages():
+                    # Update existing conversation — if nobody saved it since we loaded it
+                    cur.execute(
+                        "UPDATE conversations SET title=?, closed=?, version = version + 1 WHERE id=? AND version=?",
+                        (conv.title, int(conv.closed), conv.id, conv.version),
+                    )
+                    if cur.rowcount != 1:
+                        # leaving the `with` block rolls the whole save back
+                        raise ConcurrentUpdate(f"conversation {conv.id} changed concurrently")
+                    bumped.append(conv)
+
+            # Insert only the new messages
+            new = [(conv, m) for conv in convs for m in conv.new_messages()]
+            if new:
+                cur.executemany(
                     """
                     INSERT INTO messages (conversation_id, sender, text, created_at)
                     VALUES (?, ?, ?, ?)
                     """,
-                    (conv.id, m.sender, m.text, m.created_at),
+                    [(conv.id, m.sender, m.text, m.created_at) for conv, m in new],
+                )
+                # executemany runs the INSERT once per row, all inside this
+                # transaction, which holds the write lock: AUTOINCREMENT hands
+                # out consecutive ids, the last one is last_insert_rowid()
+                # (the FTS trigger's own inserts do not change it).
+                first_id = cur.execute("SELECT last_insert_rowid()").fetchone()[0] - len(new) + 1
+                for offset, (_, m) in enumerate(new):
+                    m.id = first_id + offset
+                cur.executemany(
+                    "UPDATE conversations SET message_count = message_count + ?, word_count = word_count + ? WHERE id=?",
+                    [
+                        (len(msgs), sum(word_count(m.text) for m in msgs), conv.id)
+                        for conv in convs
+                        if (msgs := conv.new_messages())
+                    ],
                 )
 
-        return conv
+            # Append the domain events (message ids are known by now)
+            if events:
+                created_at = now_micros()
+                cur.executemany(
+                    "INSERT INTO outbox (type, conversation_id, payload, created_at) VALUES (?, ?, ?, ?)",
+                    [
+                        (type(e).__name__, conv.id, json.dumps(_event_payload(conv, e)), created_at)
+                        for conv in convs
+                        for e in conv.pending_events()
+                    ],
+                )
+
+        # the `with` block committed: everything is stored now
+        for conv in bumped:
+            conv.version += 1
+        for conv in convs:
+            conv.mark_persisted()
 
     # ======================================================================
     # LOAD ONE CONVERSATION
     # ======================================================================
-    def get(self, conv_id: int) -> Optional[Conversation]:
+    def get(self, conv_id: int, limit: Optional[int] = None, before: Optional[int] = None) -> Optional[Conversation]:
         """
-        Load a Conversation and all its messages.
+        Load a Conversation and its messages (all of them, or one page).
+
+        - `get(id)`                → every message (fine for short chats)
+        - `get(id, limit=50)`      → only the 50 most recent messages
+        - `get(id, limit=50, before=m)` → the 50 messages just older than
+          message id `m` (the next page when scrolling back)
+        - `get(id, limit=0)`       → header only, no message rows
 
         Beginner notes:
         ---------------
         - Repo loads raw SQL rows
         - Converts them into domain objects
-        - Returns a fully-populated Conversation
+        - Pages use a keyset (`id < before ORDER BY id DESC LIMIT n`) on
+          the (conversation_id, id) index, so the latest page of a
+          100,000-message chat costs the same as of a 10-message one.
+        - `conv.has_older_messages` tells whether another page exists.
+        - The totals (`message_count()`, `total_word_count()`) come from
+          the conversation row, so `get(id, limit=1)` answers "how many
+          messages, how many words, which was last" without reading more
+          than one message.
+        - An archived conversation (see `archive_conversation`) has no
+          rows in `messages`: its page is read from the archive file
+          instead, with the same `limit`/`before` semantics.
         """
         conn = self._conn()
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
+        # one snapshot for the header and the messages: the archiver may
+        # move the messages away in between
+        cur.execute("BEGIN")
 
         # First load the conversation row
-        cur.execute("SELECT * FROM conversations WHERE id=?", (conv_id,))
+        cur.execute(f"SELECT {_CONVERSATION_COLUMNS} FROM conversations WHERE id=?", (conv_id,))
         row = cur.fetchone()
 
         if not row:
             conn.close()
             return None
 
-        conv = Conversation(
-            id=row["id"],
-            title=row["title"],
-            closed=bool(row["closed"]),
-        )
-
-        # Now load all associated messages
-        cur.execute(
-            """
-            SELECT sender, text, created_at
-            FROM messages
-            WHERE conversation_id=?
-            ORDER BY id
-            """,
-            (conv.id,),
-        )
-
-        for r in cur.fetchall():
-            conv.messages.append(
-                Message(sender=r["sender"], text=r["text"], created_at=r["created_at"])
-            )
+        conv = _row_to_conversation(row)
+        if row["archived_at"] is not None:
+            conn.close()
+            self._load_archived(conv, limit, before)
+            conv.mark_persisted()
+            return conv
+
+        sql = "SELECT id, sender, text, created_at FROM messages WHERE conversation_id=?"
+        params: list = [conv.id]
+        if before is not None:
+            sql += " AND id < ?"
+            params.append(before)
+
+        if limit is None:
+            # Load all associated messages, straight from the cursor (no
+            # list of all the rows next to the list of all the messages)
+            rows = cur.execute(sql + " ORDER BY id", params)
+        else:
+            # Newest first, one extra row to learn whether older ones exist
+            rows = cur.execute(sql + " ORDER BY id DESC LIMIT ?", params + [limit + 1]).fetchall()
+            conv.has_older_messages = len(rows) > limit
+            rows = rows[:limit][::-1]
+
+        conv.messages.extend(map(_row_to_message, rows))
 
         conn.close()
+        conv.mark_persisted()
         return conv
 
+    def iter_messages(self, conv_id: int, after_id: int = 0, page_size: int = 500) -> Iterator[Message]:
+        """
+        Stream a conversation's messages oldest → newest, one page at a time.
+
+        Only `page_size` rows are in memory at once, and no connection is
+        held open between pages — handy for exports of very long chats.
+        """
+        if self._is_archived(conv_id):
+            yield from map(_archived_to_message, self.archive.iter_rows(conv_id, after_id))
+            return
+        while True:
+            conn = self._conn()
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                """
+                SELECT id, sender, text, created_at FROM messages
+                WHERE conversation_id=? AND id > ?
+                ORDER BY id LIMIT ?
+                """,
+                (conv_id, after_id, page_size),
+            ).fetchall()
+            conn.close()
+            for r in rows:
+                yield _row_to_message(r)
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1]["id"]
+
     # ======================================================================
     # LIST ALL CONVERSATIONS
     # ======================================================================
     def list_all(self) -> List[Conversation]:
         """
-        Return a list of ALL conversations by ID.
+        Return a list of ALL conversations by ID, with all their messages.
 
-        We then hydrate each Conversation using get().
+        Loaded in batches on ONE connection: one query for the
+        conversation rows, then one query per `IN_CHUNK` conversations for
+        their messages (not one `get()` — two queries and a connection —
+        per conversation).
         """
         conn = self._conn()
-        cur = conn.cursor()
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN")   # one snapshot, see get()
+            rows = conn.execute(f"SELECT {_CONVERSATION_COLUMNS} FROM conversations ORDER BY id").fetchall()
+            convs = [_row_to_conversation(r) for r in rows]
+            self._load_messages(conn, convs, archived=_archived_ids(rows))
+        finally:
+            conn.close()
+        for conv in convs:
+            conv.mark_persisted()
+        return convs
+
+    def list_page(self, after_id: int = 0, limit: int = 100, messages: Optional[int] = 0) -> List[Conversation]:
+        """
+        One page of conversations with id > `after_id` (keyset pagination).
+
+        `messages` chooses how many of each conversation's newest messages
+        to load: 0 = header only, n = latest n, None = all of them.
+        """
+        conn = self._conn()
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN")   # one snapshot, see get()
+            rows = conn.execute(
+                f"SELECT {_CONVERSATION_COLUMNS} FROM conversations WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+            convs = [_row_to_conversation(r) for r in rows]
+            if messages != 0:
+                self._load_messages(conn, convs, per_conversation=messages, archived=_archived_ids(rows))
+        finally:
+            conn.close()
+        for conv in convs:
+            conv.mark_persisted()
+        return convs
+
+    def _load_messages(
+        self,
+        conn,
+        convs: List[Conversation],
+        per_conversation: Optional[int] = None,
+        archived: Set[int] = frozenset(),
+    ) -> None:
+        """
+        Fill `messages` of many conversations with set-based queries.
+
+        Rows come back ordered by (conversation_id, id) — the order of the
+        messages index — so they are grouped in a single pass. With
+        `per_conversation`, a window function keeps only each
+        conversation's newest n (+1 to detect older ones) inside SQLite.
+        The `archived` conversations are read from the archive instead.
+        """
+        by_id = {c.id: c for c in convs if c.id not in archived}
+        for conv in convs:
+            if conv.id in archived:
+                self._load_archived(conv, per_conversation)
+        ids = list(by_id)
+        for i in range(0, len(ids), self.IN_CHUNK):
+            chunk = ids[i:i + self.IN_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            if per_conversation is None:
+                rows = conn.execute(
+                    f"""
+                    SELECT id, conversation_id, sender, text, created_at FROM messages
+                    WHERE conversation_id IN ({marks})
+                    ORDER BY conversation_id, id
+                    """,
+                    chunk,
+                )
+            else:
+                rows = conn.execute(
+                    f"""
+                    SELECT id, conversation_id, sender, text, created_at FROM (
+                        SELECT *, ROW_NUMBER() OVER (PARTITION BY conversation_id ORDER BY id DESC) AS rn
+                        FROM messages WHERE conversation_id IN ({marks})
+                    )
+                    WHERE rn <= ?
+                    ORDER BY conversation_id, id
+                    """,
+                    chunk + [per_conversation + 1],
+                )
+            for r in rows:
+                by_id[r["conversation_id"]].messages.append(_row_to_message(r))
+        if per_conversation is not None:
+            for conv in by_id.values():
+                if len(conv.messages) > per_conversation:
+                    conv.has_older_messages = True
+                    del conv.messages[0]
+
+    # ======================================================================
+    # ARCHIVE (see archive.py and archiver.py)
+    # ======================================================================
+    def archive_candidates(self, older_than: int, after_id: int = 0, limit: int = 100) -> List[int]:
+        """
+        Ids (> `after_id`, ascending) of up to `limit` closed, not yet
+        archived conversations whose last message is older than
+        `older_than` (epoch micros). Conversations without messages have
+        nothing to move and are skipped.
+        """
+        conn = self._conn()
+        try:
+            rows = conn.execute(
+                """
+                SELECT c.id FROM conversations c
+                WHERE c.id > ? AND c.closed = 1 AND c.archived_at IS NULL AND c.message_count > 0
+                  AND (SELECT created_at FROM messages WHERE conversation_id = c.id ORDER BY id DESC LIMIT 1) < ?
+                ORDER BY c.id LIMIT ?
+                """,
+                (after_id, older_than, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [r[0] for r in rows]
+
+    def archive_conversation(self, conv_id: int) -> int:
+        """
+        Move a closed conversation's messages to the archive file; return
+        how many were moved (0 when it is not closed or already archived).
+
+        1. The messages are copied into the archive, blob by blob, straight
+           from the cursor (memory: one blob), and committed there.
+        2. One transaction in the main database marks the conversation
+           `archived_at` and deletes its message rows (the search index
+           triggers drop them from `messages_fts` too).
+
+        A crash between 1 and 2 leaves the messages in both files; the
+        conversation still reads from `messages`, and the next run copies
+        it again. The conversation row, its totals and version stay.
+        """
+        conn = self._conn()
+        try:
+            header = conn.execute("SELECT closed, archived_at FROM conversations WHERE id=?", (conv_id,)).fetchone()
+            if not header or not header[0] or header[1] is not None:
+                return 0
+            rows = conn.execute(
+                "SELECT id, sender, text, created_at FROM messages WHERE conversation_id=? ORDER BY id", (conv_id,)
+            )
+            count, last_id = self.archive.put(conv_id, rows)
+        finally:
+            conn.close()
+        with self._conn() as conn:
+            marked = conn.execute(
+                "UPDATE conversations SET archived_at=? WHERE id=? AND closed=1 AND archived_at IS NULL",
+                (now_micros(), conv_id),
+            ).rowcount
+            if not marked:
+                return 0
+            if last_id is not None:
+                # closed conversations get no new messages: these are all of them
+                conn.execute("DELETE FROM messages WHERE conversation_id=? AND id <= ?", (conv_id, last_id))
+        return count
+
+    def storage_stats(self) -> Dict:
+        """
+        Sizes for the archive metrics: bytes of the main database in use
+        (pages minus free pages — deleted rows free pages, the file only
+        shrinks with VACUUM), the file sizes, and what is archived.
+        """
+        conn = self._conn()
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conversations, messages = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(message_count), 0) FROM conversations WHERE archived_at IS NOT NULL"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {
+            "hot_used_bytes": (pages - free) * page_size,
+            "hot_file_bytes": pages * page_size,
+            "archive_file_bytes": self.archive.size_bytes(),
+            "archived_conversations": conversations,
+            "archived_messages": messages,
+        }
+
+    def vacuum(self) -> None:
+        """Rewrite the main database file without its free pages (slow; locks the database)."""
+        conn = self._conn()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    def _is_archived(self, conv_id: int) -> bool:
+        conn = self._conn()
+        try:
+            row = conn.execute("SELECT archived_at FROM conversations WHERE id=?", (conv_id,)).fetchone()
+        finally:
+            conn.close()
+        return row is not None and row[0] is not None
+
+    def _load_archived(self, conv: Conversation, limit: Optional[int] = None, before: Optional[int] = None) -> None:
+        """Fill `conv.messages` (and `has_older_messages`) from the archive, timing the read."""
+        if limit == 0:
+            conv.has_older_messages = conv.total_messages > 0
+            return
+        start = time.perf_counter()
+        rows, conv.has_older_messages = self.archive.page(conv.id, limit, before)
+        conv.messages.extend(map(_archived_to_message, rows))
+        self.archive.reads.record(time.perf_counter() - start)
+
+    # ======================================================================
+    # RAW ROWS FOR EXPORTS (see export.py)
+    # ======================================================================
+    def message_rows(self, after_id: int = 0, limit: int = 50_000) -> List[tuple]:
+        """
+        The next `limit` messages with id > `after_id`, as plain tuples
+        (id, conversation_id, sender, text, created_at), in id order.
+
+        For bulk exports only: no Message objects are built, the rows go
+        straight into column files. Id order is the table's own order, so
+        each chunk is one sequential read.
+        """
+        conn = self._conn()
+        try:
+            return conn.execute(
+                "SELECT id, conversation_id, sender, text, created_at FROM messages WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def conversation_rows(self, after_id: int = 0, limit: int = 50_000) -> List[tuple]:
+        """
+        The next `limit` conversations with id > `after_id` as tuples
+        (id, title, closed, message_count, word_count, first_message_at,
+        last_message_at), in id order.
+
+        The counts are the stored totals, and the first/last timestamps
+        come from the oldest/newest message found through the
+        (conversation_id, id) index — so a conversation costs the same
+        whether it has 10 messages or 10 million.
+        """
+        conn = self._conn()
+        try:
+            return conn.execute(
+                """
+                SELECT c.id, c.title, c.closed, c.message_count, c.word_count,
+                       (SELECT created_at FROM messages WHERE conversation_id = c.id ORDER BY id LIMIT 1),
+                       (SELECT created_at FROM messages WHERE conversation_id = c.id ORDER BY id DESC LIMIT 1)
+                FROM conversations c WHERE c.id > ? ORDER BY c.id LIMIT ?
+                """,
+                (after_id, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    # ======================================================================
+    # FULL-TEXT SEARCH
+    # ======================================================================
+    def search(
+        self,
+        query: str,
+        conversation_id: Optional[int] = None,
+        limit: int = 20,
+        offset: int = 0,
+        order: str = "rank",
+    ) -> List[SearchHit]:
+        """
+        Messages matching every word of `query`.
+
+        Beginner notes:
+        ---------------
+        - `messages_fts` is a SQLite FTS5 index (see migration 6): it maps
+          each word to the messages containing it, so a search reads only
+          the matching messages — unlike `text LIKE '%word%'`, which has
+          to read every message in the table.
+        - `order="rank"` (default): best match first, by bm25 (rarer words
+          and shorter messages score better). Scoring costs time per
+          match, and a common word can match millions of messages, so
+          only the newest `RANK_WINDOW` matches are ranked (found with
+          one cheap newest-first pass over the index). Pages beyond the
+          window are empty.
+        - `order="newest"`: newest first, no scoring — the index is read
+          backwards and stops after one page.
+        - Matching ignores case and accents; `word*` matches a prefix.
+        - `conversation_id` restricts the search to one conversation; it
+          is a column of the index, so the filter is applied inside FTS5.
+        - Pages are `limit`/`offset` slices of that order.
+        """
+        terms = _fts_query(query)
+        if not terms:
+            return []
+        match = f"text : ({terms})"
+        if conversation_id is not None:
+            match = f'conversation_id : "{int(conversation_id)}" AND {match}'
+        if order == "rank":
+            # the rowid of the RANK_WINDOW-th newest match bounds the scoring
+            inner = """
+                SELECT rowid, snippet(messages_fts, 0, '<mark>', '</mark>', '…', 12) AS snippet,
+                       bm25(messages_fts, 1.0, 0.0) AS score
+                FROM messages_fts
+                WHERE messages_fts MATCH :match AND rowid >= COALESCE((
+                    SELECT rowid FROM messages_fts WHERE messages_fts MATCH :match
+                    ORDER BY rowid DESC LIMIT 1 OFFSET :window - 1
+                ), 0)
+                ORDER BY score LIMIT :limit OFFSET :offset
+            """
+            outer_order = "f.score"
+        elif order == "newest":
+            inner = """
+                SELECT rowid, snippet(messages_fts, 0, '<mark>', '</mark>', '…', 12) AS snippet, NULL AS score
+                FROM messages_fts WHERE messages_fts MATCH :match
+                ORDER BY rowid DESC LIMIT :limit OFFSET :offset
+            """
+            outer_order = "m.id DESC"
+        else:
+            raise ValueError(f"unknown search order {order!r}")
+        # rank + snippet inside FTS5 for one page, then fetch just those rows
+        sql = f"""
+            SELECT m.id, m.conversation_id, m.sender, m.text, m.created_at, f.snippet, f.score
+            FROM ({inner}) AS f
+            JOIN messages m ON m.id = f.rowid
+            ORDER BY {outer_order}
+        """
+        params = {"match": match, "window": self.RANK_WINDOW, "limit": limit, "offset": offset}
+        conn = self._conn()
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        return [SearchHit(r["conversation_id"], _row_to_message(r), r["snippet"], r["score"]) for r in rows]
+
+    # ======================================================================
+    # MESSAGES BY SENDER (index on (sender, created_at), see migration 9)
+    # ======================================================================
+    def messages_by_sender(
+        self, sender: str, since: Optional[int] = None, after_id: int = 0, limit: int = 100
+    ) -> List[SenderMessage]:
+        """
+        A sender's messages with created_at >= `since` (epoch micros; None =
+        all), across conversations, oldest first.
+
+        Beginner notes:
+        ---------------
+        - The rows are one range of the (sender, created_at) index, already
+          in the order we return them: a page reads `limit` index entries,
+          however big the table is.
+        - Keyset pagination: pass the id of the last message of a page as
+          `after_id` to get the next one. The query continues after that
+          message's (created_at, id) — no OFFSET, so page 1000 costs the
+          same as page 1.
+        - Messages of archived conversations are not in the hot table and
+          are not returned.
+
+        Raises ValueError when `after_id` is not a message of `sender`.
+        """
+        conn = self._conn()
+        conn.row_factory = sqlite3.Row
+        try:
+            after = (None, 0)
+            if after_id:
+                row = conn.execute("SELECT created_at FROM messages WHERE id=? AND sender=?", (after_id, sender)).fetchone()
+                if row is None:
+                    raise ValueError(f"message {after_id} is not a message of {sender!r}")
+                after = (row["created_at"], after_id)
+            sql = "SELECT id, conversation_id, sender, text, created_at FROM messages WHERE sender = ?"
+            params: list = [sender]
+            if since is not None:
+                sql += " AND created_at >= ?"
+                params.append(since)
+            if after_id:
+                sql += " AND (created_at, id) > (?, ?)"
+                params.extend(after)
+            rows = conn.execute(sql + " ORDER BY created_at, id LIMIT ?", (*params, limit)).fetchall()
+        finally:
+            conn.close()
+        return [SenderMessage(r["conversation_id"], _row_to_message(r)) for r in rows]
+
+    def sender_conversations(
+        self, sender: str, since: Optional[int] = None, after_id: int = 0, limit: int = 100
+    ) -> List[SenderConversation]:
+        """
+        The conversations `sender` wrote in (since `since`, epoch micros),
+        in id order, with how many messages they wrote in each and when the
+        last one was.
+
+        Reads only the sender's range of the (sender, created_at) index —
+        the cost grows with that sender's messages, not with the table.
+        Keyset pagination by conversation id (`after_id`).
+        """
+        conn = self._conn()
+        try:
+            rows = conn.execute(
+                """
+                SELECT conversation_id, COUNT(*), MAX(created_at) FROM messages
+                WHERE sender = ? AND created_at >= ? AND conversation_id > ?
+                GROUP BY conversation_id ORDER BY conversation_id LIMIT ?
+                """,
+                (sender, since if since is not None else -(1 << 63), after_id, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [SenderConversation(*r) for r in rows]
+
+    # ======================================================================
+    # CONSISTENCY CHECK FOR THE STORED TOTALS
+    # ======================================================================
+    def check_aggregates(self, fix: bool = False) -> List[AggregateMismatch]:
+        """
+        Recompute every conversation's totals from the raw message rows.
+
+        Returns the conversations whose stored totals differ; with
+        `fix=True` they are also corrected. Archived conversations are
+        skipped: their rows are in the archive file. This reads the whole messages
+        table — an operations tool (see `check_aggregates.py`), not
+        something a request should call.
+        """
+        conn = self._conn()
+        conn.create_function("word_count", 1, lambda text: word_count(text) if text else 0, deterministic=True)
+        try:
+            with conn:
+                if fix:
+                    # hold the write lock from reading to fixing, so no
+                    # save() can slip in between and be overwritten
+                    conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(
+                    """
+                    SELECT c.id, c.message_count, c.word_count,
+                           COUNT(m.id), COALESCE(SUM(word_count(m.text)), 0)
+                    FROM conversations c LEFT JOIN messages m ON m.conversation_id = c.id
+                    WHERE c.archived_at IS NULL
+                    GROUP BY c.id
+                    HAVING c.message_count != COUNT(m.id)
+                        OR c.word_count != COALESCE(SUM(word_count(m.text)), 0)
+                    ORDER BY c.id
+                    """
+                ).fetchall()
+                mismatches = [AggregateMismatch(r[0], (r[1], r[2]), (r[3], r[4])) for r in rows]
+                if fix:
+                    conn.executemany(
+                        "UPDATE conversations SET message_count=?, word_count=? WHERE id=?",
+                        [(m.actual[0], m.actual[1], m.conversation_id) for m in mismatches],
+                    )
+        finally:
+            conn.close()
+        return mismatches
+
+
+    # ======================================================================
+    # OUTBOX (read by the event consumers, see consumers.py)
+    # ======================================================================
+    def read_outbox(self, after_id: int, limit: int) -> List[Dict]:
+        """The next `limit` events with outbox id > `after_id`, oldest first."""
+        conn = self._conn()
+        try:
+            rows = conn.execute(
+                "SELECT id, payload FROM outbox WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(json.loads(payload), event_id=event_id) for event_id, payload in rows]
+
+    def outbox_head(self) -> int:
+        """Id of the newest event in the outbox (0 when empty)."""
+        conn = self._conn()
+        try:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM outbox").fetchone()[0]
+        finally:
+            conn.close()
+
+    def outbox_lag(self, after_id: int) -> Tuple[int, Optional[int]]:
+        """(events after `after_id`, created_at of the oldest of them or None)."""
+        conn = self._conn()
+        try:
+            count, oldest = conn.execute("SELECT COUNT(*), MIN(created_at) FROM outbox WHERE id > ?", (after_id,)).fetchone()
+        finally:
+            conn.close()
+        return count, oldest
+
+    def prune_outbox(self, up_to_id: int) -> int:
+        """Delete events up to and including `up_to_id`; return how many."""
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM outbox WHERE id <= ?", (up_to_id,)).rowcount
+
+    def get_checkpoint(self, name: str) -> int:
+        """Last outbox id consumer `name` has fully handled (0 = none)."""
+        conn = self._conn()
+        try:
+            row = conn.execute("SELECT position FROM consumer_checkpoints WHERE name=?", (name,)).fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else 0
+
+    def set_checkpoint(self, name: str, position: int) -> None:
+        """Store `position` as consumer `name`'s checkpoint (also to reset it)."""
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO consumer_checkpoints (name, position) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET position = excluded.position",
+                (name, position),
+            )
+
+    def advance_checkpoint(self, name: str, position: int) -> None:
+        """
+        Like `set_checkpoint`, but never moves it backwards: when two saves
+        of a running consumer finish out of order, the later position wins.
+        """
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO consumer_checkpoints (name, position) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET position = MAX(position, excluded.position)",
+                (name, position),
+            )
+
+
+def _event_payload(conv: Conversation, event) -> Dict:
+    """Domain event → JSON-ready dict stored in the outbox."""
+    if isinstance(event, MessageAdded):
+        m = event.message
+        return {
+            "type": "MessageAdded",
+            "conversation_id": conv.id,
+            "message_id": m.id,
+            "sender": m.sender,
+            "text": m.text,
+            "created_at": m.created_at,
+        }
+    if isinstance(event, ConversationClosed):
+        return {"type": "ConversationClosed", "conversation_id": conv.id, "closed_at": event.closed_at}
+    raise TypeError(f"unknown domain event {event!r}")
+
+
+def _fts_query(text: str) -> str:
+    """
+    Plain search words → FTS5 query: every word must match.
+
+    Each word is quoted, so characters that mean something in FTS5 syntax
+    (`"`, `-`, `:`, `AND`, ...) are searched for literally instead of
+    causing syntax errors; a trailing `*` is kept as a prefix search.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if word:
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+_CONVERSATION_COLUMNS = "id, title, closed, message_count, word_count, version, archived_at"
+
+
+def _row_to_conversation(r) -> Conversation:
+    return Conversation(
+        id=r["id"],
+        title=r["title"],
+        closed=bool(r["closed"]),
+        total_messages=r["message_count"],
+        total_words=r["word_count"],
+        version=r["version"],
+    )
+
+
+def _archived_ids(rows) -> Set[int]:
+    return {r["id"] for r in rows if r["archived_at"] is not None}
+
+
+def _archived_to_message(r: archive.Row) -> Message:
+    return Message(sender=sys.intern(r[1]), text=r[2], created_at=r[3], id=r[0])
 
-        cur.execute("SELECT id FROM conversations ORDER BY id")
-        ids = [r[0] for r in cur.fetchall()]
-        conn.close()
 
-        return [self.get(i) for i in ids]
+def _row_to_message(r) -> Message:
+    # A chat has few distinct senders but many messages: intern the name so
+    # all of a sender's messages share one string instead of one copy each.
+    return Message(sender=sys.intern(r["sender"]), text=r["text"], created_at=r["created_at"], id=r["id"])
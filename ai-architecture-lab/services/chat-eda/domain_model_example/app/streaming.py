@@ -0,0 +1,196 @@
+"""
+Live Message Streams (Beginner Explanation)
+===========================================
+
+Without a push channel, a chat client has to poll
+`GET /conversations/{id}` again and again — one database query per
+client per poll, mostly to learn that nothing happened.
+
+Here the server pushes instead (Server-Sent Events, see `api.py`):
+
+    save() ─► outbox ─► event pipeline ─► MessageHub.handle ─► subscriber queues ─► SSE clients
+
+- `MessageHub` is an in-process pub/sub hub: it keeps, per
+  conversation, the set of connected subscribers. One MessageAdded event
+  is copied into each subscriber's queue — no database query per
+  subscriber, however many are listening.
+- `stream_messages()` is what one connected client runs: it subscribes
+  FIRST, then reads the messages it missed (after its cursor) from the
+  Repository, then forwards live events. Anything seen twice in that
+  overlap is skipped by message id, so the client gets every message
+  exactly once and in order.
+
+Slow clients
+------------
+Each subscriber queue is bounded (``STREAM_QUEUE_SIZE``). If a client
+cannot keep up, the hub drops its subscription instead of buffering
+without limit or slowing everyone else down. The stream notices, re-
+subscribes and catches up from the database — so nothing is lost, the
+slow client just pays one query.
+
+Heartbeats
+----------
+Idle connections get a heartbeat every ``STREAM_HEARTBEAT_SECONDS`` so
+proxies do not close them. One hub task sends them to every idle
+subscriber; a timer per subscriber would cost more than the fan-out
+itself with thousands of clients.
+
+The hub is fed by the event pipeline (consumers.py), so live updates
+need it running (the default, ``EVENTS_MODE=async``).
+"""
+
+import asyncio
+import collections
+import itertools
+import os
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+# messages per query when catching up from the database
+STREAM_CATCH_UP_PAGE = 500
+
+HEARTBEAT = {"type": "Heartbeat"}
+
+
+class Subscription:
+    """One subscriber's bounded queue of events for one conversation."""
+
+    __slots__ = ("conversation_id", "queue", "overflowed")
+
+    def __init__(self, conversation_id: int, queue_size: int):
+        self.conversation_id = conversation_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+
+class MessageHub:
+    """In-process fan-out of conversation events to live subscribers."""
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE, heartbeat: float = STREAM_HEARTBEAT_SECONDS):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._subscribers: Dict[int, Set[Subscription]] = collections.defaultdict(set)
+        self._stats = {"published": 0, "delivered": 0, "overflows": 0}
+        self._ticker: Optional[asyncio.Task] = None
+
+    def subscribe(self, conversation_id: int) -> Subscription:
+        sub = Subscription(conversation_id, self.queue_size)
+        self._subscribers[conversation_id].add(sub)
+        self._ensure_ticker()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        subs = self._subscribers.get(sub.conversation_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.conversation_id]
+
+    async def handle(self, event: Dict) -> None:
+        """Event pipeline handler: copy the event to every subscriber of its conversation."""
+        subs = self._subscribers.get(event["conversation_id"])
+        self._stats["published"] += 1
+        if not subs:
+            return
+        for sub in list(subs):
+            try:
+                sub.queue.put_nowait(event)
+                self._stats["delivered"] += 1
+            except asyncio.QueueFull:
+                # too slow: cut it loose; its stream catches up from storage
+                sub.overflowed = True
+                self._stats["overflows"] += 1
+                self.unsubscribe(sub)
+
+    def _ensure_ticker(self) -> None:
+        # one heartbeat task per event loop, running while anyone listens
+        loop = asyncio.get_running_loop()
+        if self._ticker is None or self._ticker.done() or self._ticker.get_loop() is not loop:
+            self._ticker = loop.create_task(self._heartbeats(), name="stream-heartbeats")
+
+    async def _heartbeats(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.heartbeat)
+            for subs in list(self._subscribers.values()):
+                for sub in list(subs):
+                    if sub.queue.empty():
+                        sub.queue.put_nowait(HEARTBEAT)
+
+    def stats(self) -> Dict:
+        return dict(
+            self._stats,
+            subscribers=sum(len(s) for s in self._subscribers.values()),
+            conversations=len(self._subscribers),
+        )
+
+
+async def stream_messages(
+    hub: MessageHub,
+    repo,
+    conv,
+    after: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+    """
+    Yield what one client should receive for conversation `conv`:
+
+    - ("message", {"id", "sender", "text", "created_at"}) for each message
+      with id > `after` (default: only messages added from now on);
+    - ("closed", None) once the conversation is closed — then it ends;
+    - ("heartbeat", None) now and then while nothing happens, so proxies
+      and clients see the connection is alive.
+
+    `conv` is the conversation loaded with `repo.get(id, limit=1)`.
+    """
+    if after is None:
+        after = conv.messages[-1].id if conv.messages else 0
+    last = after
+    sub = hub.subscribe(conv.id)
+    try:
+        # re-read the header now that we are subscribed: a close committed
+        # between the caller's load and the subscribe reached no queue
+        conv = await asyncio.to_thread(repo.get, conv.id, 0)
+        while True:
+            # 1. whatever was stored after the cursor (subscribed already,
+            #    so nothing committed from now on can slip through)
+            async for message in _stored_messages(repo, conv.id, last):
+                last = message["id"]
+                yield "message", message
+            if conv.closed:
+                yield "closed", None
+                return
+            # 2. live events until the hub drops us for being too slow
+            while not sub.overflowed or not sub.queue.empty():
+                event = await sub.queue.get()
+                if event is HEARTBEAT:
+                    yield "heartbeat", None
+                elif event["type"] == "ConversationClosed":
+                    yield "closed", None
+                    return
+                elif event["type"] == "MessageAdded" and event["message_id"] > last:
+                    last = event["message_id"]
+                    yield "message", {
+                        "id": event["message_id"],
+                        "sender": event["sender"],
+                        "text": event["text"],
+                        "created_at": event["created_at"],
+                    }
+            # 3. overflowed: subscribe again and catch up from storage
+            #    (re-read the header too: a close may have been dropped)
+            sub = hub.subscribe(conv.id)
+            conv = await asyncio.to_thread(repo.get, conv.id, 0)
+    finally:
+        hub.unsubscribe(sub)
+
+
+async def _stored_messages(repo, conv_id: int, after: int) -> AsyncIterator[Dict]:
+    """Messages with id > `after` from the Repository, one query per page."""
+    while True:
+        page = await asyncio.to_thread(
+            lambda: list(itertools.islice(repo.iter_messages(conv_id, after, STREAM_CATCH_UP_PAGE), STREAM_CATCH_UP_PAGE))
+        )
+        for m in page:
+            yield {"id": m.id, "sender": m.sender, "text": m.text, "created_at": m.created_at}
+        if len(page) < STREAM_CATCH_UP_PAGE:
+            return
+        after = page[-1].id
@@ -0,0 +1,69 @@
+"""Benchmark: append 10k messages to one conversation, one save per message.
+
+Compares the incremental `ConversationRepository.save` (insert only the
+new messages) with the previous strategy (delete every message of the
+conversation and re-insert all of them), which is reproduced below as
+`legacy_save`. The legacy run is stopped after ``--legacy-max`` messages
+because its total cost grows quadratically.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_append_messages.py --messages 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+
+def legacy_save(repo: ConversationRepository, conv: Conversation) -> None:
+    # The old save(): update header, wipe the messages, insert them all.
+    with repo._conn() as conn:
+        cur = conn.cursor()
+        if conv.id is None:
+            cur.execute("INSERT INTO conversations (title, closed) VALUES (?, ?)", (conv.title, int(conv.closed)))
+            conv.id = cur.lastrowid
+        else:
+            cur.execute("UPDATE conversations SET title=?, closed=? WHERE id=?", (conv.title, int(conv.closed), conv.id))
+            cur.execute("DELETE FROM messages WHERE conversation_id=?", (conv.id,))
+        for m in conv.messages:
+            cur.execute(
+                "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)",
+                (conv.id, m.sender, m.text, m.created_at),
+            )
+
+
+def run(label: str, save, repo: ConversationRepository, n: int, report_every: int) -> None:
+    conv = Conversation(title=label)
+    save(repo, conv)
+    start = last = time.perf_counter()
+    for i in range(1, n + 1):
+        conv.add_message("user", f"message number {i}")
+        save(repo, conv)
+        if i % report_every == 0:
+            now = time.perf_counter()
+            print(f"{label:<12} {i:>7} messages   last {report_every}: {(now - last) / report_every * 1e3:8.3f} ms/append")
+            last = now
+    total = time.perf_counter() - start
+    print(f"{label:<12} total {total:8.2f}s for {n} appends ({total / n * 1e3:.3f} ms/append)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--legacy-max", type=int, default=2_000)
+    args = parser.parse_args()
+    report_every = max(1, args.messages // 5)
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = ConversationRepository(os.path.join(tmp, "incremental.db"))
+        run("incremental", lambda r, c: r.save(c), repo, args.messages, report_every)
+        legacy = ConversationRepository(os.path.join(tmp, "legacy.db"))
+        n = min(args.messages, args.legacy_max)
+        run("legacy", legacy_save, legacy, n, max(1, n // 5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: archiving old closed conversations — hot DB size and read latency.
+
+Seeds ``--conversations`` closed conversations of ``--messages`` messages
+each, all older than the archive threshold, plus the same number of open
+("hot") ones, then:
+
+- archives every closed one (`Archiver.run_once` until done, no pause)
+  and reports conversations/s;
+- reports the hot database before and after: bytes in use, and the file
+  size after VACUUM; and the archive file size (compression ratio);
+- times `repo.get` for a hot and for an archived conversation: the latest
+  page (limit=50), a deep page (before= the 60th message) and every
+  message (p50 / p99 over ``--reads`` reads each).
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_archive.py --conversations 2000 --messages 250
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.archiver import Archiver
+from app.repository import ConversationRepository
+
+OLD_MICROS = 1_600_000_000_000_000
+WORDS = "the quick brown fox jumps over a lazy dog while support replies with order status refund".split()
+
+
+def seed(repo: ConversationRepository, conversations: int, messages: int) -> tuple:
+    rng = random.Random(7)
+    with repo._conn() as conn:
+        ids = []
+        for i in range(2 * conversations):
+            closed = i % 2 == 0
+            cur = conn.execute(
+                "INSERT INTO conversations (title, closed, message_count) VALUES (?, ?, ?)",
+                (f"chat {i}", int(closed), messages),
+            )
+            ids.append((cur.lastrowid, closed))
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)",
+            (
+                (cid, f"user{j % 5}", " ".join(rng.choices(WORDS, k=12)), OLD_MICROS + j)
+                for cid, _ in ids
+                for j in range(messages)
+            ),
+        )
+    return next(c for c, closed in ids if not closed), next(c for c, closed in ids if closed)
+
+
+def latency(fn, reads: int) -> str:
+    samples = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return f"p50 {statistics.median(samples) * 1e3:7.3f} ms  p99 {samples[int(0.99 * (len(samples) - 1))] * 1e3:7.3f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=2_000, help="closed ones (as many open ones are added)")
+    parser.add_argument("--messages", type=int, default=250, help="per conversation")
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = ConversationRepository(os.path.join(tmp, "hot.db"))
+        hot_id, archived_id = seed(repo, args.conversations, args.messages)
+        before = repo.storage_stats()
+        print(f"{2 * args.conversations} conversations x {args.messages} messages, half of them closed and old")
+
+        archiver = Archiver(repo, after_days=30, batch=500, pause=0)
+        start = time.perf_counter()
+        archiver.run_once()
+        while archiver.more:
+            archiver.run_once()
+        elapsed = time.perf_counter() - start
+        job = archiver.metrics()["job"]
+        print(f"  archived {job['conversations']} conversations ({job['messages']} messages) in {elapsed:.2f}s "
+              f"({job['conversations'] / elapsed:,.0f} conversations/s)")
+
+        repo.vacuum()
+        after = repo.storage_stats()
+        print(f"  hot DB in use   {before['hot_used_bytes'] / 1e6:8.1f} MB -> {after['hot_used_bytes'] / 1e6:8.1f} MB (after VACUUM)")
+        print(f"  archive file    {after['archive_file_bytes'] / 1e6:8.1f} MB for {job['messages']} messages")
+
+        deep = repo.get(hot_id).messages[-60].id, repo.get(archived_id).messages[-60].id
+        for label, conv_id, before_id in (("hot", hot_id, deep[0]), ("archived", archived_id, deep[1])):
+            print(f"  {label:<9} latest page  {latency(lambda: repo.get(conv_id, limit=50), args.reads)}")
+            print(f"  {label:<9} deep page    {latency(lambda: repo.get(conv_id, limit=50, before=before_id), args.reads)}")
+            print(f"  {label:<9} all messages {latency(lambda: repo.get(conv_id), args.reads)}")
+
+
+if __name__ == "__main__":
+    main()
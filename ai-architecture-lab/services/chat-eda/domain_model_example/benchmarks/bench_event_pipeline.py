@@ -0,0 +1,81 @@
+"""Benchmark: event pipeline throughput through the in-process broker.
+
+Seeds ``--conversations`` conversations with ``--messages`` messages each
+(one MessageAdded event per message, saved through the Repository, so the
+outbox is filled exactly as the API fills it), then drains the whole
+outbox through `EventPipeline` for each worker count in ``--workers``.
+
+Each event runs one handler that simulates a slow side effect (a call to
+a search index or an analytics store) by awaiting ``--handler-ms``. The
+checkpoint is reset before every run (and pruning is off), so each run
+handles every event.
+
+Reports events/s, the deepest queue seen, and how often the relay waited
+for the bounded queues (backpressure).
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_event_pipeline.py --workers 1 4 16 64
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from app.consumers import EventPipeline
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+
+def seed(repo: ConversationRepository, conversations: int, messages: int) -> int:
+    for c in range(conversations):
+        conv = Conversation(title=f"conv {c}")
+        for i in range(messages):
+            conv.add_message("user", f"message {i}")
+        repo.save(conv)
+    return conversations * messages
+
+
+async def run(repo: ConversationRepository, workers: int, queue_size: int, handler_ms: float) -> None:
+    repo.set_checkpoint(EventPipeline.CHECKPOINT, 0)
+    pipeline = EventPipeline(repo, workers=workers, queue_size=queue_size, prune_every=0)
+    deepest = 0
+
+    async def side_effect(event):
+        nonlocal deepest
+        deepest = max(deepest, max(pipeline.broker.depths()))
+        await asyncio.sleep(handler_ms / 1000)
+
+    pipeline.subscribe(side_effect)
+    start = time.perf_counter()
+    await pipeline.start()
+    await pipeline.drain(timeout=600)
+    elapsed = time.perf_counter() - start
+    await pipeline.stop()
+    stats = pipeline.metrics()
+    print(
+        f"{workers:>3} workers   {stats['handled'] / elapsed:9.0f} events/s   "
+        f"deepest queue {deepest:>5}/{queue_size}   backpressure waits {stats['backpressure_waits']:>6}   "
+        f"({stats['handled']} events in {elapsed:.2f}s)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument("--handler-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = ConversationRepository(os.path.join(tmp, "events.db"))
+        total = seed(repo, args.conversations, args.messages)
+        print(f"{total} events, handler {args.handler_ms} ms each, queue size {args.queue_size}")
+        for workers in args.workers:
+            asyncio.run(run(repo, workers, args.queue_size, args.handler_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: columnar export vs paging through the JSON API path.
+
+Seeds ``--messages`` messages spread over ``--conversations``
+conversations, then reads every message out three ways:
+
+- api pages: what a client paging `GET /conversations/{id}` does —
+  `repo.get(id, limit=1000, before=...)`, `_conv_to_out` (a Pydantic
+  model per message) and the JSON encoding, page after page.
+- csv:       `export.export_table(..., "csv")` into a file.
+- parquet:   the same into a Parquet file (only with pyarrow installed).
+
+Reports rows/s and the output size, plus the time to export the
+`conversations` table with its per-conversation aggregates.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_export.py --messages 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app import export
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+START_MICROS = 1_609_459_200_000_000
+
+
+def seed(repo: ConversationRepository, messages: int, conversations: int) -> None:
+    ids = [repo.save(Conversation(title=f"chat {i}")).id for i in range(conversations)]
+    with repo._conn() as conn:
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)",
+            (
+                (ids[i % conversations], f"user{i % 7}", f"message number {i} of the chat", START_MICROS + i * 1_000_000)
+                for i in range(messages)
+            ),
+        )
+        conn.execute(
+            "UPDATE conversations SET message_count = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id)"
+        )
+        conn.execute("UPDATE conversations SET word_count = 6 * message_count")
+
+
+def api_pages(api, repo: ConversationRepository) -> tuple:
+    rows = size = 0
+    for conv in repo.list_page(limit=1 << 30, messages=0):
+        before = None
+        while True:
+            page = repo.get(conv.id, limit=1000, before=before)
+            out = api._conv_to_out(page, 1000)
+            size += len(out.model_dump_json())
+            rows += len(out.messages)
+            if out.next_before is None:
+                break
+            before = out.next_before
+    return rows, size
+
+
+def to_file(repo: ConversationRepository, table: str, fmt: str, path: str) -> tuple:
+    with open(path, "wb") as f:
+        rows = export.export_table(repo, table, f, fmt)
+    return rows, os.path.getsize(path)
+
+
+def report(label: str, fn) -> None:
+    start = time.perf_counter()
+    rows, size = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {rows / elapsed:12,.0f} rows/s   ({rows} rows in {elapsed:.2f}s, {size / 1e6:.1f} MB)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--conversations", type=int, default=1_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "export.db")
+        os.environ["DB_PATH"] = db_path
+        from app import api   # after DB_PATH: the module opens its repository on import
+
+        repo = ConversationRepository(db_path)
+        seed(repo, args.messages, args.conversations)
+        print(f"{args.messages} messages in {args.conversations} conversations")
+        report("messages: api pages", lambda: api_pages(api, repo))
+        formats = ["csv"] + (["parquet"] if export.pyarrow is not None else [])
+        for fmt in formats:
+            path = os.path.join(tmp, f"messages.{export.EXTENSIONS[fmt]}")
+            report(f"messages: {fmt}", lambda: to_file(repo, "messages", fmt, path))
+        if export.pyarrow is None:
+            print("  (parquet skipped: pyarrow is not installed)")
+        for fmt in formats:
+            path = os.path.join(tmp, f"conversations.{export.EXTENSIONS[fmt]}")
+            report(f"conversations: {fmt}", lambda: to_file(repo, "conversations", fmt, path))
+
+
+if __name__ == "__main__":
+    main()
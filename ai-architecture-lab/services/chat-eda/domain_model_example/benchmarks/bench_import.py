@@ -0,0 +1,109 @@
+"""Benchmark: bulk NDJSON import vs one API-style save per message.
+
+Writes an NDJSON file of ``--messages`` messages spread over
+``--conversations`` conversations (the format of `app/importer.py`), then
+imports it two ways into fresh databases:
+
+- per message: what `POST /conversations/{id}/messages` does for each
+  line — `repo.get(id, limit=100)`, `add_message`, `repo.save` (one
+  transaction per message). Only the first ``--baseline`` messages, it
+  is slow.
+- bulk:        `BulkImporter` over the whole file, read in 1 MiB chunks,
+  ``--batch-size`` rows per transaction.
+
+Reports rows/s for both, and for the bulk import the growth of the peak
+resident memory of the process: it stays flat as the file grows.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_import.py --messages 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
+from app.domain import Conversation
+from app.importer import BulkImporter
+from app.repository import ConversationRepository
+
+START_MICROS = 1_609_459_200_000_000
+
+
+def write_file(path: str, messages: int, conversations: int) -> None:
+    per_conv = max(1, messages // conversations)
+    with open(path, "w") as f:
+        for i in range(messages):
+            if i % per_conv == 0:
+                f.write(json.dumps({"type": "conversation", "title": f"legacy {i // per_conv}"}) + "\n")
+            f.write(json.dumps({
+                "type": "message",
+                "sender": f"user{i % 7}",
+                "text": f"message number {i} of the old chat system",
+                "created_at": START_MICROS + i * 1_000_000,
+            }) + "\n")
+            if i % per_conv == per_conv - 1:
+                f.write('{"type": "close"}\n')
+
+
+def per_message(repo: ConversationRepository, path: str, limit: int) -> int:
+    conv_id, done = None, 0
+    with open(path) as f:
+        for line in f:
+            obj = json.loads(line)
+            if obj["type"] == "conversation":
+                conv_id = repo.save(Conversation(title=obj["title"])).id
+            elif obj["type"] == "message":
+                conv = repo.get(conv_id, limit=100)
+                conv.add_message(obj["sender"], obj["text"], obj["created_at"])
+                repo.save(conv)
+                done += 1
+                if done == limit:
+                    break
+    return done
+
+
+def bulk(repo: ConversationRepository, path: str, batch_size: int):
+    importer = BulkImporter(repo, batch_size=batch_size)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            importer.feed(chunk)
+    return importer.finish()
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024   # KiB on Linux
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--conversations", type=int, default=10_000)
+    parser.add_argument("--baseline", type=int, default=5_000, help="messages imported one save at a time")
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.ndjson")
+        write_file(path, args.messages, args.conversations)
+        print(f"{args.messages} messages in {args.conversations} conversations, {os.path.getsize(path) / 1e6:.0f} MB of NDJSON")
+
+        repo = ConversationRepository(os.path.join(tmp, "per_message.db"))
+        start = time.perf_counter()
+        done = per_message(repo, path, args.baseline)
+        elapsed = time.perf_counter() - start
+        print(f"  per message  {done / elapsed:10,.0f} rows/s   ({done} messages in {elapsed:.2f}s)")
+
+        repo = ConversationRepository(os.path.join(tmp, "bulk.db"))
+        rss_before = peak_rss_mb()
+        stats = bulk(repo, path, args.batch_size)
+        print(
+            f"  bulk         {stats.rows_per_second():10,.0f} rows/s   ({stats.messages} messages, "
+            f"{stats.conversations} conversations in {stats.seconds:.2f}s, batch {args.batch_size})   "
+            f"peak RSS +{peak_rss_mb() - rss_before:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
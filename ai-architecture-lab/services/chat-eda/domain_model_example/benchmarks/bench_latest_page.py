@@ -0,0 +1,72 @@
+"""Benchmark: latest page of a long conversation vs loading all of it.
+
+Seeds conversations of increasing length (interleaved with a second,
+"noise" conversation so the rows of one chat are not contiguous) and
+measures time and peak Python memory (tracemalloc) for:
+
+- full:   `repo.get(id)`            — every message
+- latest: `repo.get(id, limit=50)`  — the newest page
+- deep:   `repo.get(id, limit=50, before=<a message near the start>)`
+
+The latest and deep pages should stay flat as the chat grows.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_latest_page.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+
+def seed(repo: ConversationRepository, n: int) -> Conversation:
+    conv = repo.save(Conversation(title=f"long-{n}"))
+    noise = repo.save(Conversation(title="noise"))
+    with repo._conn() as conn:
+        rows = []
+        for i in range(n):
+            rows.append((conv.id, "user", f"message {i}", 1704067200000000))
+            rows.append((noise.id, "bot", f"noise {i}", 1704067200000000))
+        conn.executemany("INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)", rows)
+    return conv
+
+
+def measure(fn, rounds: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / rounds
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            repo = ConversationRepository(os.path.join(tmp, f"chat-{n}.db"))
+            conv = seed(repo, n)
+            first_id = next(repo.iter_messages(conv.id)).id
+            # pages first: the full load leaves garbage that skews later timings
+            cases = (
+                ("latest", lambda: repo.get(conv.id, limit=50), args.rounds),
+                ("deep", lambda: repo.get(conv.id, limit=50, before=first_id + 100), args.rounds),
+                ("full", lambda: repo.get(conv.id), max(1, args.rounds // 10)),
+            )
+            for label, fn, rounds in cases:
+                elapsed, peak, loaded = measure(fn, rounds)
+                print(f"{n:>7} messages  {label:<6} {elapsed * 1e3:9.2f} ms   peak {peak / 1e6:7.2f} MB   ({len(loaded.messages)} loaded)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: list_all with one get() per conversation vs batched loading.
+
+Seeds ``--conversations`` conversations with ``--messages`` messages each
+and loads all of them twice:
+
+- n+1:     the previous `list_all` (query the ids, then `get(id)` for each,
+           reproduced below as `legacy_list_all`);
+- batched: the current `list_all` (one connection, set-based queries).
+
+For each it reports wall time, connections opened and SQL statements run
+(counted with `sqlite3.Connection.set_trace_callback`).
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_list_all.py --conversations 10000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from app.repository import ConversationRepository
+
+
+class CountingRepository(ConversationRepository):
+    """Counts the connections it opens and the statements they execute."""
+
+    connections = 0
+    statements = 0
+
+    def _conn(self):
+        conn = super()._conn()
+        CountingRepository.connections += 1
+
+        def count(_sql):
+            CountingRepository.statements += 1
+
+        conn.set_trace_callback(count)
+        return conn
+
+
+def legacy_list_all(repo: ConversationRepository):
+    conn = repo._conn()
+    ids = [r[0] for r in conn.execute("SELECT id FROM conversations ORDER BY id")]
+    conn.close()
+    return [repo.get(i) for i in ids]
+
+
+def seed(path: str, conversations: int, messages: int) -> None:
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO conversations (id, title, closed) VALUES (?, ?, 0)", ((i, f"conv {i}") for i in range(1, conversations + 1)))
+    conn.executemany(
+        "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, 'user', ?, 1704067200000000)",
+        ((1 + i % conversations, f"message {i}") for i in range(conversations * messages)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(label: str, fn, repo: CountingRepository) -> None:
+    CountingRepository.connections = CountingRepository.statements = 0
+    start = time.perf_counter()
+    convs = fn(repo)
+    elapsed = time.perf_counter() - start
+    loaded = sum(len(c.messages) for c in convs)
+    print(
+        f"{label:<8} {elapsed:8.3f}s   {CountingRepository.connections:>7} connections   "
+        f"{CountingRepository.statements:>7} statements   ({len(convs)} conversations, {loaded} messages)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "list.db")
+        repo = CountingRepository(path)
+        seed(path, args.conversations, args.messages)
+        run("n+1", legacy_list_all, repo)
+        run("batched", lambda r: r.list_all(), repo)
+
+
+if __name__ == "__main__":
+    main()
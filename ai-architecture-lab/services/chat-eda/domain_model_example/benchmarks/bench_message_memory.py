@@ -0,0 +1,132 @@
+"""Benchmark: memory of a loaded conversation, slotted vs the old layout.
+
+Seeds one conversation with ``--messages`` messages twice — once in the
+old schema (``created_at`` as ISO text) and once through the current
+Repository (INTEGER epoch micros) — and loads it in full from each:
+
+- dict:    the previous `Message` (plain dataclass with a per-instance
+           `__dict__`, ISO string timestamp), reproduced below as
+           `LegacyMessage` / `legacy_get`;
+- slotted: the current `repo.get(id)` (`@dataclass(slots=True)`, int
+           timestamp).
+
+For each it reports load time, the memory still held by the loaded
+conversation (tracemalloc, after the load) and the peak during the load.
+Times include tracemalloc's own overhead; compare them with each other only.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_message_memory.py --messages 1000000
+"""
+import argparse
+import datetime
+import gc
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+START_MICROS = 1_704_067_200_000_000  # 2024-01-01T00:00:00
+
+
+@dataclass
+class LegacyMessage:
+    sender: str
+    text: str
+    created_at: str = field(default_factory=lambda: datetime.datetime.utcnow().isoformat())
+    id: Optional[int] = None
+
+
+@dataclass
+class LegacyConversation:
+    id: Optional[int] = None
+    title: str = ""
+    messages: List[LegacyMessage] = field(default_factory=list)
+    closed: bool = False
+
+
+def legacy_get(path: str, conv_id: int) -> LegacyConversation:
+    # The old get(): conversation row, then every message as a dict-backed object.
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute("SELECT * FROM conversations WHERE id=?", (conv_id,)).fetchone()
+    conv = LegacyConversation(id=row["id"], title=row["title"], closed=bool(row["closed"]))
+    for r in conn.execute("SELECT id, sender, text, created_at FROM messages WHERE conversation_id=? ORDER BY id", (conv_id,)):
+        conv.messages.append(LegacyMessage(sender=r["sender"], text=r["text"], created_at=r["created_at"], id=r["id"]))
+    conn.close()
+    return conv
+
+
+def rows(n: int):
+    epoch = datetime.datetime(1970, 1, 1)
+    for i in range(n):
+        micros = START_MICROS + i * 1_000
+        yield "user" if i % 2 else "bot", f"message {i}", micros, (epoch + datetime.timedelta(microseconds=micros)).isoformat()
+
+
+def seed_legacy(path: str, n: int) -> int:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE conversations (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, closed INTEGER)")
+    conn.execute(
+        "CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id INTEGER, sender TEXT, "
+        "text TEXT, created_at TEXT)"
+    )
+    conn.execute("CREATE INDEX idx_messages_conversation ON messages (conversation_id, id)")
+    conn_id = conn.execute("INSERT INTO conversations (title, closed) VALUES ('big', 0)").lastrowid
+    conn.executemany(
+        "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)",
+        ((conn_id, sender, text, iso) for sender, text, _, iso in rows(n)),
+    )
+    conn.commit()
+    conn.close()
+    return conn_id
+
+
+def seed_current(repo: ConversationRepository, n: int) -> int:
+    conv = repo.save(Conversation(title="big"))
+    with repo._conn() as conn:
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)",
+            ((conv.id, sender, text, micros) for sender, text, micros, _ in rows(n)),
+        )
+    return conv.id
+
+
+def measure(label: str, load) -> None:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    conv = load()
+    elapsed = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(conv.messages)
+    print(
+        f"{label:<8} {elapsed:7.2f}s   held {held / 1e6:8.1f} MB ({held / n:6.1f} B/message)   "
+        f"peak {peak / 1e6:8.1f} MB   ({n} messages)"
+    )
+    del conv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        legacy_id = seed_legacy(legacy_path, args.messages)
+        repo = ConversationRepository(os.path.join(tmp, "current.db"))
+        current_id = seed_current(repo, args.messages)
+
+        measure("dict", lambda: legacy_get(legacy_path, legacy_id))
+        measure("slotted", lambda: repo.get(current_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmark: full-text search (FTS5) vs a LIKE scan.
+
+Seeds ``--messages`` messages (default 5M) spread over ``--conversations``
+conversations. Each text is a few words drawn from a vocabulary with a
+skewed (Zipf-like) distribution, so there are very common words and rare
+ones. The rows are inserted through the `messages` table, so the FTS
+triggers index them exactly as the app does.
+
+For a rare word, a common word and a two-word query it measures the
+average latency of one result page (20 rows):
+
+- like:     `WHERE ' ' || text || ' ' LIKE '% word %' LIMIT 20` (the baseline)
+- fts:      `repo.search(q, limit=20)`, ranked by bm25
+- fts new:  `repo.search(q, limit=20, order="newest")`
+- fts+conv: `repo.search(q, conversation_id=..., limit=20)`
+
+LIKE is only fast when the first 20 rows it reads happen to match (a very
+common word, unranked); otherwise it reads the whole table.
+
+Run from the example folder (seeding 5M rows takes a few minutes; the
+database is kept in ``--db`` so later runs can skip it):
+
+    PYTHONPATH=. python benchmarks/bench_search.py --messages 5000000 --db /tmp/search.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from app.repository import ConversationRepository
+
+VOCABULARY = 20_000
+START_MICROS = 1_704_067_200_000_000
+
+
+def word(rank: int) -> str:
+    return f"w{rank}"
+
+
+def seed(repo: ConversationRepository, messages: int, conversations: int) -> None:
+    rnd = random.Random(42)
+    # Zipf-like: word k is picked with weight 1/k
+    weights = [1 / k for k in range(1, VOCABULARY + 1)]
+    words = [word(k) for k in range(1, VOCABULARY + 1)]
+    conn = sqlite3.connect(repo.db_path)
+    conn.executemany(
+        "INSERT INTO conversations (id, title, closed) VALUES (?, ?, 0)",
+        ((c, f"conv {c}") for c in range(1, conversations + 1)),
+    )
+    batch = 100_000
+    for start in range(0, messages, batch):
+        n = min(batch, messages - start)
+        picks = rnd.choices(words, weights, k=n * 8)
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, 'user', ?, ?)",
+            (
+                (1 + (start + i) % conversations, " ".join(picks[i * 8:i * 8 + rnd.randint(3, 8)]), START_MICROS + start + i)
+                for i in range(n)
+            ),
+        )
+        conn.commit()
+        print(f"  seeded {start + n:>9} messages", end="\r", flush=True)
+    conn.execute(
+        "UPDATE conversations SET message_count = (SELECT COUNT(*) FROM messages WHERE conversation_id = conversations.id)"
+    )
+    conn.commit()
+    conn.close()
+    print()
+
+
+def like_page(repo: ConversationRepository, q: str):
+    conn = repo._conn()
+    # pad with spaces so '% w2 %' matches the whole word w2, not w20
+    sql = "SELECT id, conversation_id, text FROM messages WHERE " + " AND ".join("(' ' || text || ' ') LIKE ?" for _ in q.split())
+    rows = conn.execute(sql + " LIMIT 20", [f"% {w} %" for w in q.split()]).fetchall()
+    conn.close()
+    return rows
+
+
+def timed(fn, rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - start) / rounds, len(result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5_000_000)
+    parser.add_argument("--conversations", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--db", help="keep the seeded database here (default: a temp file)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "search.db")
+        fresh = not os.path.exists(path)
+        repo = ConversationRepository(path)
+        if fresh:
+            seed(repo, args.messages, args.conversations)
+        total = sqlite3.connect(path).execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        print(f"{total} messages")
+        conv_id = args.conversations // 2
+        # w15000 is rare, w2 is one of the most common words
+        for label, q in (("rare", "w15000"), ("common", "w2"), ("two words", "w2 w150")):
+            print(f"query {q!r} ({label})")
+            cases = (
+                ("like", lambda: like_page(repo, q)),
+                ("fts", lambda: repo.search(q, limit=20)),
+                ("fts new", lambda: repo.search(q, limit=20, order="newest")),
+                ("fts+conv", lambda: repo.search(q, conversation_id=conv_id, limit=20)),
+            )
+            for name, fn in cases:
+                elapsed, found = timed(fn, args.rounds)
+                print(f"  {name:<9} {elapsed * 1e3:10.2f} ms   ({found} rows)")
+
+
+if __name__ == "__main__":
+    main()
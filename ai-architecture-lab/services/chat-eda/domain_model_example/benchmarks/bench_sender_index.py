@@ -0,0 +1,124 @@
+"""Benchmark: per-sender queries with the (sender, created_at) index vs a full scan.
+
+Seeds ``--messages`` messages (default 10M) over ``--conversations``
+conversations, written by ``--senders`` senders and spread evenly over
+one year, then builds the index of migration 9 (build time and size are
+reported) and times, for one sender:
+
+- last day:      `messages_by_sender(sender, since=<24 hours ago>)`
+- deep page:     the next page after the sender's middle message (keyset)
+- conversations: `sender_conversations(sender)`, all of them
+
+each through the Repository (index) and as the same SQL over
+``messages NOT INDEXED`` (what every query cost before: a scan of the
+whole table).
+
+The full-text index of migration 6 is dropped from the benchmark
+database: it plays no part in these queries and would make seeding 10M
+rows several times slower.
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_sender_index.py --messages 10000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app import migrations
+from app.repository import ConversationRepository
+
+HOUR = 3_600 * 1_000_000
+DAY = 24 * HOUR
+YEAR = 365 * DAY
+END_MICROS = 1_735_689_600_000_000  # 2025-01-01
+
+SCAN_MESSAGES = """
+    SELECT id, conversation_id, sender, text, created_at FROM messages NOT INDEXED
+    WHERE sender = ? AND created_at >= ? AND (created_at, id) > (?, ?)
+    ORDER BY created_at, id LIMIT ?
+"""
+SCAN_CONVERSATIONS = """
+    SELECT conversation_id, COUNT(*), MAX(created_at) FROM messages NOT INDEXED
+    WHERE sender = ? GROUP BY conversation_id ORDER BY conversation_id
+"""
+
+
+def seed(repo: ConversationRepository, messages: int, conversations: int, senders: int) -> None:
+    rng = random.Random(3)
+    step = YEAR // messages
+    with repo._conn() as conn:
+        for trigger in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER messages_fts_{trigger}")
+        conn.execute("DROP TABLE messages_fts")
+        conn.execute("DROP INDEX idx_messages_sender_created")
+        conn.executemany("INSERT INTO conversations (id, title) VALUES (?, ?)", ((i, f"chat {i}") for i in range(1, conversations + 1)))
+        conn.executemany(
+            "INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (?, ?, ?, ?)",
+            (
+                (rng.randint(1, conversations), f"user{rng.randrange(senders)}", f"message {i}", END_MICROS - YEAR + i * step)
+                for i in range(messages)
+            ),
+        )
+
+
+def timed(fn, repeat: int) -> tuple:
+    """(median seconds, result of the last call)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=10_000_000)
+    parser.add_argument("--conversations", type=int, default=100_000)
+    parser.add_argument("--senders", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=100, help="runs of each indexed query (the scans run 3 times)")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = ConversationRepository(os.path.join(tmp, "senders.db"))
+        start = time.perf_counter()
+        seed(repo, args.messages, args.conversations, args.senders)
+        print(f"seeded {args.messages:,} messages by {args.senders:,} senders in {time.perf_counter() - start:.0f}s")
+
+        conn = repo._conn()
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        start = time.perf_counter()
+        with conn:
+            migrations.MIGRATIONS[9](conn)
+        index_pages = conn.execute("PRAGMA page_count").fetchone()[0] - pages
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        print(f"index (sender, created_at): built in {time.perf_counter() - start:.1f}s, "
+              f"{index_pages * page_size / 1e6:.0f} MB ({pages * page_size / 1e6:.0f} MB before)")
+
+        sender = "user42"
+        history = repo.messages_by_sender(sender, limit=1 << 30)
+        middle = history[len(history) // 2].message
+        since = END_MICROS - DAY
+        cases = [
+            ("last day", lambda: repo.messages_by_sender(sender, since=since, limit=100),
+             lambda: conn.execute(SCAN_MESSAGES, (sender, since, since - 1, 0, 100)).fetchall()),
+            ("deep page", lambda: repo.messages_by_sender(sender, after_id=middle.id, limit=100),
+             lambda: conn.execute(SCAN_MESSAGES, (sender, 0, middle.created_at, middle.id, 100)).fetchall()),
+            ("conversations", lambda: repo.sender_conversations(sender, limit=1 << 30),
+             lambda: conn.execute(SCAN_CONVERSATIONS, (sender,)).fetchall()),
+        ]
+        print(f"{sender}: {len(history):,} messages")
+        print(f"  {'query':<14} {'rows':>6} {'index ms':>10} {'scan ms':>10} {'speedup':>9}")
+        for label, indexed, scan in cases:
+            fast, rows = timed(indexed, args.repeat)
+            slow, scanned = timed(scan, 3)
+            assert len(rows) == len(scanned), (label, len(rows), len(scanned))
+            print(f"  {label:<14} {len(rows):>6} {fast * 1e3:>10.3f} {slow * 1e3:>10.1f} {slow / fast:>8,.0f}x")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Load test: fan-out of new messages to thousands of idle stream subscribers.
+
+Starts the event pipeline with a `MessageHub` and ``--subscribers`` idle
+subscribers, each running `stream_messages()` (what one SSE client runs,
+minus the HTTP connection), spread over ``--conversations``
+conversations (1 = everyone watches the same chat, the worst case for
+fan-out). Then it saves ``--messages`` new messages, one at a time,
+through the Repository — exactly as `POST /conversations/{id}/messages`
+does — and measures, per subscriber, the time from the commit of the
+save to the moment its stream yielded the message.
+
+Reports the memory held per idle subscriber (tracemalloc), the fan-out
+latency percentiles over all deliveries, the time until the LAST
+subscriber had each message, and how many SQL statements the whole run
+issued (to show there is no query per subscriber).
+
+Run from the example folder:
+
+    PYTHONPATH=. python benchmarks/bench_stream_fanout.py --subscribers 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from app.consumers import EventPipeline
+from app.domain import Conversation
+from app.repository import ConversationRepository
+from app.streaming import MessageHub, stream_messages
+
+
+class CountingRepository(ConversationRepository):
+    statements = 0
+
+    def _conn(self):
+        conn = super()._conn()
+
+        def count(_sql):
+            CountingRepository.statements += 1
+
+        conn.set_trace_callback(count)
+        return conn
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def subscriber(hub, repo, conv, received: dict, ready: list) -> None:
+    stream = stream_messages(hub, repo, conv)
+    ready.append(1)
+    async for kind, message in stream:
+        if kind == "message":
+            received.setdefault(message["id"], []).append(time.perf_counter())
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = CountingRepository(os.path.join(tmp, "fanout.db"))
+        convs = [repo.save(Conversation(title=f"room {c}")) for c in range(args.conversations)]
+        hub = MessageHub(heartbeat=3600)
+        pipeline = EventPipeline(repo, workers=4)
+        pipeline.subscribe(hub.handle)
+        await pipeline.start()
+
+        received: dict = {}
+        ready: list = []
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        # every subscriber of a room shares the header loaded once here
+        headers = [repo.get(c.id, limit=1) for c in convs]
+        tasks = [
+            asyncio.create_task(subscriber(hub, repo, headers[i % len(headers)], received, ready))
+            for i in range(args.subscribers)
+        ]
+        while hub.stats()["subscribers"] < args.subscribers:
+            await asyncio.sleep(0.01)
+        held = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        print(f"{args.subscribers} idle subscribers on {args.conversations} conversation(s): {held / args.subscribers:,.0f} B each")
+
+        CountingRepository.statements = 0
+        per_delivery, last_delivery = [], []
+        for i in range(args.messages):
+            conv = repo.get(convs[i % len(convs)].id, limit=1)
+            conv.add_message("user", f"message {i}")
+            repo.save(conv)
+            committed = time.perf_counter()
+            pipeline.notify()
+            message_id = conv.messages[-1].id
+            expected = args.subscribers // len(convs) + (1 if i % len(convs) < args.subscribers % len(convs) else 0)
+            while len(received.get(message_id, ())) < expected:
+                await asyncio.sleep(0.0005)
+            times = received[message_id]
+            per_delivery += [t - committed for t in times]
+            last_delivery.append(max(times) - committed)
+            await asyncio.sleep(args.gap_ms / 1000)
+
+        ms = lambda s: f"{s * 1e3:7.2f} ms"  # noqa: E731
+        print(
+            f"fan-out latency  p50 {ms(percentile(per_delivery, 0.5))}  p99 {ms(percentile(per_delivery, 0.99))}  "
+            f"max {ms(max(per_delivery))}   ({len(per_delivery)} deliveries)"
+        )
+        print(
+            f"last subscriber  p50 {ms(statistics.median(last_delivery))}  max {ms(max(last_delivery))}   "
+            f"SQL statements for {args.messages} messages: {CountingRepository.statements}"
+        )
+        print(f"hub: {hub.stats()}")
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pipeline.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=5_000)
+    parser.add_argument("--conversations", type=int, default=1)
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--gap-ms", type=float, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -34,6 +37,9 @@ def test_create_add_message_and_get(client):
     r3 = client.get(f"/conversations/{cid}")
     assert r3.status_code == 200
     assert r3.json()["messages"][0]["sender"] == "alice"
+    # timestamps are integers inside, ISO strings on the wire
+    created = datetime.datetime.fromisoformat(r3.json()["messages"][0]["created_at"])
+    assert abs(created - datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)) < datetime.timedelta(minutes=1)
 
 
 def test_close_blocks_new_messages(client):
@@ -48,3 +54,165 @@ def test_close_blocks_new_messages(client):
     # adding after close should 400
     r2 = client.post(f"/conversations/{cid}/messages", json={"sender": "bob", "text": "late"})
     assert r2.status_code == 400
+
+
+def test_parallel_writers_lose_no_messages(client, monkeypatch):
+    from app import api
+
+    monkeypatch.setattr(api, "CONFLICT_RETRIES", 100)  # never give up with 409 here
+
+    cid = client.post("/conversations", json={"title": "busy"}).json()["id"]
+    writers, per_writer = 8, 25
+
+    def write(w):
+        # call the handler itself from many threads at once
+        for i in range(per_writer):
+            api.add_message(cid, api.MessageIn(sender=f"w{w}", text=f"{w}-{i}"))
+
+    with ThreadPoolExecutor(writers) as pool:
+        list(pool.map(write, range(writers)))
+
+    conv = api.repo.get(cid)
+    assert sorted(m.text for m in conv.messages) == sorted(f"{w}-{i}" for w in range(writers) for i in range(per_writer))
+    assert conv.message_count() == writers * per_writer
+    assert conv.version == writers * per_writer
+
+
+def test_conflict_retries_never_sleep_on_the_async_writer_lane(client, monkeypatch):
+    from app import aio, api
+
+    sleeps, attempts = [], []
+    monkeypatch.setattr(api.time, "sleep", sleeps.append)
+
+    def command():
+        attempts.append(1)
+        if len(attempts) % 3:
+            raise api.ConcurrentUpdate()
+        return "saved"
+
+    assert api._retry_on_conflict(command) == "saved" and len(sleeps) == 2
+    sleeps.clear()
+    monkeypatch.setattr(aio, "ASYNC_DB", True)
+    assert api._retry_on_conflict(command) == "saved" and sleeps == []
+
+
+def test_async_mode_serves_the_same_api(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "async.db"))
+    from importlib import reload, import_module
+    import asyncio
+
+    aio = import_module("app.aio")
+    monkeypatch.setattr(aio, "ASYNC_DB", True)
+    api = reload(import_module("app.api"))
+    try:
+        assert asyncio.iscoroutinefunction(api.add_message)
+        client = TestClient(api.app)
+        cid = client.post("/conversations", json={"title": "Async"}).json()["id"]
+        r = client.post(f"/conversations/{cid}/messages", json={"sender": "bob", "text": "yo"})
+        assert [m["text"] for m in r.json()["messages"]] == ["yo"]
+        assert client.get("/conversations/999").status_code == 404
+    finally:
+        aio.shutdown()
+
+
+def test_get_conversation_pages_with_limit_and_before(client):
+    cid = client.post("/conversations", json={"title": "Paged"}).json()["id"]
+    for i in range(5):
+        client.post(f"/conversations/{cid}/messages", json={"sender": "a", "text": f"t{i}"})
+
+    page = client.get(f"/conversations/{cid}", params={"limit": 2}).json()
+    assert [m["text"] for m in page["messages"]] == ["t3", "t4"]
+    texts = []
+    while page["next_before"]:
+        texts = [m["text"] for m in page["messages"]] + texts
+        page = client.get(f"/conversations/{cid}", params={"limit": 2, "before": page["next_before"]}).json()
+    texts = [m["text"] for m in page["messages"]] + texts
+    assert texts == [f"t{i}" for i in range(5)]
+
+    closed = client.post(f"/conversations/{cid}/close").json()
+    assert closed["closed"] is True and closed["messages"] == []
+
+
+def test_list_conversations_paginated(client):
+    ids = [client.post("/conversations", json={"title": f"c{i}"}).json()["id"] for i in range(3)]
+    client.post(f"/conversations/{ids[0]}/messages", json={"sender": "a", "text": "x"})
+
+    r = client.get("/conversations", params={"limit": 2, "messages": 1})
+    assert [c["id"] for c in r.json()] == ids[:2]
+    assert [m["text"] for m in r.json()[0]["messages"]] == ["x"]
+    r2 = client.get("/conversations", params={"limit": 2, "after_id": r.headers["x-next-after-id"]})
+    assert [c["id"] for c in r2.json()] == ids[2:] and "x-next-after-id" not in r2.headers
+
+
+def test_fast_json_mode_returns_the_same_documents(client, monkeypatch):
+    from app import api
+
+    ids = [client.post("/conversations", json={"title": f"fast {i}"}).json()["id"] for i in range(3)]
+    for i in range(3):
+        client.post(f"/conversations/{ids[0]}/messages", json={"sender": "a", "text": f"héllo {i}"})
+    urls = [f"/conversations/{ids[0]}?limit=2", "/conversations?limit=2&messages=5"]
+    slow = [client.get(url) for url in urls]
+    monkeypatch.setattr(api, "FAST_JSON", True)
+    fast = [client.get(url) for url in urls]
+
+    for s, f in zip(slow, fast):
+        assert f.headers["content-type"] == "application/json"
+        assert f.json() == s.json()
+    assert fast[1].headers["x-next-after-id"] == str(ids[1])
+    assert client.get("/conversations/999").status_code == 404
+
+
+def test_conversation_stats(client):
+    cid = client.post("/conversations", json={"title": "Stats"}).json()["id"]
+    assert client.get(f"/conversations/{cid}/stats").json() == {
+        "id": cid, "message_count": 0, "total_word_count": 0, "last_message": None,
+    }
+    client.post(f"/conversations/{cid}/messages", json={"sender": "alice", "text": "hello there"})
+    client.post(f"/conversations/{cid}/messages", json={"sender": "bob", "text": "hi"})
+
+    stats = client.get(f"/conversations/{cid}/stats").json()
+    assert (stats["message_count"], stats["total_word_count"]) == (2, 3)
+    assert stats["last_message"]["text"] == "hi"
+    assert client.get("/conversations/999/stats").status_code == 404
+
+
+def test_search_endpoint(client):
+    cid = client.post("/conversations", json={"title": "Search"}).json()["id"]
+    for text in ("apples and pears", "more apples", "bananas"):
+        client.post(f"/conversations/{cid}/messages", json={"sender": "a", "text": text})
+
+    r = client.get("/search", params={"q": "apples", "limit": 1})
+    assert r.status_code == 200
+    page = r.json()
+    assert len(page["results"]) == 1 and page["next_offset"] == 1
+    assert page["results"][0]["conversation_id"] == cid
+    assert "<mark>apples</mark>" in page["results"][0]["snippet"]
+    rest = client.get("/search", params={"q": "apples", "limit": 1, "offset": 1}).json()
+    assert len(rest["results"]) == 1 and rest["next_offset"] is None
+    assert client.get("/search", params={"q": "apples", "conversation_id": cid + 1}).json()["results"] == []
+    newest = client.get("/search", params={"q": "apples", "order": "newest"}).json()["results"]
+    assert [h["message"]["text"] for h in newest] == ["more apples", "apples and pears"]
+
+
+def test_sender_endpoints(client):
+    ids = [client.post("/conversations", json={"title": f"s{i}"}).json()["id"] for i in range(2)]
+    for cid in ids:
+        client.post(f"/conversations/{cid}/messages", json={"sender": "ann", "text": f"hi from {cid}"})
+        client.post(f"/conversations/{cid}/messages", json={"sender": "bob", "text": "hey"})
+
+    r = client.get("/senders/ann/messages", params={"limit": 1})
+    first = r.json()
+    assert [(m["conversation_id"], m["text"]) for m in first] == [(ids[0], f"hi from {ids[0]}")]
+    r2 = client.get("/senders/ann/messages", params={"limit": 1, "after_id": r.headers["x-next-after-id"]})
+    assert [m["conversation_id"] for m in r2.json()] == [ids[1]]
+    last = client.get("/senders/ann/messages", params={"after_id": r2.json()[0]["id"]})
+    assert last.json() == [] and "x-next-after-id" not in last.headers
+
+    since = datetime.datetime.fromisoformat(first[0]["created_at"])
+    assert len(client.get("/senders/bob/messages", params={"since": since.isoformat()}).json()) == 2
+    later = (since + datetime.timedelta(days=1)).isoformat()
+    assert client.get("/senders/bob/messages", params={"since": later}).json() == []
+    assert client.get("/senders/bob/messages", params={"after_id": first[0]["id"]}).status_code == 400
+
+    convs = client.get("/senders/bob/conversations").json()
+    assert [(c["conversation_id"], c["message_count"]) for c in convs] == [(ids[0], 1), (ids[1], 1)]
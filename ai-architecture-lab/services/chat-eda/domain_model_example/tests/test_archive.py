@@ -0,0 +1,77 @@
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+from app.archiver import Archiver
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+OLD = 1_600_000_000_000_000   # September 2020
+
+
+def seed(repo: ConversationRepository, title: str, messages: int, created_at=OLD, close=True) -> Conversation:
+    conv = Conversation(title=title)
+    for i in range(messages):
+        conv.add_message(f"user{i % 3}", f"{title} message {i}", None if created_at is None else created_at + i)
+    if close:
+        conv.close()
+    return repo.save(conv)
+
+
+def test_old_closed_conversations_move_to_the_archive_and_read_back(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "hot.db"))
+    repo.archive.chunk_size = 3
+    old = seed(repo, "old", 10)
+    still_open = seed(repo, "open", 4, close=False)
+    recent = seed(repo, "recent", 4, created_at=None)
+    before = repo.get(old.id)
+    first_page = repo.get(old.id, limit=4)
+
+    job = Archiver(repo, after_days=30, batch=10, pause=0)
+    assert job.run_once() == 1
+    assert job.run_once() == 0
+
+    with sqlite3.connect(str(tmp_path / "hot.db")) as conn:
+        counts = dict(conn.execute("SELECT conversation_id, COUNT(*) FROM messages GROUP BY conversation_id"))
+    assert counts == {still_open.id: 4, recent.id: 4}
+
+    # read back transparently: every way of loading gives the same messages
+    after = repo.get(old.id)
+    assert after.messages == before.messages and after.closed
+    assert (after.message_count(), after.total_word_count()) == (10, 30)
+    page = repo.get(old.id, limit=4)
+    assert page.messages == first_page.messages and page.has_older_messages
+    older = repo.get(old.id, limit=4, before=page.messages[0].id)
+    assert [m.text for m in older.messages] == [f"old message {i}" for i in range(2, 6)]
+    oldest = repo.get(old.id, limit=4, before=older.messages[0].id)
+    assert len(oldest.messages) == 2 and not oldest.has_older_messages
+    assert list(repo.iter_messages(old.id, after_id=before.messages[6].id)) == before.messages[7:]
+    listed = {c.id: c for c in repo.list_page(messages=2)}
+    assert listed[old.id].messages == before.messages[-2:] and listed[old.id].has_older_messages
+    assert repo.get(old.id, limit=0).messages == []
+    assert repo.check_aggregates() == []
+
+    metrics = job.metrics()
+    assert (metrics["job"]["conversations"], metrics["job"]["messages"]) == (1, 10)
+    assert metrics["storage"]["archived_messages"] == 10
+    assert metrics["archived_reads"]["reads"] >= 5
+
+
+def test_archive_job_runs_in_the_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "api_archive.db"))
+    from importlib import import_module, reload
+
+    api = reload(import_module("app.api"))
+    old = seed(api.repo, "old", 5)
+    with TestClient(api.app) as client:
+        # the first batch runs when the app starts
+        for _ in range(100):
+            if client.get("/archive/metrics").json()["job"]["conversations"]:
+                break
+            time.sleep(0.02)
+        metrics = client.get("/archive/metrics").json()
+        assert metrics["running"] and metrics["storage"]["archived_conversations"] == 1
+        body = client.get(f"/conversations/{old.id}", params={"limit": 2}).json()
+        assert [m["text"] for m in body["messages"]] == ["old message 3", "old message 4"]
+        assert body["closed"] and body["next_before"] is not None
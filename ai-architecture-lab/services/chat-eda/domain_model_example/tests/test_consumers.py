@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.consumers import EventPipeline
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+
+def make_conversation(repo, title, texts, close=False):
+    conv = Conversation(title=title)
+    for text in texts:
+        conv.add_message("u", text)
+    if close:
+        conv.close()
+    return repo.save(conv)
+
+
+def test_events_are_saved_with_the_change_and_handled_in_order(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "events.db"))
+    a = make_conversation(repo, "A", ["a0", "a1", "a2"], close=True)
+    b = make_conversation(repo, "B", ["b0"])
+    assert [e["type"] for e in repo.read_outbox(0, 10)] == ["MessageAdded"] * 3 + ["ConversationClosed", "MessageAdded"]
+
+    seen = []
+
+    async def slow_handler(event):
+        await asyncio.sleep(0.001)
+        seen.append((event["conversation_id"], event.get("text", event["type"])))
+
+    async def run(pipeline):
+        await pipeline.start()
+        await pipeline.drain()
+        await pipeline.stop()
+
+    pipeline = EventPipeline(repo, workers=2, queue_size=1)
+    pipeline.subscribe(slow_handler)
+    asyncio.run(run(pipeline))
+
+    # per conversation, in commit order; tiny queues pushed back on the relay
+    assert [t for c, t in seen if c == a.id] == ["a0", "a1", "a2", "ConversationClosed"]
+    assert [t for c, t in seen if c == b.id] == ["b0"]
+    metrics = pipeline.metrics()
+    assert metrics["handled"] == 5 and metrics["pending_events"] == 0
+    assert metrics["backpressure_waits"] > 0
+
+    # a restarted pipeline resumes after the stored checkpoint
+    make_conversation(repo, "C", ["c0"])
+    seen.clear()
+    asyncio.run(run(pipeline))
+    assert seen == [(3, "c0")]
+
+
+def test_failing_handler_is_retried_then_skipped(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "retry.db"))
+    make_conversation(repo, "A", ["boom", "ok"])
+    attempts = []
+
+    def flaky(event):  # plain functions run on a worker thread
+        attempts.append(event["text"])
+        if event["text"] == "boom":
+            raise RuntimeError("handler down")
+
+    async def run():
+        pipeline = EventPipeline(repo, workers=1, max_retries=2)
+        pipeline.subscribe(flaky)
+        await pipeline.start()
+        await pipeline.drain()
+        await pipeline.stop()
+        return pipeline.metrics()
+
+    metrics = asyncio.run(run())
+    assert attempts == ["boom", "boom", "boom", "ok"]
+    assert (metrics["retries"], metrics["failures"], metrics["pending_events"]) == (2, 1, 0)
+    assert "handler down" in metrics["last_error"]
+
+
+def test_api_hands_events_to_the_consumers(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "api_events.db"))
+    from importlib import import_module, reload
+
+    api = reload(import_module("app.api"))
+    with TestClient(api.app) as client:  # `with` runs startup: the pipeline starts
+        cid = client.post("/conversations", json={"title": "Chat"}).json()["id"]
+        client.post(f"/conversations/{cid}/messages", json={"sender": "alice", "text": "hi"})
+        client.post(f"/conversations/{cid}/close")
+
+        deadline = time.monotonic() + 5
+        while True:
+            metrics = client.get("/events/metrics").json()
+            # handled first, the checkpoint (pending_events) right after
+            if (metrics["handled"], metrics["pending_events"]) == (2, 0) or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+    assert metrics["running"] and metrics["pending_events"] == 0
+    assert metrics["analytics"] == {"top_senders": {"alice": 1}, "conversations_closed": 1}
@@ -15,3 +15,10 @@ def test_close_prevents_add():
     c.close()
     with pytest.raises(ValueError):
         c.add_message("a", "b")
+
+
+def test_messages_are_slotted_with_integer_timestamps():
+    c = Conversation()
+    m = c.add_message("alice", "hi")
+    assert isinstance(m.created_at, int)
+    assert not hasattr(m, "__dict__")
@@ -0,0 +1,90 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.domain import Conversation
+from app.importer import BulkImporter
+from app.repository import ConversationRepository
+
+
+def ndjson(*objs) -> bytes:
+    return b"".join(json.dumps(o).encode() + b"\n" for o in objs)
+
+
+def test_import_in_batches_keeps_domain_rules(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "import.db"))
+    existing = repo.save(Conversation(title="existing"))
+    data = ndjson(
+        {"type": "conversation", "title": "legacy"},
+        {"type": "message", "sender": "alice", "text": "hello there", "created_at": "2021-03-04T10:00:00"},
+        {"type": "message", "sender": "bob", "text": "hi", "created_at": 1614852000000001},
+        {"type": "close"},
+        {"type": "message", "sender": "alice", "text": "too late"},
+        {"type": "conversation", "id": existing.id},
+        {"type": "message", "sender": "carol", "text": "appended"},
+        {"type": "conversation", "id": 999},
+        {"type": "message", "sender": "nobody", "text": "lost"},
+    ) + b"{not json\n" + json.dumps({"type": "message", "sender": "carol", "text": "no newline"}).encode()
+    progress = []
+    importer = BulkImporter(repo, batch_size=2, progress=lambda s: progress.append(s.messages))
+    # feed in tiny chunks: lines are split across calls
+    for i in range(0, len(data), 7):
+        importer.feed(data[i:i + 7])
+    stats = importer.finish()
+
+    assert (stats.lines, stats.conversations, stats.messages, stats.rejected) == (11, 1, 3, 5)
+    # closed, unknown conversation, its message, bad JSON, last line (no newline, no conversation)
+    assert [line for line, _ in stats.errors] == [5, 8, 9, 10, 11]
+    assert "closed" in stats.errors[0][1]
+    assert len(progress) > 2 and progress[-1] == 3
+
+    legacy = repo.list_page(after_id=existing.id, messages=None)[0]
+    assert legacy.closed and [m.text for m in legacy.messages] == ["hello there", "hi"]
+    assert legacy.messages[0].created_at == 1614852000000000
+    assert (legacy.message_count(), legacy.total_word_count()) == (2, 3)
+    appended = repo.get(existing.id)
+    assert [m.text for m in appended.messages] == ["appended"]
+    assert appended.message_count() == 1
+    # history is not published as events
+    assert repo.outbox_head() == 0
+
+
+def test_too_long_line_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.importer.IMPORT_MAX_LINE_BYTES", 50)
+    repo = ConversationRepository(str(tmp_path / "long.db"))
+    importer = BulkImporter(repo)
+    importer.feed(ndjson({"type": "conversation", "title": "t"}))
+    importer.feed(b'{"type": "message", "sender": "a", "text": "' + b"x" * 40)
+    importer.feed(b"x" * 40)
+    importer.feed(b'"}\n' + ndjson({"type": "message", "sender": "a", "text": "short"}))
+    stats = importer.finish()
+    assert (stats.messages, stats.rejected, stats.errors[0][0]) == (1, 1, 2)
+
+
+def test_import_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "api_import.db"))
+    from importlib import import_module, reload
+
+    api = reload(import_module("app.api"))
+    client = TestClient(api.app)
+    body = ndjson(
+        {"type": "conversation", "title": "imported"},
+        *({"type": "message", "sender": "u", "text": f"m{i}"} for i in range(10)),
+        {"type": "bogus"},
+    )
+    r = client.post("/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 200
+    out = r.json()
+    assert (out["conversations"], out["messages"], out["rejected"]) == (1, 10, 1)
+    assert out["errors"] == [{"line": 12, "error": "unknown type 'bogus'"}]
+
+    cid = client.get("/conversations").json()[0]["id"]
+    assert client.get(f"/conversations/{cid}/stats").json()["message_count"] == 10
+
+    # a conversation changed by another writer mid-import: 409, not 500
+    def stale(*args, **kwargs):
+        raise api.ConcurrentUpdate()
+
+    monkeypatch.setattr(api.repo, "save_many", stale)
+    r = client.post("/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert r.status_code == 409
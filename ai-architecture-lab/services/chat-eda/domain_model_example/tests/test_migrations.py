@@ -0,0 +1,83 @@
+import re
+import sqlite3
+
+from app import migrations
+from app.domain import Conversation
+from app.repository import ConversationRepository
+
+
+def test_migrates_a_pre_migration_database(tmp_path):
+    db = str(tmp_path / "old.db")
+    with sqlite3.connect(db) as conn:
+        # the schema as the very first version of the app created it
+        conn.execute("CREATE TABLE conversations (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, closed INTEGER)")
+        conn.execute(
+            "CREATE TABLE messages (id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id INTEGER, sender TEXT, "
+            "text TEXT, created_at TEXT, FOREIGN KEY(conversation_id) REFERENCES conversations(id))"
+        )
+        conn.execute("INSERT INTO conversations (title, closed) VALUES ('old', 0)")
+        conn.execute("INSERT INTO messages (conversation_id, sender, text, created_at) VALUES (1, 'a', 'kept', '2024-01-01T00:00:01.5')")
+    conn.close()
+
+    repo = ConversationRepository(db)
+    (msg,) = repo.get(1).messages
+    assert (msg.text, msg.created_at) == ("kept", 1_704_067_201_500_000)
+
+    conn = sqlite3.connect(db)
+    assert migrations.current_version(conn) == migrations.latest_version()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    indexes = [r[1] for r in conn.execute("PRAGMA index_list(messages)")]
+    assert "idx_messages_conversation" in indexes
+    assert conn.execute("SELECT typeof(created_at) FROM messages").fetchone()[0] == "integer"
+    assert conn.execute("SELECT message_count, word_count FROM conversations").fetchone() == (1, 1)
+    assert conn.execute("SELECT rowid FROM messages_fts WHERE messages_fts MATCH 'kept'").fetchall() == [(1,)]
+    # running again is a no-op
+    assert migrations.migrate(conn) == migrations.latest_version()
+    conn.close()
+
+
+class RecordingRepository(ConversationRepository):
+    """Remembers every SQL statement the repository runs."""
+
+    def __init__(self, db_path):
+        self.statements = []
+        super().__init__(db_path)
+
+    def _conn(self):
+        conn = super()._conn()
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+
+def test_hot_queries_use_indexes(tmp_path):
+    db = str(tmp_path / "plans.db")
+    repo = RecordingRepository(db)
+    conv = Conversation(title="plans")
+    for i in range(5):
+        conv.add_message("u", f"m{i}")
+    repo.save(conv)
+    repo.statements.clear()
+
+    # the request paths of the API (list_all is a full listing by design)
+    page = repo.get(conv.id, limit=2)
+    repo.get(conv.id, limit=2, before=page.messages[0].id)
+    repo.get(conv.id)
+    page.add_message("u", "new")
+    page.close()
+    repo.save(page)
+    repo.list_page(after_id=0, limit=10, messages=3)
+    repo.list_page(after_id=0, limit=10, messages=None)
+    list(repo.iter_messages(conv.id, page_size=2))
+    repo.search("m1")
+    repo.search("m1", conversation_id=conv.id)
+    repo.messages_by_sender("u", since=0, after_id=page.messages[0].id, limit=2)
+    repo.sender_conversations("u", since=0)
+
+    queries = [q for q in repo.statements if re.match(r"\s*(SELECT|UPDATE|DELETE)\b", q, re.I)]
+    assert queries
+    conn = sqlite3.connect(db)
+    for q in queries:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + q)]
+        scans = [p for p in plan if re.match(r"SCAN (conversations|messages)\b", p)]
+        assert not scans, f"{q.strip()} -> {plan}"
+    conn.close()
@@ -4,7 +4,7 @@ from pathlib import Path
 import pytest
 
 from app.domain import Conversation
-from app.repository import ConversationRepository
+from app.repository import ConcurrentUpdate, ConversationRepository
 
 
 def test_save_and_get(tmp_path):
@@ -37,3 +37,180 @@ def test_list_all(tmp_path):
 
     all_conv = repo.list_all()
     assert len(all_conv) == 2
+
+
+def test_save_only_writes_what_changed(tmp_path):
+    import sqlite3
+
+    db = tmp_path / "test3.db"
+    repo = ConversationRepository(str(db))
+    conv = Conversation(title="Log")
+    conv.add_message("a", "first")
+    repo.save(conv)
+
+    def rows():
+        with sqlite3.connect(str(db)) as conn:
+            return conn.execute("SELECT id, text FROM messages ORDER BY id").fetchall()
+
+    before = rows()
+    loaded = repo.get(conv.id)
+    assert loaded.new_messages() == [] and not loaded.header_changed()
+
+    loaded.add_message("b", "second")
+    loaded.close()
+    assert loaded.header_changed()
+    repo.save(loaded)
+
+    # the first row was not deleted and re-inserted; one row was appended
+    after = rows()
+    assert after[0] == before[0]
+    assert [text for _, text in after] == ["first", "second"]
+    assert repo.get(conv.id).closed is True
+    assert loaded.new_messages() == []
+
+
+def test_get_pages_and_header_only(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "pages.db"))
+    conv = Conversation(title="Long")
+    for i in range(7):
+        conv.add_message("u", f"m{i}")
+    repo.save(conv)
+    ids = [m.id for m in conv.messages]
+    assert ids == sorted(ids) and None not in ids
+
+    latest = repo.get(conv.id, limit=3)
+    assert [m.text for m in latest.messages] == ["m4", "m5", "m6"]
+    assert latest.has_older_messages
+
+    older = repo.get(conv.id, limit=3, before=latest.messages[0].id)
+    assert [m.text for m in older.messages] == ["m1", "m2", "m3"]
+    oldest = repo.get(conv.id, limit=3, before=older.messages[0].id)
+    assert [m.text for m in oldest.messages] == ["m0"] and not oldest.has_older_messages
+
+    header = repo.get(conv.id, limit=0)
+    assert header.messages == [] and header.has_older_messages
+    header.add_message("u", "m7")
+    repo.save(header)
+    assert [m.text for m in repo.iter_messages(conv.id, page_size=3)] == [f"m{i}" for i in range(8)]
+
+
+def test_list_page_loads_latest_messages_per_conversation(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "list.db"))
+    for title, n in (("A", 3), ("B", 0), ("C", 1)):
+        conv = Conversation(title=title)
+        for i in range(n):
+            conv.add_message("u", f"{title}{i}")
+        repo.save(conv)
+
+    page = repo.list_page(after_id=0, limit=2, messages=2)
+    assert [c.title for c in page] == ["A", "B"]
+    assert [m.text for m in page[0].messages] == ["A1", "A2"] and page[0].has_older_messages
+    assert page[1].messages == [] and not page[1].has_older_messages
+
+    rest = repo.list_page(after_id=page[-1].id, limit=2)
+    assert [c.title for c in rest] == ["C"] and rest[0].messages == []
+
+    everything = repo.list_all()
+    assert [[m.text for m in c.messages] for c in everything] == [["A0", "A1", "A2"], [], ["C0"]]
+
+
+def test_aggregates_are_stored_and_checked(tmp_path):
+    import sqlite3
+
+    db = str(tmp_path / "totals.db")
+    repo = ConversationRepository(db)
+    conv = Conversation(title="Totals")
+    conv.add_message("a", "one two")
+    repo.save(conv)
+    page = repo.get(conv.id, limit=0)
+    page.add_message("b", "three")
+    repo.save(page)
+
+    header = repo.get(conv.id, limit=0)
+    assert header.messages == []
+    assert (header.message_count(), header.total_word_count()) == (2, 3)
+    assert repo.check_aggregates() == []
+
+    with sqlite3.connect(db) as conn:
+        conn.execute("DELETE FROM messages WHERE text = 'three'")
+    (mismatch,) = repo.check_aggregates(fix=True)
+    assert (mismatch.conversation_id, mismatch.stored, mismatch.actual) == (conv.id, (2, 3), (1, 2))
+    assert repo.check_aggregates() == []
+    assert repo.get(conv.id, limit=0).total_word_count() == 2
+
+
+def test_search_ranks_filters_and_stays_in_sync(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "search.db"))
+    a = Conversation(title="A")
+    a.add_message("u", "the deploy failed again")
+    a.add_message("u", "Déploy fixed, deploy deploy")
+    a.add_message("u", "lunch?")
+    repo.save(a)
+    b = Conversation(title="B")
+    b.add_message("u", "deploy notes")
+    repo.save(b)
+
+    hits = repo.search("deploy")
+    assert len(hits) == 3
+    assert hits[0].message.text == "Déploy fixed, deploy deploy"  # most occurrences ranks first
+    assert "<mark>deploy</mark>" in hits[0].snippet
+    assert [h.message.text for h in repo.search("deploy", conversation_id=b.id)] == ["deploy notes"]
+    assert [h.message.text for h in repo.search("depl* failed")] == ["the deploy failed again"]
+    assert repo.search('"unbalanced -quote:') == [] and repo.search("   ") == []
+    assert len(repo.search("deploy", limit=2)) == 2 and len(repo.search("deploy", limit=2, offset=2)) == 1
+    assert [h.conversation_id for h in repo.search("deploy", order="newest")] == [b.id, a.id, a.id]
+    assert repo.search(str(b.id)) == []  # ids are indexed for filtering, not matched as words
+    repo.RANK_WINDOW = 2  # rank only the two newest matches
+    assert sorted(h.message.text for h in repo.search("deploy")) == ["Déploy fixed, deploy deploy", "deploy notes"]
+    del repo.RANK_WINDOW
+
+    # new messages are searchable as soon as they are saved
+    b.add_message("u", "rollback done")
+    repo.save(b)
+    assert [h.conversation_id for h in repo.search("rollback")] == [b.id]
+
+
+def test_stale_save_is_rejected(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "cas.db"))
+    cid = repo.save(Conversation(title="race")).id
+    first, second = repo.get(cid, limit=0), repo.get(cid, limit=0)
+
+    first.close()
+    repo.save(first)
+    assert first.version == 1
+
+    # `second` was loaded before the close: its message must not land
+    second.add_message("late", "hello?")
+    with pytest.raises(ConcurrentUpdate):
+        repo.save(second)
+    stored = repo.get(cid)
+    assert stored.closed and stored.messages == [] and stored.message_count() == 0
+    assert stored.version == 1
+
+
+def test_messages_by_sender_page_by_time(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "senders.db"))
+    a, b = Conversation(title="A"), Conversation(title="B")
+    # created out of id order: pages follow created_at, ties by id
+    a.add_message("ann", "a1", created_at=300)
+    a.add_message("bob", "b1", created_at=100)
+    b.add_message("ann", "a2", created_at=100)
+    b.add_message("ann", "a3", created_at=300)
+    a.add_message("ann", "a4", created_at=200)
+    repo.save_many([a, b])
+
+    first = repo.messages_by_sender("ann", limit=2)
+    assert [m.message.text for m in first] == ["a2", "a4"]
+    assert [m.conversation_id for m in first] == [b.id, a.id]
+    rest = repo.messages_by_sender("ann", after_id=first[-1].message.id, limit=2)
+    assert [m.message.text for m in rest] == ["a1", "a3"]
+    assert repo.messages_by_sender("ann", after_id=rest[-1].message.id) == []
+    assert [m.message.text for m in repo.messages_by_sender("ann", since=250)] == ["a1", "a3"]
+    with pytest.raises(ValueError):
+        repo.messages_by_sender("bob", after_id=first[0].message.id)
+
+    convs = repo.sender_conversations("ann")
+    assert [(c.conversation_id, c.message_count, c.last_message_at) for c in convs] == [(a.id, 2, 300), (b.id, 2, 300)]
+    assert [c.conversation_id for c in repo.sender_conversations("ann", after_id=a.id)] == [b.id]
+    assert [c.message_count for c in repo.sender_conversations("ann", since=250)] == [1, 1]
+    assert repo.sender_conversations("bob", since=150) == []
@@ -0,0 +1,134 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.consumers import EventPipeline
+from app.domain import Conversation
+from app.repository import ConversationRepository
+from app.streaming import MessageHub, stream_messages
+
+
+async def collect(stream, into):
+    async for kind, message in stream:
+        into.append(message["text"] if kind == "message" else kind)
+
+
+def test_stream_catches_up_then_follows_live_messages(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "stream.db"))
+    conv = Conversation(title="live")
+    conv.add_message("u", "m0")
+    conv.add_message("u", "m1")
+    repo.save(conv)
+
+    async def run():
+        hub = MessageHub()
+        pipeline = EventPipeline(repo, workers=2, poll_interval=0.01)
+        pipeline.subscribe(hub.handle)
+        await pipeline.start()
+        await pipeline.drain()  # old events are no news for the stream
+
+        received = []
+        first = conv.messages[0].id
+        reader = asyncio.create_task(collect(stream_messages(hub, repo, repo.get(conv.id, limit=1), after=first), received))
+        while hub.stats()["subscribers"] == 0:
+            await asyncio.sleep(0.001)
+
+        live = repo.get(conv.id, limit=1)
+        live.add_message("u", "m2")
+        live.add_message("u", "m3")
+        await asyncio.to_thread(repo.save, live)
+        live.close()
+        await asyncio.to_thread(repo.save, live)
+        pipeline.notify()
+
+        await asyncio.wait_for(reader, 5)
+        await pipeline.stop()
+        return received, hub.stats()
+
+    received, stats = asyncio.run(run())
+    assert received == ["m1", "m2", "m3", "closed"]
+    assert stats["subscribers"] == 0  # unsubscribed when the stream ended
+
+
+def test_slow_subscriber_is_dropped_and_catches_up_from_storage(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "slow.db"))
+    conv = repo.save(Conversation(title="slow"))
+
+    async def run():
+        hub = MessageHub(queue_size=1)
+        received = []
+        reader = asyncio.create_task(collect(stream_messages(hub, repo, repo.get(conv.id, limit=1)), received))
+        while hub.stats()["subscribers"] == 0:
+            await asyncio.sleep(0.001)
+
+        for text in ("a", "b", "c"):
+            conv.add_message("u", text)
+        conv.close()
+        repo.save(conv)
+        # deliver the events back to back: the reader cannot keep up
+        for event in repo.read_outbox(0, 10):
+            await hub.handle(event)
+
+        await asyncio.wait_for(reader, 5)
+        return received, hub.stats()
+
+    received, stats = asyncio.run(run())
+    assert received == ["a", "b", "c", "closed"]
+    assert stats["overflows"] == 1
+
+
+def test_close_between_load_and_subscribe_ends_the_stream(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "closed.db"))
+    conv = Conversation(title="closing")
+    conv.add_message("u", "m0")
+    repo.save(conv)
+
+    async def run():
+        hub = MessageHub()
+        header = repo.get(conv.id, limit=1)
+        # closed after the load, before the stream subscribes: the hub
+        # never sees that event
+        conv.add_message("u", "bye")
+        conv.close()
+        repo.save(conv)
+        received = []
+        await asyncio.wait_for(collect(stream_messages(hub, repo, header), received), 5)
+        return received, hub.stats()["subscribers"]
+
+    assert asyncio.run(run()) == (["bye", "closed"], 0)
+
+
+def test_idle_streams_get_heartbeats(tmp_path):
+    repo = ConversationRepository(str(tmp_path / "idle.db"))
+    conv = repo.save(Conversation(title="idle"))
+
+    async def run():
+        hub = MessageHub(heartbeat=0.01)
+        stream = stream_messages(hub, repo, repo.get(conv.id, limit=1))
+        kinds = [(await stream.__anext__())[0] for _ in range(2)]
+        await stream.aclose()
+        return kinds, hub.stats()["subscribers"]
+
+    assert asyncio.run(run()) == (["heartbeat", "heartbeat"], 0)
+
+
+def test_stream_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "api_stream.db"))
+    from importlib import import_module, reload
+
+    api = reload(import_module("app.api"))
+    client = TestClient(api.app)
+    cid = client.post("/conversations", json={"title": "sse"}).json()["id"]
+    first = client.post(f"/conversations/{cid}/messages", json={"sender": "a", "text": "one"}).json()["messages"][0]["id"]
+    client.post(f"/conversations/{cid}/messages", json={"sender": "b", "text": "two"})
+    client.post(f"/conversations/{cid}/close")
+
+    # a closed conversation: the stream sends what is after the cursor, then ends
+    with client.stream("GET", f"/conversations/{cid}/stream", headers={"Last-Event-ID": str(first)}) as r:
+        assert r.headers["content-type"].startswith("text/event-stream")
+        body = r.read().decode()
+    blocks = body.strip().split("\n\n")
+    assert blocks[0].startswith(f"id: {first + 1}\nevent: message\ndata: ") and '"text":"two"' in blocks[0]
+    assert blocks[1].startswith("event: closed") and len(blocks) == 2
+
+    assert client.get("/conversations/999/stream").status_code == 404